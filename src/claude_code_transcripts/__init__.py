@@ -1,38 +1,126 @@
 """Convert Claude Code session JSON to a clean mobile-friendly HTML page with pagination."""
 
+import base64
+import gzip
+import hashlib
 import json
 import html
+import mimetypes
 import os
 import platform
+import queue
 import re
 import shutil
+import sqlite3
 import subprocess
 import tempfile
+import threading
+import time
 import webbrowser
-from datetime import datetime
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+from urllib.parse import quote, unquote, urlsplit
 
 import click
 from click_default_group import DefaultGroup
-import httpx
-from jinja2 import Environment, PackageLoader
-import markdown
-import questionary
 
-# Set up Jinja2 environment
-_jinja_env = Environment(
-    loader=PackageLoader("claude_code_transcripts", "templates"),
-    autoescape=True,
+from claude_code_transcripts.cache import (
+    BuildManifest,
+    ResponseCache,
+    SessionMetadataCache,
+    file_sha256,
+    get_tool_version,
+    template_bytecode_cache,
 )
 
-# Load macros template and expose macros
-_macros_template = _jinja_env.get_template("macros.html")
-_macros = _macros_template.module
+# httpx, jinja2, markdown and questionary (and the http_client module, which
+# needs httpx) are imported where they are first used, so that commands
+# which never need them, and --help and --version, start quickly
+
+_jinja_env = None
+_jinja_env_lock = threading.Lock()
+
+
+def get_jinja_env():
+    """Return the Jinja2 environment for the package templates, creating it on first use.
+
+    Compiled templates are cached on disk by template_bytecode_cache().
+    """
+    global _jinja_env
+    with _jinja_env_lock:
+        if _jinja_env is None:
+            from jinja2 import Environment, PackageLoader
+
+            _jinja_env = Environment(
+                loader=PackageLoader("claude_code_transcripts", "templates"),
+                autoescape=True,
+                bytecode_cache=template_bytecode_cache(),
+                # Templates ship with the package, so skip checking them for changes
+                auto_reload=False,
+            )
+        return _jinja_env
 
 
 def get_template(name):
     """Get a Jinja2 template by name."""
-    return _jinja_env.get_template(name)
+    return get_jinja_env().get_template(name)
+
+
+# Renderers for the content block macros: the macros of macros.html, or
+# the plain Python string builders of compiled_macros that reproduce them
+MACRO_BACKENDS = ("jinja", "compiled")
+
+# Environment variable choosing the macro backend when none is passed
+MACRO_BACKEND_ENV = "CLAUDE_TRANSCRIPTS_MACROS"
+
+
+class _Macros:
+    """The macros used to render transcripts.
+
+    By default every macro comes from macros.html, the reference
+    implementation, which is only compiled when one is first used. With the
+    compiled backend, opted into with CLAUDE_TRANSCRIPTS_MACROS=compiled or
+    set_macro_backend(), macros that compiled_macros implements are rendered
+    by it instead.
+    """
+
+    def __init__(self, backend=None):
+        if backend is not None and backend not in MACRO_BACKENDS:
+            raise ValueError(f"Unknown macro backend: {backend}")
+        self.backend = backend
+
+    def __getattr__(self, name):
+        if self.backend is None:
+            backend = os.environ.get(MACRO_BACKEND_ENV) or "jinja"
+            if backend not in MACRO_BACKENDS:
+                raise click.ClickException(
+                    f"{MACRO_BACKEND_ENV} must be one of "
+                    f"{', '.join(MACRO_BACKENDS)}, not {backend!r}"
+                )
+            self.backend = backend
+        macro = None
+        if self.backend == "compiled":
+            from claude_code_transcripts.compiled_macros import MACROS
+
+            macro = MACROS.get(name)
+        if macro is None:
+            macro = getattr(get_template("macros.html").module, name)
+        # Later lookups find the macro without going through __getattr__
+        setattr(self, name, macro)
+        return macro
+
+
+_macros = _Macros()
+
+
+def set_macro_backend(backend):
+    """Render content blocks with the reference "jinja" or the "compiled" macros."""
+    global _macros
+    _macros = _Macros(backend)
 
 
 # Regex to match git commit output: [branch hash] message
@@ -44,6 +132,13 @@ GITHUB_REPO_PATTERN = re.compile(
 )
 
 PROMPTS_PER_PAGE = 5
+
+# Pages linked either side of the current page before pagination collapses
+# into first ... window ... last (None links every page)
+PAGINATION_WINDOW = 3
+# Bytes of a JSONL file to scan for a "summary" entry before settling for the
+# first user message when listing sessions
+SUMMARY_SCAN_BYTES = 256 * 1024
 LONG_TEXT_THRESHOLD = (
     300  # Characters - text blocks longer than this are shown in index
 )
@@ -78,21 +173,28 @@ def extract_text_from_content(content):
 # Module-level variable for GitHub repo (set by generate_html)
 _github_repo = None
 
+# Module-level ImageStore images are extracted to, or None to inline them
+# (set by generate_html)
+_image_store = None
+
 # API constants
 API_BASE_URL = "https://api.anthropic.com/v1"
 ANTHROPIC_VERSION = "2023-06-01"
 
 
-def get_session_summary(filepath, max_length=200):
+def get_session_summary(filepath, max_length=200, max_bytes=SUMMARY_SCAN_BYTES):
     """Extract a human-readable summary from a session file.
 
     Supports both JSON and JSONL formats.
     Returns a summary string or "(no summary)" if none found.
+
+    For JSONL files at most max_bytes are scanned looking for a summary entry
+    (None scans the whole file); see _get_jsonl_summary().
     """
     filepath = Path(filepath)
     try:
         if filepath.suffix == ".jsonl":
-            return _get_jsonl_summary(filepath, max_length)
+            return _get_jsonl_summary(filepath, max_length, max_bytes)
         else:
             # For JSON files, try to get first user message
             with open(filepath, "r", encoding="utf-8") as f:
@@ -104,83 +206,218 @@ def get_session_summary(filepath, max_length=200):
                     content = msg.get("content", "")
                     text = extract_text_from_content(content)
                     if text:
-                        if len(text) > max_length:
-                            return text[: max_length - 3] + "..."
-                        return text
+                        return _truncate_summary(text, max_length)
             return "(no summary)"
     except Exception:
         return "(no summary)"
 
 
-def _get_jsonl_summary(filepath, max_length=200):
-    """Extract summary from JSONL file."""
+def _truncate_summary(text, max_length):
+    if len(text) > max_length:
+        return text[: max_length - 3] + "..."
+    return text
+
+
+def _get_jsonl_summary(filepath, max_length=200, max_bytes=SUMMARY_SCAN_BYTES):
+    """Extract summary from JSONL file in a single pass.
+
+    A "summary" entry is preferred over the first non-meta user message, so
+    both candidates are tracked together and the scan stops as soon as a
+    summary entry is found. Once max_bytes have been read the scan also stops
+    as soon as a first user message is known, so scanning a large session
+    costs roughly the size of its head rather than the whole file.
+    """
+    first_user_text = None
+    bytes_read = 0
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
+        with open(filepath, "rb") as f:
             for line in f:
+                bytes_read += len(line)
+                if (
+                    first_user_text is not None
+                    and max_bytes is not None
+                    and bytes_read > max_bytes
+                ):
+                    break
+                # Cheap pre-filter to avoid decoding lines that cannot match
+                if b'"summary"' not in line and b'"user"' not in line:
+                    continue
                 line = line.strip()
                 if not line:
                     continue
                 try:
                     obj = json.loads(line)
-                    # First priority: summary type entries
-                    if obj.get("type") == "summary" and obj.get("summary"):
-                        summary = obj["summary"]
-                        if len(summary) > max_length:
-                            return summary[: max_length - 3] + "..."
-                        return summary
-                except json.JSONDecodeError:
+                except (json.JSONDecodeError, UnicodeDecodeError):
                     continue
+                if not isinstance(obj, dict):
+                    continue
+                # First priority: summary type entries
+                if obj.get("type") == "summary" and obj.get("summary"):
+                    return _truncate_summary(obj["summary"], max_length)
+                # Second priority: first non-meta user message
+                if (
+                    first_user_text is None
+                    and obj.get("type") == "user"
+                    and not obj.get("isMeta")
+                    and obj.get("message", {}).get("content")
+                ):
+                    text = extract_text_from_content(obj["message"]["content"])
+                    if text and not text.startswith("<"):
+                        first_user_text = text
+    except Exception:
+        pass
 
-        # Second pass: find first non-meta user message
-        with open(filepath, "r", encoding="utf-8") as f:
+    if first_user_text is not None:
+        return _truncate_summary(first_user_text, max_length)
+    return "(no summary)"
+
+
+def get_session_metadata(filepath, cache=None, counts=True):
+    """Return summary, size, mtime, timestamps and counts for a session file.
+
+    The returned dict has summary, mtime, size, first_timestamp,
+    last_timestamp, message_count and tool_counts keys. With counts=False
+    only summary, mtime and size are returned, which for JSONL files only
+    needs the head of the file (see get_session_summary()); otherwise a JSONL
+    file is read once for everything. If a SessionMetadataCache is passed,
+    files whose mtime and size are unchanged are answered from the cache
+    without being opened.
+    """
+    filepath = Path(filepath)
+    stat = filepath.stat()
+    if cache is not None:
+        metadata = cache.get(filepath, stat)
+        if metadata is not None and (not counts or "message_count" in metadata):
+            return metadata
+
+    metadata = {"mtime": stat.st_mtime, "size": stat.st_size}
+    if not counts:
+        metadata["summary"] = get_session_summary(filepath)
+    else:
+        metadata.update(
+            first_timestamp=None, last_timestamp=None, message_count=0, tool_counts={}
+        )
+        if filepath.suffix == ".jsonl":
+            metadata["summary"] = _scan_jsonl_metadata(filepath, metadata)
+        else:
+            metadata["summary"] = get_session_summary(filepath)
+            try:
+                for entry in load_session_loglines(filepath):
+                    _count_entry(metadata, entry)
+            except (OSError, ValueError, AttributeError):
+                pass
+
+    if cache is not None:
+        cache.set(filepath, metadata)
+    return metadata
+
+
+def _count_entry(metadata, entry):
+    """Add a logline's timestamp, message and tool calls to metadata."""
+    timestamp = entry.get("timestamp")
+    if timestamp:
+        if metadata["first_timestamp"] is None:
+            metadata["first_timestamp"] = timestamp
+        metadata["last_timestamp"] = timestamp
+    message = entry.get("message")
+    if not message:
+        return
+    metadata["message_count"] += 1
+    content = message.get("content")
+    if not isinstance(content, list):
+        return
+    tool_counts = metadata["tool_counts"]
+    for block in content:
+        if isinstance(block, dict) and block.get("type") == "tool_use":
+            tool_name = block.get("name", "Unknown")
+            tool_counts[tool_name] = tool_counts.get(tool_name, 0) + 1
+
+
+def _scan_jsonl_metadata(
+    filepath, metadata, max_length=200, max_bytes=SUMMARY_SCAN_BYTES
+):
+    """Count a JSONL session into metadata and return its summary, in one pass.
+
+    The summary is the one _get_jsonl_summary() picks: summary entries past
+    max_bytes are ignored once a first user message is known.
+    """
+    summary = None
+    first_user_text = None
+    bytes_read = 0
+    try:
+        with open(filepath, "rb") as f:
             for line in f:
-                line = line.strip()
-                if not line:
-                    continue
+                bytes_read += len(line)
                 try:
                     obj = json.loads(line)
-                    if (
-                        obj.get("type") == "user"
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                if not isinstance(obj, dict):
+                    continue
+                entry_type = obj.get("type")
+                message = obj.get("message", {})
+                if summary is None and (
+                    first_user_text is None
+                    or max_bytes is None
+                    or bytes_read <= max_bytes
+                ):
+                    if entry_type == "summary" and obj.get("summary"):
+                        summary = obj["summary"]
+                    elif (
+                        first_user_text is None
+                        and entry_type == "user"
                         and not obj.get("isMeta")
-                        and obj.get("message", {}).get("content")
+                        and isinstance(message, dict)
+                        and message.get("content")
                     ):
-                        content = obj["message"]["content"]
-                        text = extract_text_from_content(content)
+                        text = extract_text_from_content(message["content"])
                         if text and not text.startswith("<"):
-                            if len(text) > max_length:
-                                return text[: max_length - 3] + "..."
-                            return text
-                except json.JSONDecodeError:
-                    continue
-    except Exception:
+                            first_user_text = text
+                # The loglines load_session_loglines() would yield
+                if entry_type in ("user", "assistant"):
+                    entry = {"timestamp": obj.get("timestamp", ""), "message": message}
+                    _count_entry(metadata, entry)
+    except (OSError, AttributeError):
         pass
 
-    return "(no summary)"
+    summary = summary or first_user_text
+    if summary is None:
+        return "(no summary)"
+    return _truncate_summary(summary, max_length)
 
 
-def find_local_sessions(folder, limit=10):
+def find_local_sessions(folder, limit=10, use_cache=True):
     """Find recent JSONL session files in the given folder.
 
     Returns a list of (Path, summary) tuples sorted by modification time.
     Excludes agent files and warmup/empty sessions.
+
+    Session metadata is cached on disk (see SessionMetadataCache) unless
+    use_cache is False.
     """
     folder = Path(folder)
     if not folder.exists():
         return []
 
+    cache = SessionMetadataCache() if use_cache else None
     results = []
     for f in folder.glob("**/*.jsonl"):
         if f.name.startswith("agent-"):
             continue
-        summary = get_session_summary(f)
+        metadata = get_session_metadata(f, cache, counts=False)
+        summary = metadata["summary"]
         # Skip boring/empty sessions
         if summary.lower() == "warmup" or summary == "(no summary)":
             continue
-        results.append((f, summary))
+        results.append((f, summary, metadata["mtime"]))
+
+    if cache is not None:
+        cache.prune(folder)
+        cache.save()
 
     # Sort by modification time, most recent first
-    results.sort(key=lambda x: x[0].stat().st_mtime, reverse=True)
-    return results[:limit]
+    results.sort(key=lambda x: x[2], reverse=True)
+    return [(f, summary) for f, summary, mtime in results[:limit]]
 
 
 def get_project_display_name(folder_name):
@@ -242,21 +479,26 @@ def get_project_display_name(folder_name):
     return folder_name
 
 
-def find_all_sessions(folder, include_agents=False):
+def find_all_sessions(folder, include_agents=False, use_cache=True):
     """Find all sessions in a Claude projects folder, grouped by project.
 
     Returns a list of project dicts, each containing:
     - name: display name for the project
     - path: Path to the project folder
-    - sessions: list of session dicts with path, summary, mtime, size
+    - sessions: list of session dicts with path, summary, mtime, size,
+      first_timestamp, last_timestamp, message_count and tool_counts
 
     Sessions are sorted by modification time (most recent first) within each project.
     Projects are sorted by their most recent session.
+
+    Session metadata is cached on disk (see SessionMetadataCache) unless
+    use_cache is False.
     """
     folder = Path(folder)
     if not folder.exists():
         return []
 
+    cache = SessionMetadataCache() if use_cache else None
     projects = {}
 
     for session_file in folder.glob("**/*.jsonl"):
@@ -265,7 +507,8 @@ def find_all_sessions(folder, include_agents=False):
             continue
 
         # Get summary and skip boring sessions
-        summary = get_session_summary(session_file)
+        metadata = get_session_metadata(session_file, cache)
+        summary = metadata["summary"]
         if summary.lower() == "warmup" or summary == "(no summary)":
             continue
 
@@ -280,15 +523,11 @@ def find_all_sessions(folder, include_agents=False):
                 "sessions": [],
             }
 
-        stat = session_file.stat()
-        projects[project_key]["sessions"].append(
-            {
-                "path": session_file,
-                "summary": summary,
-                "mtime": stat.st_mtime,
-                "size": stat.st_size,
-            }
-        )
+        projects[project_key]["sessions"].append({"path": session_file, **metadata})
+
+    if cache is not None:
+        cache.prune(folder)
+        cache.save()
 
     # Sort sessions within each project by mtime (most recent first)
     for project in projects.values():
@@ -303,8 +542,43 @@ def find_all_sessions(folder, include_agents=False):
     return result
 
 
+def _generate_session_html(session_path, session_dir, theme=None, render_options=None):
+    """Render one session for generate_batch_html() inside a worker process.
+
+    Returns None on success or the error message as a string, so failures
+    travel back to the parent process without having to pickle exceptions.
+    """
+    try:
+        generate_html(session_path, session_dir, theme=theme, **(render_options or {}))
+    except Exception as e:
+        return str(e)
+    return None
+
+
+def _theme_hash(theme, external_assets=False, extract_images=False, pagination=None):
+    """Return a hash of the theme's CSS and how it is output, for the build manifest."""
+    key = get_styles(theme)
+    if external_assets:
+        key += "\nexternal"
+    if extract_images:
+        key += "\nimages"
+    if pagination is not None and pagination != PaginationPolicy():
+        key += f"\n{pagination!r}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
 def generate_batch_html(
-    source_folder, output_dir, include_agents=False, progress_callback=None, theme=None
+    source_folder,
+    output_dir,
+    include_agents=False,
+    progress_callback=None,
+    theme=None,
+    use_cache=True,
+    jobs=1,
+    force=False,
+    external_assets=False,
+    extract_images=False,
+    pagination=None,
 ):
     """Generate HTML archive for all sessions in a Claude projects folder.
 
@@ -313,76 +587,228 @@ def generate_batch_html(
     - Per-project directories with index.html listing sessions
     - Per-session directories with transcript pages
 
+    Rebuilds are incremental: a build manifest in the archive records the
+    inputs each session was rendered from, so later runs only re-render
+    sessions that changed, only rewrite the indexes of affected projects and
+    delete the output of sessions that no longer exist.
+
     Args:
         source_folder: Path to the Claude projects folder
         output_dir: Path for output archive
         include_agents: Whether to include agent-* session files
         progress_callback: Optional callback(project_name, session_name, current, total)
-            called after each session is processed
+            called after each session is rendered; total counts only the
+            sessions that need rendering on this run
         theme: Optional theme dict for styling
-
-    Returns statistics dict with total_projects, total_sessions, failed_sessions, output_dir.
+        use_cache: Whether to use the on-disk session metadata cache
+        jobs: Number of worker processes used to render sessions. With 1 (the
+            default) sessions are rendered one at a time in this process.
+        force: Re-render every session even if the manifest says it is current
+        external_assets: Write CSS and JS once to content-hashed files in the
+            root of the archive and link them from every page
+        extract_images: Write images to assets/<sha256>.<ext> in the root of
+            the archive, shared and deduplicated across all sessions
+        pagination: Optional PaginationPolicy used for every session
+
+    Returns statistics dict with total_projects, total_sessions, failed_sessions,
+    skipped_sessions, removed_sessions, output_dir.
     """
     source_folder = Path(source_folder)
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
     # Find all sessions
-    projects = find_all_sessions(source_folder, include_agents=include_agents)
+    projects = find_all_sessions(
+        source_folder, include_agents=include_agents, use_cache=use_cache
+    )
+
+    # Extra generate_html() options, only passed when they differ from the defaults
+    render_options = {}
+    if external_assets:
+        render_options["external_assets"] = True
+    if extract_images:
+        render_options["extract_images"] = True
+    if render_options:
+        render_options["assets_dir"] = output_dir
+    if pagination is not None and pagination != PaginationPolicy():
+        render_options["pagination"] = pagination
+    index_assets_dir = output_dir if external_assets else None
+
+    manifest = BuildManifest(output_dir)
+    theme_hash = _theme_hash(
+        theme,
+        external_assets=external_assets,
+        extract_images=extract_images,
+        pagination=pagination,
+    )
+    tool_version = get_tool_version()
+
+    # Remove output for sessions that have disappeared since the last run
+    removed = manifest.remove_missing(
+        session["path"] for project in projects for session in project["sessions"]
+    )
+    project_names = {project["name"] for project in projects}
+    for project_name in {entry["project"] for entry in removed} - project_names:
+        shutil.rmtree(output_dir / project_name, ignore_errors=True)
+    affected_projects = {entry["project"] for entry in removed}
+
+    # Work out which sessions need rendering
+    tasks = []
+    skipped_sessions = 0
+    for project in projects:
+        project_dir = output_dir / project["name"]
+        project_dir.mkdir(exist_ok=True)
+        for session in project["sessions"]:
+            output = f"{project['name']}/{session['path'].stem}"
+            if not force and manifest.is_current(
+                session["path"],
+                session["mtime"],
+                session["size"],
+                output,
+                theme_hash,
+                tool_version,
+            ):
+                skipped_sessions += 1
+                continue
+            tasks.append((project, session, project_dir / session["path"].stem))
+            affected_projects.add(project["name"])
+        if not (project_dir / "index.html").exists():
+            affected_projects.add(project["name"])
 
     # Calculate total for progress tracking
-    total_session_count = sum(len(p["sessions"]) for p in projects)
+    total_session_count = len(tasks)
     processed_count = 0
     successful_sessions = 0
     failed_sessions = []
 
-    # Process each project
+    # Sessions still pending per project, so each project index can be
+    # written as soon as its last session finishes
+    pending = {project["name"]: 0 for project in projects}
+    for project, session, session_dir in tasks:
+        pending[project["name"]] += 1
+
+    def session_done(project, session, session_dir, sha256, error):
+        nonlocal processed_count, successful_sessions
+        if error is None:
+            successful_sessions += 1
+            manifest.record(
+                session["path"],
+                session["mtime"],
+                session["size"],
+                sha256,
+                f"{project['name']}/{session_dir.name}",
+                project["name"],
+                theme_hash,
+                tool_version,
+            )
+        else:
+            manifest.discard(session["path"])
+            failed_sessions.append(
+                {
+                    "project": project["name"],
+                    "session": session_dir.name,
+                    "error": error,
+                }
+            )
+
+        processed_count += 1
+
+        # Call progress callback if provided
+        if progress_callback:
+            progress_callback(
+                project["name"], session_dir.name, processed_count, total_session_count
+            )
+
+        pending[project["name"]] -= 1
+        if pending[project["name"]] == 0:
+            _generate_project_index(project, session_dir.parent, index_assets_dir)
+
+    # Projects affected only by removals have nothing to wait for
     for project in projects:
-        project_dir = output_dir / project["name"]
-        project_dir.mkdir(exist_ok=True)
+        if project["name"] in affected_projects and pending[project["name"]] == 0:
+            _generate_project_index(
+                project, output_dir / project["name"], index_assets_dir
+            )
 
-        # Process each session
-        for session in project["sessions"]:
-            session_name = session["path"].stem
-            session_dir = project_dir / session_name
+    # Hash sources before rendering, so a file that changes mid-render is
+    # picked up again on the next run
+    hashes = [file_sha256(session["path"]) for project, session, session_dir in tasks]
 
+    if jobs is None or jobs <= 1:
+        for (project, session, session_dir), sha256 in zip(tasks, hashes):
             # Generate transcript HTML with error handling
             try:
-                generate_html(session["path"], session_dir, theme=theme)
-                successful_sessions += 1
-            except Exception as e:
-                failed_sessions.append(
-                    {
-                        "project": project["name"],
-                        "session": session_name,
-                        "error": str(e),
-                    }
-                )
-
-            processed_count += 1
-
-            # Call progress callback if provided
-            if progress_callback:
-                progress_callback(
-                    project["name"], session_name, processed_count, total_session_count
+                generate_html(
+                    session["path"], session_dir, theme=theme, **render_options
                 )
-
-        # Generate project index
-        _generate_project_index(project, project_dir)
+                error = None
+            except Exception as e:
+                error = str(e)
+            session_done(project, session, session_dir, sha256, error)
+    else:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                executor.submit(
+                    _generate_session_html,
+                    session["path"],
+                    session_dir,
+                    theme,
+                    render_options,
+                ): (project, session, session_dir, sha256)
+                for (project, session, session_dir), sha256 in zip(tasks, hashes)
+            }
+            for future in as_completed(futures):
+                project, session, session_dir, sha256 = futures[future]
+                try:
+                    error = future.result()
+                except Exception as e:
+                    # The worker itself died (e.g. BrokenProcessPool)
+                    error = str(e) or type(e).__name__
+                session_done(project, session, session_dir, sha256, error)
 
     # Generate master index
-    _generate_master_index(projects, output_dir)
+    if affected_projects or not (output_dir / "index.html").exists():
+        _generate_master_index(projects, output_dir, index_assets_dir)
+
+    # Rebuild the archive-wide search index from the sessions' own indexes
+    if (
+        affected_projects
+        or not (output_dir / ARCHIVE_SEARCH_DIR / "index.json").exists()
+    ):
+        failed = {
+            (failure["project"], failure["session"]) for failure in failed_sessions
+        }
+        _generate_archive_search_index(projects, output_dir, exclude=failed)
+
+    manifest.save()
 
     return {
         "total_projects": len(projects),
-        "total_sessions": successful_sessions,
+        "total_sessions": successful_sessions + skipped_sessions,
         "failed_sessions": failed_sessions,
+        "skipped_sessions": skipped_sessions,
+        "removed_sessions": len(removed),
         "output_dir": output_dir,
     }
 
 
-def _generate_project_index(project, output_dir):
-    """Generate index.html for a single project."""
+def _generate_project_index(project, output_dir, assets_dir=None):
+    """Generate index.html for a single project.
+
+    If assets_dir is given, CSS and JS are linked from there instead of inlined.
+    """
+    html_content = _render_project_index(project, output_dir, assets_dir)
+    output_path = output_dir / "index.html"
+    output_path.write_text(html_content, encoding="utf-8")
+
+
+def _render_project_index(project, output_dir, assets_dir=None, archive_search=True):
+    """Render a project's index.html content.
+
+    archive_search adds the search box for the archive's search/ index.
+    """
     template = get_template("project_index.html")
 
     # Format sessions for template
@@ -402,16 +828,32 @@ def _generate_project_index(project, output_dir):
         project_name=project["name"],
         sessions=sessions_data,
         session_count=len(sessions_data),
-        css=CSS,
+        archive_search=archive_search,
+        search_root="../" + ARCHIVE_SEARCH_DIR + "/",
+        link_root="../",
+        project_filter=project["name"],
+        css=get_styles(),
         js=JS,
+        **(_asset_links(get_styles(), assets_dir, output_dir) if assets_dir else {}),
     )
+    return html_content
+
 
+def _generate_master_index(projects, output_dir, assets_dir=None):
+    """Generate master index.html listing all projects.
+
+    If assets_dir is given, CSS and JS are linked from there instead of inlined.
+    """
+    html_content = _render_master_index(projects, output_dir, assets_dir)
     output_path = output_dir / "index.html"
     output_path.write_text(html_content, encoding="utf-8")
 
 
-def _generate_master_index(projects, output_dir):
-    """Generate master index.html listing all projects."""
+def _render_master_index(projects, output_dir, assets_dir=None, archive_search=True):
+    """Render the master index.html content.
+
+    archive_search adds the search box for the archive's search/ index.
+    """
     template = get_template("master_index.html")
 
     # Format projects for template
@@ -441,117 +883,905 @@ def _generate_master_index(projects, output_dir):
         projects=projects_data,
         total_projects=len(projects),
         total_sessions=total_sessions,
-        css=CSS,
+        archive_search=archive_search,
+        search_root=ARCHIVE_SEARCH_DIR + "/",
+        link_root="",
+        project_filter=None,
+        css=get_styles(),
         js=JS,
+        **(_asset_links(get_styles(), assets_dir, output_dir) if assets_dir else {}),
     )
-
-    output_path = output_dir / "index.html"
-    output_path.write_text(html_content, encoding="utf-8")
+    return html_content
 
 
-def parse_session_file(filepath):
-    """Parse a session file and return normalized data.
+def _generate_archive_search_index(projects, output_dir, exclude=()):
+    """Write search/ for the archive from each rendered session's search index.
 
-    Supports both JSON and JSONL formats.
-    Returns a dict with 'loglines' key containing the normalized entries.
+    exclude is a set of (project_name, session_name) pairs to leave out,
+    such as sessions that failed to render.
     """
-    filepath = Path(filepath)
+    builder = ArchiveSearchIndexBuilder(output_dir)
+    for project in projects:
+        for session in project["sessions"]:
+            session_name = session["path"].stem
+            if (project["name"], session_name) in exclude:
+                continue
+            mod_time = datetime.fromtimestamp(session["mtime"])
+            builder.add_session(
+                project["name"],
+                session_name,
+                session["summary"],
+                mod_time.strftime("%Y-%m-%d %H:%M"),
+            )
+    builder.close()
+
+
+# Bump when the SQLite export schema changes
+SQLITE_SCHEMA_VERSION = 1
+
+# Rows buffered per table before they are written with executemany()
+SQLITE_BATCH_ROWS = 5000
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    project TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    summary TEXT,
+    started_at TEXT,
+    ended_at TEXT,
+    prompt_count INTEGER NOT NULL,
+    message_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    position INTEGER NOT NULL,
+    conversation INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    role TEXT,
+    timestamp TEXT,
+    anchor TEXT,
+    text TEXT
+);
+CREATE TABLE IF NOT EXISTS content_blocks (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    message_id INTEGER NOT NULL REFERENCES messages(id),
+    position INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    text TEXT
+);
+CREATE TABLE IF NOT EXISTS tool_calls (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    message_id INTEGER NOT NULL REFERENCES messages(id),
+    tool_use_id TEXT,
+    name TEXT NOT NULL,
+    input TEXT
+);
+CREATE TABLE IF NOT EXISTS tool_results (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    message_id INTEGER NOT NULL REFERENCES messages(id),
+    tool_use_id TEXT,
+    is_error INTEGER NOT NULL,
+    content TEXT
+);
+CREATE TABLE IF NOT EXISTS commits (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    conversation INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    message TEXT,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_session ON messages(session_id);
+CREATE INDEX IF NOT EXISTS content_blocks_message ON content_blocks(message_id);
+CREATE INDEX IF NOT EXISTS content_blocks_session ON content_blocks(session_id);
+CREATE INDEX IF NOT EXISTS tool_calls_session ON tool_calls(session_id);
+CREATE INDEX IF NOT EXISTS tool_calls_name ON tool_calls(name);
+CREATE INDEX IF NOT EXISTS tool_results_session ON tool_results(session_id);
+CREATE INDEX IF NOT EXISTS tool_results_tool_use ON tool_results(tool_use_id);
+CREATE INDEX IF NOT EXISTS commits_session ON commits(session_id);
+CREATE INDEX IF NOT EXISTS commits_hash ON commits(hash);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    text, content='messages', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts(messages_fts, rowid, text)
+    VALUES ('delete', old.id, old.text);
+END;
+"""
 
-    if filepath.suffix == ".jsonl":
-        return _parse_jsonl_file(filepath)
-    else:
-        # Standard JSON format
-        with open(filepath, "r", encoding="utf-8") as f:
-            return json.load(f)
+_SQLITE_INSERTS = {
+    "sessions": "INSERT INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+    "messages": "INSERT INTO messages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+    "content_blocks": "INSERT INTO content_blocks VALUES (?, ?, ?, ?, ?, ?)",
+    "tool_calls": "INSERT INTO tool_calls VALUES (NULL, ?, ?, ?, ?, ?)",
+    "tool_results": "INSERT INTO tool_results VALUES (NULL, ?, ?, ?, ?, ?)",
+    "commits": "INSERT INTO commits VALUES (NULL, ?, ?, ?, ?, ?)",
+}
 
 
-def _parse_jsonl_file(filepath):
-    """Parse JSONL file and convert to standard format."""
-    loglines = []
+class SqliteExporter:
+    """Bulk-load parsed sessions into a SQLite database.
 
-    with open(filepath, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
+    Rows are buffered per table and written with executemany() in batches
+    of SQLITE_BATCH_ROWS, each batch in its own transaction, with the
+    database in WAL mode. Row ids for sessions, messages and content blocks
+    are assigned here rather than read back after each insert, so child
+    rows can be batched along with their parents.
+
+    Sessions are keyed by path: a session whose mtime and size match the
+    stored row is skipped, and a changed one is deleted and loaded again.
+    """
+
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SQLITE_SCHEMA_VERSION):
+            self.conn.close()
+            raise ValueError(
+                f"{db_path} uses schema version {version}, expected "
+                f"{SQLITE_SCHEMA_VERSION}; export to a new database file"
+            )
+        self.conn.executescript(SQLITE_SCHEMA)
+        self.conn.execute(f"PRAGMA user_version = {SQLITE_SCHEMA_VERSION}")
+        self.next_ids = {
+            table: self.conn.execute(
+                f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}"
+            ).fetchone()[0]
+            for table in ("sessions", "messages", "content_blocks")
+        }
+        self.rows = {table: [] for table in _SQLITE_INSERTS}
+        self.pending_rows = 0
+
+    def _next_id(self, table):
+        row_id = self.next_ids[table]
+        self.next_ids[table] += 1
+        return row_id
+
+    def _add(self, table, row):
+        self.rows[table].append(row)
+        self.pending_rows += 1
+
+    def is_current(self, path, mtime, size):
+        """Return True if path is stored with the same mtime and size."""
+        row = self.conn.execute(
+            "SELECT mtime, size FROM sessions WHERE path = ?", (str(path),)
+        ).fetchone()
+        return row is not None and row[0] == mtime and row[1] == size
+
+    def remove_session(self, path):
+        """Delete path and everything loaded from it; return True if it was stored."""
+        row = self.conn.execute(
+            "SELECT id FROM sessions WHERE path = ?", (str(path),)
+        ).fetchone()
+        if row is None:
+            return False
+        # Any buffered rows must reach the database before the delete does
+        self.flush()
+        with self.conn:
+            for table in (
+                "commits",
+                "tool_results",
+                "tool_calls",
+                "content_blocks",
+                "messages",
+            ):
+                self.conn.execute(f"DELETE FROM {table} WHERE session_id = ?", row)
+            self.conn.execute("DELETE FROM sessions WHERE id = ?", row)
+        return True
+
+    def add_session(self, path, project, mtime, size, summary, loglines):
+        """Load a session's conversations, messages, blocks, tools and commits.
+
+        If reading the session fails, its buffered rows are dropped and the
+        exception is re-raised.
+        """
+        marks = {table: len(rows) for table, rows in self.rows.items()}
+        try:
+            self._add_session(path, project, mtime, size, summary, loglines)
+        except Exception:
+            for table, mark in marks.items():
+                del self.rows[table][mark:]
+            self.pending_rows = sum(len(rows) for rows in self.rows.values())
+            raise
+        if self.pending_rows >= SQLITE_BATCH_ROWS:
+            self.flush()
+
+    def _add_session(self, path, project, mtime, size, summary, loglines):
+        session_id = self._next_id("sessions")
+        position = 0
+        prompt_count = 0
+        started_at = ended_at = None
+        for conversation, conv in enumerate(iter_conversations(loglines)):
+            prompt_count += 1
+            for log_type, message_data, timestamp in conv["messages"]:
+                message_id = self._next_id("messages")
+                started_at = started_at or timestamp
+                ended_at = timestamp or ended_at
+                self._add(
+                    "messages",
+                    (
+                        message_id,
+                        session_id,
+                        position,
+                        conversation,
+                        log_type,
+                        message_role(log_type, message_data),
+                        timestamp,
+                        make_msg_id(timestamp),
+                        message_search_text(message_data),
+                    ),
+                )
+                self._add_blocks(session_id, message_id, message_data)
+                position += 1
+            stats = analyze_conversation_data(conv["messages"])
+            for commit_hash, commit_msg, commit_ts in stats["commits"]:
+                self._add(
+                    "commits",
+                    (session_id, conversation, commit_hash, commit_msg, commit_ts),
+                )
+        # Written last so a session row only exists once all its rows do
+        self._add(
+            "sessions",
+            (
+                session_id,
+                str(path),
+                project,
+                mtime,
+                size,
+                summary,
+                started_at,
+                ended_at,
+                prompt_count,
+                position,
+            ),
+        )
+
+    def _add_blocks(self, session_id, message_id, message_data):
+        content = message_data.get("content", "")
+        if isinstance(content, str):
+            content = [{"type": "text", "text": content}]
+        if not isinstance(content, list):
+            return
+        for position, block in enumerate(content):
+            if not isinstance(block, dict):
                 continue
-            try:
-                obj = json.loads(line)
-                entry_type = obj.get("type")
+            block_type = block.get("type", "")
+            text = None
+            if block_type == "text":
+                text = block.get("text", "")
+            elif block_type == "thinking":
+                text = block.get("thinking", "")
+            elif block_type == "tool_use":
+                text = json.dumps(block.get("input", {}), ensure_ascii=False)
+                self._add(
+                    "tool_calls",
+                    (
+                        session_id,
+                        message_id,
+                        block.get("id"),
+                        block.get("name", "Unknown"),
+                        text,
+                    ),
+                )
+            elif block_type == "tool_result":
+                text = tool_result_text(block.get("content", ""))
+                self._add(
+                    "tool_results",
+                    (
+                        session_id,
+                        message_id,
+                        block.get("tool_use_id"),
+                        int(bool(block.get("is_error", False))),
+                        text,
+                    ),
+                )
+            # Image data is left out; the type records that there was one
+            self._add(
+                "content_blocks",
+                (
+                    self._next_id("content_blocks"),
+                    session_id,
+                    message_id,
+                    position,
+                    block_type,
+                    text,
+                ),
+            )
 
-                # Skip non-message entries
-                if entry_type not in ("user", "assistant"):
-                    continue
+    def flush(self):
+        """Write buffered rows in one transaction."""
+        if not self.pending_rows:
+            return
+        with self.conn:
+            # Parents first so a reader never sees rows for a missing session
+            for table in ("sessions", "messages"):
+                self.conn.executemany(_SQLITE_INSERTS[table], self.rows[table])
+            for table in ("content_blocks", "tool_calls", "tool_results", "commits"):
+                self.conn.executemany(_SQLITE_INSERTS[table], self.rows[table])
+        self.rows = {table: [] for table in _SQLITE_INSERTS}
+        self.pending_rows = 0
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+def export_sessions_to_sqlite(
+    source_folder,
+    db_path,
+    include_agents=False,
+    progress_callback=None,
+    use_cache=True,
+):
+    """Load every session in a Claude projects folder into a SQLite database.
 
-                # Convert to standard format
-                entry = {
-                    "type": entry_type,
-                    "timestamp": obj.get("timestamp", ""),
-                    "message": obj.get("message", {}),
-                }
+    Creates tables for sessions, messages, content blocks, tool calls, tool
+    results and commits, plus a messages_fts full-text index over message
+    text. Re-running against the same database only loads sessions that
+    are new or whose mtime or size changed. Sessions whose files have since
+    been deleted are kept, so the database accumulates history.
 
-                # Preserve isCompactSummary if present
-                if obj.get("isCompactSummary"):
-                    entry["isCompactSummary"] = True
+    Args:
+        source_folder: Path to the Claude projects folder
+        db_path: Path of the SQLite database, created if it does not exist
+        include_agents: Whether to include agent-* session files
+        progress_callback: Optional callback(project_name, session_name, current, total)
+            called after each session is loaded; total counts only the
+            sessions that need loading on this run
+        use_cache: Whether to use the on-disk session metadata cache
 
-                loglines.append(entry)
-            except json.JSONDecodeError:
-                continue
+    Returns statistics dict with total_sessions, added_sessions,
+    updated_sessions, skipped_sessions, failed_sessions.
+    """
+    projects = find_all_sessions(
+        Path(source_folder), include_agents=include_agents, use_cache=use_cache
+    )
+    exporter = SqliteExporter(db_path)
+    try:
+        tasks = []
+        skipped_sessions = 0
+        for project in projects:
+            for session in project["sessions"]:
+                path = session["path"].resolve()
+                if exporter.is_current(path, session["mtime"], session["size"]):
+                    skipped_sessions += 1
+                else:
+                    tasks.append((project, session, path))
 
-    return {"loglines": loglines}
+        added_sessions = 0
+        updated_sessions = 0
+        failed_sessions = []
+        for current, (project, session, path) in enumerate(tasks, 1):
+            existed = exporter.remove_session(path)
+            try:
+                exporter.add_session(
+                    path,
+                    project["name"],
+                    session["mtime"],
+                    session["size"],
+                    session["summary"],
+                    load_session_loglines(path),
+                )
+            except Exception as e:
+                failed_sessions.append(
+                    {
+                        "project": project["name"],
+                        "session": path.stem,
+                        "error": str(e),
+                    }
+                )
+            else:
+                if existed:
+                    updated_sessions += 1
+                else:
+                    added_sessions += 1
+            if progress_callback:
+                progress_callback(project["name"], path.stem, current, len(tasks))
+    finally:
+        exporter.close()
 
+    return {
+        "total_sessions": added_sessions + updated_sessions + skipped_sessions,
+        "added_sessions": added_sessions,
+        "updated_sessions": updated_sessions,
+        "skipped_sessions": skipped_sessions,
+        "failed_sessions": failed_sessions,
+    }
 
-class CredentialsError(Exception):
-    """Raised when credentials cannot be obtained."""
 
-    pass
+# Default size bound for the serve command's cache of rendered files
+SERVE_CACHE_BYTES = 64 * 1024 * 1024
 
+# Minimum seconds between rescans of the source folder by the serve command,
+# so requests for sessions that do not exist cannot keep it rescanning
+SERVE_RESCAN_INTERVAL = 2.0
 
-def get_access_token_from_keychain():
-    """Get access token from macOS keychain.
+SERVE_CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".json": "application/json",
+}
 
-    Returns the access token or None if not found.
-    Raises CredentialsError with helpful message on failure.
-    """
-    if platform.system() != "Darwin":
-        return None
 
-    try:
-        result = subprocess.run(
-            [
-                "security",
-                "find-generic-password",
-                "-a",
-                os.environ.get("USER", ""),
-                "-s",
-                "Claude Code-credentials",
-                "-w",
-            ],
-            capture_output=True,
-            text=True,
+class CachedResponse:
+    """A rendered file ready to serve, with its ETag and gzipped body."""
+
+    def __init__(self, body, content_type):
+        self.body = body
+        self.content_type = content_type
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.gzip_body = gzip.compress(body, compresslevel=6)
+
+    @property
+    def size(self):
+        return len(self.body) + len(self.gzip_body)
+
+    @classmethod
+    def for_file(cls, name, body):
+        content_type = SERVE_CONTENT_TYPES.get(
+            Path(name).suffix, "application/octet-stream"
         )
-        if result.returncode != 0:
-            return None
+        return cls(body, content_type)
 
-        # Parse the JSON to get the access token
-        creds = json.loads(result.stdout.strip())
-        return creds.get("claudeAiOauth", {}).get("accessToken")
-    except (json.JSONDecodeError, subprocess.SubprocessError):
-        return None
 
+class RenderedPageCache:
+    """Size-bounded LRU of CachedResponse objects.
 
-def get_org_uuid_from_config():
-    """Get organization UUID from ~/.claude.json.
+    The serve command keys entries by session path, mtime, theme hash and
+    file name, so an edited session or a different theme never hits a
+    stale entry; old entries simply age out. Responses larger than the
+    whole cache are not stored.
+    """
 
-    Returns the organization UUID or None if not found.
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes or SERVE_CACHE_BYTES
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            response = self.entries.get(key)
+            if response is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def put(self, key, response):
+        if response.size > self.max_bytes:
+            return
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous.size
+            self.entries[key] = response
+            self.size += response.size
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted.size
+
+
+class TranscriptServer(ThreadingHTTPServer):
+    """HTTP server rendering an archive of local sessions on demand.
+
+    Serves the same hierarchy that generate_batch_html() writes: a master
+    index at /, project indexes at /<project>/ and transcripts at
+    /<project>/<session>/. A session is rendered the first time one of its
+    files is requested and every file it produced is cached in a
+    RenderedPageCache, so browsing its other pages is served from memory.
+    The names of the files each render produced are kept too, so a request
+    for a file a session does not have is answered without rendering it
+    again. The source folder is rescanned at most every
+    SERVE_RESCAN_INTERVAL seconds.
     """
-    config_path = Path.home() / ".claude.json"
-    if not config_path.exists():
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        server_address,
+        source_folder,
+        theme=None,
+        include_agents=False,
+        cache_bytes=None,
+        use_cache=True,
+        echo=None,
+    ):
+        super().__init__(server_address, TranscriptRequestHandler)
+        self.source_folder = Path(source_folder)
+        self.theme = theme
+        self.theme_hash = _theme_hash(theme)
+        self.include_agents = include_agents
+        self.use_cache = use_cache
+        self.echo = echo or click.echo
+        self.cache = RenderedPageCache(cache_bytes)
+        # Rendering sets module-level state (_github_repo), so only one
+        # session is rendered at a time
+        self.render_lock = threading.Lock()
+        # (session path, theme hash) -> (mtime, names of the files rendered)
+        self.rendered_names = {}
+        self.scan_lock = threading.Lock()
+        self.scanned_at = None
+        self.projects = []
+        self.sessions = {}
+        self.scan()
+
+    def scan(self):
+        """Rescan the source folder for projects and sessions."""
+        projects = find_all_sessions(
+            self.source_folder,
+            include_agents=self.include_agents,
+            use_cache=self.use_cache,
+        )
+        self.sessions = {
+            (project["name"], session["path"].stem): session
+            for project in projects
+            for session in project["sessions"]
+        }
+        self.projects = projects
+        self.scanned_at = time.monotonic()
+
+    def refresh(self):
+        """Rescan the source folder unless it was scanned very recently."""
+        with self.scan_lock:
+            if time.monotonic() - self.scanned_at >= SERVE_RESCAN_INTERVAL:
+                self.scan()
+
+    def find_project(self, project_name):
+        for project in self.projects:
+            if project["name"] == project_name:
+                return project
         return None
 
-    try:
-        with open(config_path) as f:
-            config = json.load(f)
-        return config.get("oauthAccount", {}).get("organizationUuid")
+    def find_session(self, project_name, session_name):
+        """Return the session dict for a URL, rescanning once if it is unknown."""
+        key = (project_name, session_name)
+        if key not in self.sessions:
+            self.refresh()
+        return self.sessions.get(key)
+
+    def has_no_file(self, path, mtime, name):
+        """Return True if this render of the session is known not to have name."""
+        rendered = self.rendered_names.get((str(path), self.theme_hash))
+        return rendered is not None and rendered[0] == mtime and name not in rendered[1]
+
+    def session_file(self, session, name):
+        """Return the CachedResponse for one of a session's files, or None."""
+        path = session["path"]
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            return None
+        key = (str(path), mtime, self.theme_hash, name)
+        if self.has_no_file(path, mtime, name):
+            return None
+        response = self.cache.get(key)
+        if response is not None:
+            return response
+        with self.render_lock:
+            # Another request may have rendered it while we waited
+            if self.has_no_file(path, mtime, name):
+                return None
+            response = self.cache.get(key)
+            if response is not None:
+                return response
+            files = self.render_session(path)
+            self.rendered_names[(str(path), self.theme_hash)] = (
+                mtime,
+                frozenset(files),
+            )
+        for file_name, body in files.items():
+            file_response = CachedResponse.for_file(file_name, body)
+            self.cache.put(key[:3] + (file_name,), file_response)
+            if file_name == name:
+                response = file_response
+        return response
+
+    def render_session(self, path):
+        """Render a session in a temporary directory; return {file name: bytes}."""
+        with tempfile.TemporaryDirectory(prefix="claude-transcripts-serve-") as tmp:
+            renderer = TranscriptRenderer(
+                tmp, theme=self.theme, echo=lambda *args, **kwargs: None
+            )
+            renderer.render(load_session_loglines(path))
+            return {
+                file.name: file.read_bytes()
+                for file in Path(tmp).iterdir()
+                if file.is_file()
+            }
+
+    def resolve(self, url_path):
+        """Map a URL path to a CachedResponse, a redirect location or None."""
+        parts = [part for part in unquote(url_path).split("/") if part]
+        if parts and parts[-1] == "index.html":
+            parts = parts[:-1]
+            is_directory = True
+        else:
+            is_directory = url_path.endswith("/") or not parts
+        if len(parts) <= 2 and not is_directory:
+            # Directories need a trailing slash so relative links resolve. The
+            # location is built from the quoted parts rather than the request
+            # path, which browsers could read as another host (/\evil.com/)
+            return "/" + "/".join(quote(part, safe="") for part in parts) + "/"
+
+        if not parts:
+            self.refresh()
+            html_content = _render_master_index(
+                self.projects, None, archive_search=False
+            )
+            return CachedResponse(
+                html_content.encode("utf-8"), "text/html; charset=utf-8"
+            )
+        if len(parts) == 1:
+            self.refresh()
+            project = self.find_project(parts[0])
+            if project is None:
+                return None
+            html_content = _render_project_index(project, None, archive_search=False)
+            return CachedResponse(
+                html_content.encode("utf-8"), "text/html; charset=utf-8"
+            )
+        if len(parts) == 2:
+            parts.append("index.html")
+        elif len(parts) != 3 or is_directory:
+            return None
+
+        session = self.find_session(parts[0], parts[1])
+        if session is None:
+            return None
+        return self.session_file(session, parts[2])
+
+
+class TranscriptRequestHandler(BaseHTTPRequestHandler):
+    """Request handler for TranscriptServer, adding ETag and gzip support."""
+
+    server_version = "claude-code-transcripts"
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def respond(self, send_body):
+        url_path = urlsplit(self.path).path
+        try:
+            response = self.server.resolve(url_path)
+        except Exception as e:
+            self.send_error(500, f"Failed to render: {e}")
+            return
+        if response is None:
+            self.send_error(404)
+            return
+        if isinstance(response, str):
+            self.send_response(301)
+            self.send_header("Location", response)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if self.etag_matches(response.etag):
+            self.send_response(304)
+            self.send_header("ETag", response.etag)
+            self.end_headers()
+            return
+
+        body = response.body
+        use_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+        if use_gzip:
+            body = response.gzip_body
+        self.send_response(200)
+        self.send_header("Content-Type", response.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", response.etag)
+        # Always revalidate; unchanged files are answered with 304
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def etag_matches(self, etag):
+        header = self.headers.get("If-None-Match")
+        if not header:
+            return False
+        if header.strip() == "*":
+            return True
+        tags = [tag.strip() for tag in header.split(",")]
+        # Weak comparison: gzip encoding does not change the ETag
+        return etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+    def log_message(self, format, *args):
+        self.server.echo(f"{self.address_string()} - {format % args}")
+
+
+def parse_session_file(filepath):
+    """Parse a session file and return normalized data.
+
+    Supports both JSON and JSONL formats.
+    Returns a dict with 'loglines' key containing the normalized entries.
+    """
+    filepath = Path(filepath)
+
+    if filepath.suffix == ".jsonl":
+        return _parse_jsonl_file(filepath)
+    else:
+        # Standard JSON format
+        with open(filepath, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+
+def _parse_jsonl_file(filepath):
+    """Parse JSONL file and convert to standard format."""
+    return {"loglines": list(_iter_jsonl_loglines(filepath))}
+
+
+def _iter_jsonl_loglines(filepath, end=None):
+    """Yield normalized loglines from a JSONL file one line at a time.
+
+    With end, only the first end bytes of the file are read.
+    """
+    with open(filepath, "rb") as f:
+        remaining = end
+        for line in f:
+            if remaining is not None:
+                if remaining <= 0:
+                    break
+                line = line[:remaining]
+                remaining -= len(line)
+            entry = _parse_jsonl_line(line.decode("utf-8"))
+            if entry is not None:
+                yield entry
+
+
+def _parse_jsonl_line(line):
+    """Return the normalized logline for one JSONL line, or None to skip it."""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        obj = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(obj, dict):
+        return None
+    entry_type = obj.get("type")
+
+    # Skip non-message entries
+    if entry_type not in ("user", "assistant"):
+        return None
+
+    # Convert to standard format
+    entry = {
+        "type": entry_type,
+        "timestamp": obj.get("timestamp", ""),
+        "message": obj.get("message", {}),
+    }
+
+    # Preserve isCompactSummary if present
+    if obj.get("isCompactSummary"):
+        entry["isCompactSummary"] = True
+    return entry
+
+
+def read_appended_loglines(filepath, offset):
+    """Parse the complete JSONL lines written to filepath after byte offset.
+
+    Returns (loglines, new_offset). A last line without its newline is still
+    being written, so it is left for the next call.
+    """
+    with open(filepath, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    loglines = []
+    for line in data[:end].split(b"\n"):
+        entry = _parse_jsonl_line(line.decode("utf-8", errors="replace"))
+        if entry is not None:
+            loglines.append(entry)
+    return loglines, offset + end
+
+
+class _JsonlLoglines:
+    """Re-iterable view of a JSONL session that re-reads the file on each pass.
+
+    The first pass fixes the session at the file's size when it starts, and
+    later passes stop there too, so every pass sees the same lines even while
+    the session is still being written.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = Path(filepath)
+        self.end = None
+
+    def __iter__(self):
+        if self.end is None:
+            self.end = self.filepath.stat().st_size
+        return _iter_jsonl_loglines(self.filepath, self.end)
+
+
+def load_session_loglines(filepath):
+    """Return the loglines of a session file as a re-iterable.
+
+    JSONL files are streamed from disk on every iteration so they never have
+    to be held in memory; JSON files have to be loaded whole and are returned
+    as a list.
+    """
+    filepath = Path(filepath)
+    if filepath.suffix == ".jsonl":
+        return _JsonlLoglines(filepath)
+    return parse_session_file(filepath).get("loglines", [])
+
+
+class CredentialsError(Exception):
+    """Raised when credentials cannot be obtained."""
+
+    pass
+
+
+def get_access_token_from_keychain():
+    """Get access token from macOS keychain.
+
+    Returns the access token or None if not found.
+    Raises CredentialsError with helpful message on failure.
+    """
+    if platform.system() != "Darwin":
+        return None
+
+    try:
+        result = subprocess.run(
+            [
+                "security",
+                "find-generic-password",
+                "-a",
+                os.environ.get("USER", ""),
+                "-s",
+                "Claude Code-credentials",
+                "-w",
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            return None
+
+        # Parse the JSON to get the access token
+        creds = json.loads(result.stdout.strip())
+        return creds.get("claudeAiOauth", {}).get("accessToken")
+    except (json.JSONDecodeError, subprocess.SubprocessError):
+        return None
+
+
+def get_org_uuid_from_config():
+    """Get organization UUID from ~/.claude.json.
+
+    Returns the organization UUID or None if not found.
+    """
+    config_path = Path.home() / ".claude.json"
+    if not config_path.exists():
+        return None
+
+    try:
+        with open(config_path) as f:
+            config = json.load(f)
+        return config.get("oauthAccount", {}).get("organizationUuid")
     except (json.JSONDecodeError, IOError):
         return None
 
@@ -566,34 +1796,402 @@ def get_api_headers(token, org_uuid):
     }
 
 
-def fetch_sessions(token, org_uuid):
+# Seconds cached responses are used without another request: the API's
+# session listing, session bodies and session URLs. Stale ones are
+# revalidated with a conditional request.
+WEB_LIST_CACHE_TTL = 5 * 60
+WEB_SESSION_CACHE_TTL = 10 * 60
+URL_CACHE_TTL = 10 * 60
+
+
+def _cache_options(use_cache, ttl):
+    """Return extra headers and extensions for a request through the response cache.
+
+    Responses stay fresh for ttl seconds; use_cache=False fetches them again.
+    """
+    headers = {} if use_cache else {"Cache-Control": "no-cache"}
+    return headers, {"cache_ttl": ttl}
+
+
+def fetch_sessions(token, org_uuid, client=None, use_cache=True):
     """Fetch list of sessions from the API.
 
     Returns the sessions data as a dict.
-    Raises httpx.HTTPError on network/API errors.
+    Raises httpx.HTTPError on network/API errors, after retrying transient ones.
+    client defaults to the shared client from get_http_client(), which
+    caches the listing for WEB_LIST_CACHE_TTL seconds unless use_cache is False.
     """
-    headers = get_api_headers(token, org_uuid)
-    response = httpx.get(f"{API_BASE_URL}/sessions", headers=headers, timeout=30.0)
+    from claude_code_transcripts.http_client import get_http_client
+
+    client = client or get_http_client()
+    cache_headers, extensions = _cache_options(use_cache, WEB_LIST_CACHE_TTL)
+    headers = {**get_api_headers(token, org_uuid), **cache_headers}
+    response = client.get(
+        f"{API_BASE_URL}/sessions",
+        headers=headers,
+        timeout=30.0,
+        extensions=extensions,
+    )
     response.raise_for_status()
     return response.json()
 
 
-def fetch_session(token, org_uuid, session_id):
+def fetch_session(token, org_uuid, session_id, client=None, use_cache=True):
     """Fetch a specific session from the API.
 
     Returns the session data as a dict.
-    Raises httpx.HTTPError on network/API errors.
+    Raises httpx.HTTPError on network/API errors, after retrying transient ones.
+    client defaults to the shared client from get_http_client(), which
+    caches the session for WEB_SESSION_CACHE_TTL seconds and then revalidates
+    it, unless use_cache is False.
     """
-    headers = get_api_headers(token, org_uuid)
-    response = httpx.get(
+    from claude_code_transcripts.http_client import get_http_client
+
+    client = client or get_http_client()
+    cache_headers, extensions = _cache_options(use_cache, WEB_SESSION_CACHE_TTL)
+    headers = {**get_api_headers(token, org_uuid), **cache_headers}
+    response = client.get(
         f"{API_BASE_URL}/session_ingress/session/{session_id}",
         headers=headers,
         timeout=60.0,
+        extensions=extensions,
     )
     response.raise_for_status()
     return response.json()
 
 
+# Session bodies web --all fetches at once, and requests started per second
+WEB_FETCH_CONCURRENCY = 8
+WEB_FETCH_RATE = 10.0
+
+# Project that web sessions without a repository are grouped under
+WEB_DEFAULT_PROJECT = "web"
+
+# Session ids become directory and file names in the archive, so anything
+# else (such as "/" or "..") is rejected
+WEB_SESSION_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]+")
+
+
+def parse_api_timestamp(value):
+    """Parse an ISO 8601 timestamp from the API into an aware datetime, or None."""
+    if not value:
+        return None
+    try:
+        # datetime.fromisoformat() only accepts a Z suffix from Python 3.11
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def list_web_sessions(token, org_uuid, since=None, client=None, use_cache=True):
+    """Fetch the metadata of every session from the API, following pagination.
+
+    While a page of results has has_more set, the next page is requested
+    with after_id set to its last_id. since is an optional aware datetime;
+    only sessions updated (or, without updated_at, created) at or after it
+    are returned. Pages are cached like fetch_sessions().
+    Raises httpx.HTTPError on network/API errors, after retrying transient ones.
+    """
+    from claude_code_transcripts.http_client import get_http_client
+
+    client = client or get_http_client()
+    cache_headers, extensions = _cache_options(use_cache, WEB_LIST_CACHE_TTL)
+    headers = {**get_api_headers(token, org_uuid), **cache_headers}
+    params = {}
+    sessions = []
+    while True:
+        response = client.get(
+            f"{API_BASE_URL}/sessions",
+            headers=headers,
+            params=params,
+            timeout=30.0,
+            extensions=extensions,
+        )
+        response.raise_for_status()
+        data = response.json()
+        page = data.get("data", [])
+        sessions.extend(page)
+        last_id = data.get("last_id") or (page[-1].get("id") if page else None)
+        if not data.get("has_more") or not last_id:
+            break
+        if last_id == params.get("after_id"):
+            # The API did not move on; stop rather than loop forever
+            break
+        params = {"after_id": last_id}
+
+    if since is not None:
+        sessions = [
+            session
+            for session in sessions
+            if (
+                parse_api_timestamp(
+                    session.get("updated_at") or session.get("created_at")
+                )
+                or since
+            )
+            >= since
+        ]
+    return sessions
+
+
+def get_web_session_project(session):
+    """Return the archive project name for a web session's metadata.
+
+    Sessions are grouped by the name of the first git repository in their
+    session_context sources, or under WEB_DEFAULT_PROJECT without one.
+    """
+    context = session.get("session_context") or {}
+    for source in context.get("sources") or []:
+        if not isinstance(source, dict):
+            continue
+        url = (source.get("url") or "").rstrip("/")
+        name = url.rsplit("/", 1)[-1].removesuffix(".git")
+        if name and name not in (".", ".."):
+            return name
+    return WEB_DEFAULT_PROJECT
+
+
+def fetch_web_sessions(
+    token,
+    org_uuid,
+    session_ids,
+    concurrency=None,
+    rate=None,
+    transport=None,
+    use_cache=True,
+):
+    """Fetch many sessions concurrently, yielding (session_id, response, error).
+
+    The bodies are fetched by an httpx.AsyncClient on an event loop in a
+    background thread, at most concurrency at a time and starting at most
+    rate requests per second, while the caller consumes the results in this
+    thread in the order they arrive. A session that failed has response None
+    and error set to the httpx.HTTPError. Responses go through the response
+    cache like fetch_session(). transport replaces the network transport of
+    the client, e.g. with an httpx.MockTransport in tests.
+    """
+    session_ids = list(session_ids)
+    import asyncio
+
+    import httpx
+
+    from claude_code_transcripts.http_client import create_async_http_client
+
+    concurrency = concurrency or WEB_FETCH_CONCURRENCY
+    rate = WEB_FETCH_RATE if rate is None else rate
+    # Bounded, so fetching pauses when the caller falls behind
+    results = queue.Queue(maxsize=concurrency)
+    stopped = threading.Event()
+
+    cache_headers, extensions = _cache_options(use_cache, WEB_SESSION_CACHE_TTL)
+    headers = {**get_api_headers(token, org_uuid), **cache_headers}
+
+    async def fetch_all():
+        semaphore = asyncio.Semaphore(concurrency)
+        async with create_async_http_client(
+            transport=transport,
+            max_connections=concurrency,
+            cache=ResponseCache(),
+            rate=rate,
+        ) as client:
+
+            async def fetch(session_id):
+                async with semaphore:
+                    if stopped.is_set():
+                        return
+                    try:
+                        response = await client.get(
+                            f"{API_BASE_URL}/session_ingress/session/{session_id}",
+                            headers=headers,
+                            extensions=extensions,
+                        )
+                        response.raise_for_status()
+                        result = (session_id, response, None)
+                    except httpx.HTTPError as e:
+                        result = (session_id, None, e)
+                await asyncio.to_thread(results.put, result)
+
+            await asyncio.gather(*(fetch(session_id) for session_id in session_ids))
+
+    def run():
+        try:
+            asyncio.run(fetch_all())
+        except BaseException as e:
+            results.put((None, None, e))
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    try:
+        for _ in session_ids:
+            session_id, response, error = results.get()
+            if session_id is None:
+                raise error
+            yield session_id, response, error
+    finally:
+        # Let the fetches still queued up finish quickly if we stopped early
+        stopped.set()
+        while thread.is_alive():
+            try:
+                results.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        thread.join()
+
+
+def generate_web_archive(
+    token,
+    org_uuid,
+    output_dir,
+    since=None,
+    concurrency=None,
+    rate=None,
+    progress_callback=None,
+    include_json=False,
+    github_repo=None,
+    theme=None,
+    external_assets=False,
+    extract_images=False,
+    pagination=None,
+    transport=None,
+    use_cache=True,
+):
+    """Fetch all web sessions from the API into an HTML archive.
+
+    Lists every session (see list_web_sessions(), which applies since),
+    fetches their bodies concurrently with fetch_web_sessions() and renders
+    each one as it arrives, into the same project/session structure with
+    master and project indexes and archive search that generate_batch_html()
+    writes. Projects come from get_web_session_project(). With include_json
+    each session's JSON is saved next to its transcript. Sessions whose id
+    does not match WEB_SESSION_ID_PATTERN are not fetched, and are reported
+    in failed_sessions.
+
+    progress_callback(project_name, session_name, current, total) is called
+    after each session. transport replaces the network transport used for
+    the session bodies. With use_cache False every response is fetched again
+    instead of being taken from the response cache.
+
+    Returns statistics dict with total_projects, total_sessions,
+    failed_sessions and output_dir.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    sessions = list_web_sessions(token, org_uuid, since=since, use_cache=use_cache)
+
+    render_options = {}
+    if external_assets or extract_images:
+        render_options["assets_dir"] = output_dir
+    index_assets_dir = output_dir if external_assets else None
+
+    entries = {}
+    failed_sessions = []
+    for session in sessions:
+        session_id = session.get("id")
+        if not session_id or session_id in entries:
+            continue
+        if not isinstance(session_id, str) or not WEB_SESSION_ID_PATTERN.fullmatch(
+            session_id
+        ):
+            failed_sessions.append(
+                {
+                    "project": get_web_session_project(session),
+                    "session": str(session_id),
+                    "error": "Invalid session id, skipped",
+                }
+            )
+            continue
+        updated = parse_api_timestamp(
+            session.get("updated_at") or session.get("created_at")
+        )
+        entries[session_id] = {
+            "project": get_web_session_project(session),
+            "path": Path(session_id),
+            "summary": session.get("title") or "Untitled",
+            "mtime": updated.timestamp() if updated else 0,
+            "size": 0,
+        }
+
+    processed_count = 0
+    for session_id, response, error in fetch_web_sessions(
+        token,
+        org_uuid,
+        entries,
+        concurrency=concurrency,
+        rate=rate,
+        transport=transport,
+        use_cache=use_cache,
+    ):
+        entry = entries[session_id]
+        session_dir = output_dir / entry["project"] / session_id
+        if error is None:
+            try:
+                session_data = response.json()
+                generate_html_from_session_data(
+                    session_data,
+                    session_dir,
+                    github_repo=github_repo,
+                    theme=theme,
+                    external_assets=external_assets,
+                    extract_images=extract_images,
+                    pagination=pagination,
+                    **render_options,
+                )
+                if include_json:
+                    with open(session_dir / f"{session_id}.json", "w") as f:
+                        json.dump(session_data, f, indent=2)
+                entry["size"] = len(response.content)
+            except Exception as e:
+                error = e
+        if error is not None:
+            entry["failed"] = True
+            failed_sessions.append(
+                {
+                    "project": entry["project"],
+                    "session": session_id,
+                    "error": str(error),
+                }
+            )
+        processed_count += 1
+        if progress_callback:
+            progress_callback(
+                entry["project"], session_id, processed_count, len(entries)
+            )
+
+    # Group into projects, most recent first like find_all_sessions()
+    projects = {}
+    for entry in entries.values():
+        if entry.get("failed"):
+            continue
+        project = projects.setdefault(
+            entry["project"],
+            {
+                "name": entry["project"],
+                "path": output_dir / entry["project"],
+                "sessions": [],
+            },
+        )
+        project["sessions"].append(entry)
+    projects = list(projects.values())
+    for project in projects:
+        project["sessions"].sort(key=lambda s: s["mtime"], reverse=True)
+    projects.sort(key=lambda p: p["sessions"][0]["mtime"], reverse=True)
+
+    for project in projects:
+        _generate_project_index(project, project["path"], index_assets_dir)
+    _generate_master_index(projects, output_dir, index_assets_dir)
+    _generate_archive_search_index(projects, output_dir)
+
+    return {
+        "total_projects": len(projects),
+        "total_sessions": sum(len(project["sessions"]) for project in projects),
+        "failed_sessions": failed_sessions,
+        "output_dir": output_dir,
+    }
+
+
 def detect_github_repo(loglines):
     """
     Detect GitHub repo from git push output in tool results.
@@ -630,10 +2228,67 @@ def format_json(obj):
         return f"<pre>{html.escape(str(obj))}</pre>"
 
 
+# Number of rendered Markdown snippets kept by render_markdown_text()
+MARKDOWN_CACHE_SIZE = 2048
+
+_markdown_local = threading.local()
+_markdown_cache = OrderedDict()
+_markdown_cache_lock = threading.Lock()
+_markdown_cache_stats = {"hits": 0, "misses": 0}
+
+
+def _get_markdown():
+    """Return this thread's reusable Markdown instance.
+
+    Building a Markdown instance loads its extensions, so one is created per
+    thread and reset between documents instead of per call.
+    """
+    md = getattr(_markdown_local, "md", None)
+    if md is None:
+        import markdown
+
+        md = markdown.Markdown(extensions=["fenced_code", "tables"])
+        _markdown_local.md = md
+    return md
+
+
 def render_markdown_text(text):
     if not text:
         return ""
-    return markdown.markdown(text, extensions=["fenced_code", "tables"])
+    # Prompts appear on both pages and the index, and compaction summaries
+    # repeat, so identical text is only converted once
+    key = hashlib.sha1(text.encode("utf-8")).digest()
+    with _markdown_cache_lock:
+        rendered = _markdown_cache.get(key)
+        if rendered is not None:
+            _markdown_cache.move_to_end(key)
+            _markdown_cache_stats["hits"] += 1
+            return rendered
+        _markdown_cache_stats["misses"] += 1
+    rendered = _get_markdown().reset().convert(text)
+    with _markdown_cache_lock:
+        _markdown_cache[key] = rendered
+        if len(_markdown_cache) > MARKDOWN_CACHE_SIZE:
+            _markdown_cache.popitem(last=False)
+    return rendered
+
+
+def markdown_cache_info():
+    """Return hits, misses, size and maxsize of the rendered Markdown cache."""
+    with _markdown_cache_lock:
+        return {
+            **_markdown_cache_stats,
+            "size": len(_markdown_cache),
+            "maxsize": MARKDOWN_CACHE_SIZE,
+        }
+
+
+def clear_markdown_cache():
+    """Empty the rendered Markdown cache and reset its counters."""
+    with _markdown_cache_lock:
+        _markdown_cache.clear()
+        _markdown_cache_stats["hits"] = 0
+        _markdown_cache_stats["misses"] = 0
 
 
 def is_json_like(text):
@@ -722,15 +2377,83 @@ def render_simple_tool(icon, label, tool_id):
     return _macros.simple_tool(icon, label, tool_id)
 
 
+# File extensions for extracted images by media type
+IMAGE_EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/gif": "gif",
+    "image/webp": "webp",
+    "image/svg+xml": "svg",
+}
+
+
+class ImageStore:
+    """Content-addressed image files for a transcript or archive.
+
+    Each base64 image is decoded once and written to
+    <directory>/<sha256>.<ext>. Identical images are only written once, and
+    files left by earlier runs or other worker processes are reused.
+    Pages reference the files through href_prefix, the path from the
+    directory holding the pages to the image directory.
+    """
+
+    def __init__(self, directory, href_prefix="assets", release_data=False):
+        self.directory = Path(directory)
+        self.href_prefix = href_prefix
+        # Drop the base64 payload from the source dict once it is on disk
+        self.release_data = release_data
+        self.written = set()
+        self.stats = {"written": 0, "deduplicated": 0}
+
+    def save(self, media_type, data):
+        """Write a base64 image and return its file name, or None if undecodable."""
+        try:
+            raw = base64.b64decode(data, validate=True)
+        except (ValueError, TypeError):
+            return None
+        ext = IMAGE_EXTENSIONS.get(media_type)
+        if ext is None:
+            guessed = mimetypes.guess_extension(media_type or "")
+            ext = guessed.lstrip(".") if guessed else "bin"
+        name = f"{hashlib.sha256(raw).hexdigest()}.{ext}"
+        path = self.directory / name
+        if name in self.written or path.exists():
+            self.stats["deduplicated"] += 1
+        else:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_name(f"{name}.{os.getpid()}.tmp")
+            temp_path.write_bytes(raw)
+            os.replace(temp_path, path)
+            self.stats["written"] += 1
+        self.written.add(name)
+        return name
+
+    def href(self, name):
+        return f"{self.href_prefix}/{name}" if self.href_prefix else name
+
+
+def render_image_source(source):
+    """Render an image content block's source as inline base64 or an extracted file."""
+    media_type = source.get("media_type", "image/png")
+    if _image_store is not None:
+        name = source.get("asset")
+        if name is None and source.get("data"):
+            name = _image_store.save(media_type, source["data"])
+            if name is not None and _image_store.release_data:
+                # The image is on disk now; keep only its file name
+                source["asset"] = name
+                del source["data"]
+        if name is not None:
+            return _macros.image_file_block(_image_store.href(name))
+    return _macros.image_block(media_type, source.get("data", ""))
+
+
 def render_content_block(block):
     if not isinstance(block, dict):
         return f"<p>{html.escape(str(block))}</p>"
     block_type = block.get("type", "")
     if block_type == "image":
-        source = block.get("source", {})
-        media_type = source.get("media_type", "image/png")
-        data = source.get("data", "")
-        return _macros.image_block(media_type, data)
+        return render_image_source(block.get("source", {}))
     elif block_type == "thinking":
         content_html = render_markdown_text(block.get("thinking", ""))
         return _macros.thinking(content_html)
@@ -815,10 +2538,8 @@ def render_content_block(block):
                             parts.append(f"<pre>{html.escape(text)}</pre>")
                     elif item_type == "image":
                         source = item.get("source", {})
-                        media_type = source.get("media_type", "image/png")
-                        data = source.get("data", "")
-                        if data:
-                            parts.append(_macros.image_block(media_type, data))
+                        if source.get("data") or source.get("asset"):
+                            parts.append(render_image_source(source))
                             has_images = True
                     else:
                         # Unknown type, render as JSON
@@ -858,19 +2579,40 @@ def make_msg_id(timestamp):
     return f"msg-{timestamp.replace(':', '-').replace('.', '-')}"
 
 
-def analyze_conversation(messages):
-    """Analyze messages in a conversation to extract stats and long texts."""
-    tool_counts = {}  # tool_name -> count
-    long_texts = []
-    commits = []  # list of (hash, message, timestamp)
+def _decode_messages(messages):
+    """Convert (log_type, message_json, timestamp) tuples to parsed message dicts.
 
+    Messages that are empty or not valid JSON are dropped.
+    """
+    decoded = []
     for log_type, message_json, timestamp in messages:
         if not message_json:
             continue
         try:
-            message_data = json.loads(message_json)
+            decoded.append((log_type, json.loads(message_json), timestamp))
         except json.JSONDecodeError:
             continue
+    return decoded
+
+
+def analyze_conversation(messages):
+    """Analyze messages in a conversation to extract stats and long texts.
+
+    Takes (log_type, message_json, timestamp) tuples; see
+    analyze_conversation_data() for the dict-based equivalent.
+    """
+    return analyze_conversation_data(_decode_messages(messages))
+
+
+def analyze_conversation_data(messages):
+    """Analyze (log_type, message_data, timestamp) tuples of parsed message dicts."""
+    tool_counts = {}  # tool_name -> count
+    long_texts = []
+    commits = []  # list of (hash, message, timestamp)
+
+    for log_type, message_data, timestamp in messages:
+        if not message_data:
+            continue
 
         content = message_data.get("content", [])
         if not isinstance(content, list):
@@ -902,10 +2644,31 @@ def analyze_conversation(messages):
     }
 
 
-def format_tool_stats(tool_counts):
-    """Format tool counts into a concise summary string."""
-    if not tool_counts:
-        return ""
+def merge_conversation_stats(stats_list):
+    """Merge analyze_conversation_data() results, e.g. across a continuation chain.
+
+    Each conversation only needs analysing once; combining their stats is
+    then linear in the number of conversations.
+    """
+    tool_counts = {}
+    long_texts = []
+    commits = []
+    for stats in stats_list:
+        for tool, count in stats["tool_counts"].items():
+            tool_counts[tool] = tool_counts.get(tool, 0) + count
+        long_texts.extend(stats["long_texts"])
+        commits.extend(stats["commits"])
+    return {
+        "tool_counts": tool_counts,
+        "long_texts": long_texts,
+        "commits": commits,
+    }
+
+
+def format_tool_stats(tool_counts):
+    """Format tool counts into a concise summary string."""
+    if not tool_counts:
+        return ""
 
     # Abbreviate common tool names
     abbrev = {
@@ -943,12 +2706,20 @@ def is_tool_result_message(message_data):
 
 
 def render_message(log_type, message_json, timestamp):
+    """Render a message given as a JSON string; see render_message_data()."""
     if not message_json:
         return ""
     try:
         message_data = json.loads(message_json)
     except json.JSONDecodeError:
         return ""
+    return render_message_data(log_type, message_data, timestamp)
+
+
+def render_message_data(log_type, message_data, timestamp):
+    """Render a parsed message dict to HTML."""
+    if not message_data:
+        return ""
     if log_type == "user":
         content_html = render_user_message_content(message_data)
         # Check if this is a tool result message
@@ -1088,6 +2859,10 @@ pre code { background: none; padding: 0; }
 .pagination .current { background: var(--user-border); color: white; }
 .pagination .disabled { color: var(--text-muted); border: 1px solid #ddd; }
 .pagination .index-link { background: var(--user-border); color: white; }
+.pagination .ellipsis { color: var(--text-muted); padding: 5px 2px; }
+.page-jump { display: inline-flex; gap: 4px; }
+.page-jump input { width: 4.5em; padding: 4px 6px; border: 1px solid var(--user-border); border-radius: 6px; font-size: 0.85rem; background: var(--card-bg); color: var(--text-color); }
+.page-jump button { padding: 4px 10px; border: 1px solid var(--user-border); border-radius: 6px; background: var(--card-bg); color: var(--user-border); font-size: 0.85rem; cursor: pointer; }
 details.continuation { margin-bottom: 16px; }
 details.continuation summary { cursor: pointer; padding: 12px 16px; background: var(--user-bg); border-left: 4px solid var(--user-border); border-radius: 12px; font-weight: 500; color: var(--text-muted); }
 details.continuation summary:hover { background: rgba(25, 118, 210, 0.15); }
@@ -1154,8 +2929,13 @@ def get_styles(theme: dict | None = None) -> str:
     return root_vars + theme_icon + _CSS_BODY
 
 
-# Default CSS for backwards compatibility
-CSS = get_styles()
+def __getattr__(name):
+    # CSS, the default theme's styles, is kept for backwards compatibility
+    # but only built when it is asked for
+    if name == "CSS":
+        return get_styles()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 JS = """
 document.querySelectorAll('time[data-timestamp]').forEach(function(el) {
@@ -1333,13 +3113,69 @@ def create_gist(output_dir, public=False):
         )
 
 
-def generate_pagination_html(current_page, total_pages):
-    return _macros.pagination(current_page, total_pages)
-
+def pagination_window(current_page, total_pages, window=PAGINATION_WINDOW):
+    """Return the page numbers to link to, with None marking a gap.
 
-def generate_index_pagination_html(total_pages):
+    Links the first and last pages plus `window` pages either side of
+    current_page, so pagination markup stays the same size however many
+    pages there are. Returns None (meaning "link every page") when window is
+    None or the window would cover every page anyway.
+    """
+    if window is None or total_pages <= 2 * window + 3:
+        return None
+    # Keep the same number of links near either end as in the middle
+    start = max(1, min(current_page - window, total_pages - 2 * window))
+    end = min(total_pages, max(current_page + window, 2 * window + 1))
+    pages = []
+    if start > 1:
+        pages.append(1)
+        if start > 2:
+            pages.append(None)
+    pages.extend(range(start, end + 1))
+    if end < total_pages:
+        if end < total_pages - 1:
+            pages.append(None)
+        pages.append(total_pages)
+    return pages
+
+
+def generate_pagination_html(current_page, total_pages, window=PAGINATION_WINDOW):
+    pages = pagination_window(current_page, total_pages, window)
+    return _macros.pagination(current_page, total_pages, pages)
+
+
+def generate_index_pagination_html(total_pages, window=PAGINATION_WINDOW):
     """Generate pagination for index page where Index is current (first page)."""
-    return _macros.index_pagination(total_pages)
+    # The index sits before page 1, so it gets the window around page 1
+    pages = pagination_window(1, total_pages, window)
+    return _macros.index_pagination(total_pages, pages)
+
+
+def write_asset(assets_dir, name, ext, content):
+    """Write content to assets_dir/<name>-<hash>.<ext> and return its path.
+
+    The hash is of the content, so an existing file never needs rewriting and
+    browsers can cache it indefinitely.
+    """
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:12]
+    path = Path(assets_dir) / f"{name}-{digest}.{ext}"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Parallel renderers may write the same asset; never expose a partial file
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        temp_path.write_text(content, encoding="utf-8")
+        os.replace(temp_path, path)
+    return path
+
+
+def _asset_links(css, assets_dir, page_dir):
+    """Write the CSS and JS assets and return template variables linking to them."""
+    css_path = write_asset(assets_dir, "styles", "css", css)
+    js_path = write_asset(assets_dir, "app", "js", JS)
+    return {
+        "css_href": Path(os.path.relpath(css_path, page_dir)).as_posix(),
+        "js_src": Path(os.path.relpath(js_path, page_dir)).as_posix(),
+    }
 
 
 def _generate_theme_html(output_dir, theme=None):
@@ -1360,33 +3196,15 @@ def _generate_theme_html(output_dir, theme=None):
     theme_path.write_text(theme_content, encoding="utf-8")
 
 
-def generate_html(json_path, output_dir, github_repo=None, theme=None):
-    output_dir = Path(output_dir)
-    output_dir.mkdir(exist_ok=True)
-
-    # Get CSS for the theme
-    css = get_styles(theme)
-
-    # Load session file (supports both JSON and JSONL)
-    data = parse_session_file(json_path)
-
-    loglines = data.get("loglines", [])
+def iter_conversations(loglines):
+    """Group loglines into conversations, yielding each one as soon as it is complete.
 
-    # Auto-detect GitHub repo if not provided
-    if github_repo is None:
-        github_repo = detect_github_repo(loglines)
-        if github_repo:
-            print(f"Auto-detected GitHub repo: {github_repo}")
-        else:
-            print(
-                "Warning: Could not auto-detect GitHub repo. Commit links will be disabled."
-            )
-
-    # Set module-level variable for render functions
-    global _github_repo
-    _github_repo = github_repo
-
-    conversations = []
+    A conversation starts at every user message that contains text and
+    collects the messages that follow it until the next such prompt. Messages
+    are kept as (log_type, message_data, timestamp) tuples holding the parsed
+    message dicts, ready for render_message_data() and
+    analyze_conversation_data().
+    """
     current_conv = None
     for entry in loglines:
         log_type = entry.get("type")
@@ -1395,8 +3213,6 @@ def generate_html(json_path, output_dir, github_repo=None, theme=None):
         message_data = entry.get("message", {})
         if not message_data:
             continue
-        # Convert message dict to JSON string for compatibility with existing render functions
-        message_json = json.dumps(message_data)
         is_user_prompt = False
         user_text = None
         if log_type == "user":
@@ -1407,108 +3223,1170 @@ def generate_html(json_path, output_dir, github_repo=None, theme=None):
                 user_text = text
         if is_user_prompt:
             if current_conv:
-                conversations.append(current_conv)
+                yield current_conv
             current_conv = {
                 "user_text": user_text,
                 "timestamp": timestamp,
-                "messages": [(log_type, message_json, timestamp)],
+                "messages": [(log_type, message_data, timestamp)],
                 "is_continuation": bool(is_compact_summary),
             }
         elif current_conv:
-            current_conv["messages"].append((log_type, message_json, timestamp))
+            current_conv["messages"].append((log_type, message_data, timestamp))
     if current_conv:
-        conversations.append(current_conv)
+        yield current_conv
+
+
+class PaginationPolicy:
+    """How conversations are split into transcript pages.
+
+    A page holds at most max_prompts conversations. If max_messages or
+    max_bytes are set, a page is also closed before it would exceed that many
+    messages or (approximately, measured as message JSON) that many bytes.
+    Conversations are kept whole where possible; one that exceeds a budget on
+    its own is split across pages at message boundaries.
+    """
+
+    def __init__(self, max_prompts=PROMPTS_PER_PAGE, max_messages=None, max_bytes=None):
+        if max_prompts < 1:
+            raise ValueError("max_prompts must be at least 1")
+        self.max_prompts = max_prompts
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+
+    def __repr__(self):
+        return (
+            f"PaginationPolicy(max_prompts={self.max_prompts}, "
+            f"max_messages={self.max_messages}, max_bytes={self.max_bytes})"
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, PaginationPolicy) and repr(self) == repr(other)
+
+    def message_size(self, message_data):
+        """Return the size a message counts for against max_bytes."""
+        if self.max_bytes is None:
+            return 0
+        return len(json.dumps(message_data, ensure_ascii=False))
+
+    def plan(self, conversation_sizes):
+        """Lay out pages from each conversation's list of message sizes.
+
+        Returns a list of pages, each a list of (conversation_index, start, end)
+        message slices.
+        """
+        pages = []
+        page = []
+        counts = {"messages": 0, "bytes": 0}
+
+        def fits(messages, size):
+            if self.max_messages is not None:
+                if counts["messages"] + messages > self.max_messages:
+                    return False
+            if self.max_bytes is not None:
+                if counts["bytes"] + size > self.max_bytes:
+                    return False
+            return True
+
+        def close_page():
+            nonlocal page
+            pages.append(page)
+            page = []
+            counts["messages"] = counts["bytes"] = 0
+
+        for conv_index, sizes in enumerate(conversation_sizes):
+            # Start a new page rather than split a conversation that fits on one
+            if page and (
+                len(page) >= self.max_prompts or not fits(len(sizes), sum(sizes))
+            ):
+                close_page()
+            start = 0
+            while start < len(sizes):
+                end = start
+                # An empty page always takes at least one message
+                while end < len(sizes) and (
+                    fits(1, sizes[end]) or (end == start and not page)
+                ):
+                    counts["messages"] += 1
+                    counts["bytes"] += sizes[end]
+                    end += 1
+                if end > start:
+                    page.append((conv_index, start, end))
+                if end < len(sizes):
+                    close_page()
+                start = end
+        if page:
+            pages.append(page)
+        return pages
+
+
+def _prescan_loglines(loglines, detect_repo=False, pagination=None):
+    """Size up conversations, and optionally detect the GitHub repo, in one pass.
+
+    Returns a (conversation_sizes, github_repo) tuple, where conversation_sizes
+    holds a list of per-message sizes (see PaginationPolicy.message_size) for
+    each conversation, grouped exactly as iter_conversations() groups them.
+    """
+    pagination = pagination or PaginationPolicy()
+    conversation_sizes = []
+    github_repo = None
+    for entry in loglines:
+        if detect_repo and github_repo is None:
+            github_repo = detect_github_repo([entry])
+        message_data = entry.get("message")
+        if not message_data:
+            continue
+        if entry.get("type") == "user" and extract_text_from_content(
+            message_data.get("content", "")
+        ):
+            conversation_sizes.append([])
+        if conversation_sizes:
+            conversation_sizes[-1].append(pagination.message_size(message_data))
+    return conversation_sizes, github_repo
+
+
+def _paginate_conversations(conversations, plan):
+    """Yield each page of the plan from PaginationPolicy.plan() as it fills up.
+
+    Pages are lists of conversation fragments: conversation-like dicts holding
+    a slice of the messages. A fragment that starts a conversation carries the
+    whole conversation under "conversation", for building the index.
+    """
+    conversations = iter(conversations)
+    conv_index = -1
+    conv = None
+    for page in plan:
+        fragments = []
+        for index, start, end in page:
+            while conv_index < index:
+                conv = next(conversations, None)
+                if conv is None:
+                    raise ValueError(
+                        "Session changed while rendering: conversations are missing"
+                    )
+                conv_index += 1
+            if start == 0 and end == len(conv["messages"]):
+                messages = conv["messages"]
+            else:
+                messages = conv["messages"][start:end]
+            fragments.append(
+                {
+                    "user_text": conv["user_text"],
+                    "timestamp": conv["timestamp"],
+                    "messages": messages,
+                    # Only the first fragment holds the continuation summary
+                    "is_continuation": conv.get("is_continuation", False)
+                    and start == 0,
+                    "conversation": conv if start == 0 else None,
+                }
+            )
+        yield fragments
+
+
+def _index_entry(conv, page_num):
+    """Summarise a conversation into the small record needed to build the index."""
+    return {
+        "user_text": conv["user_text"],
+        "timestamp": conv["timestamp"],
+        "is_continuation": conv.get("is_continuation", False),
+        "page_num": page_num,
+        "message_count": len(conv["messages"]),
+        "stats": analyze_conversation_data(conv["messages"]),
+    }
+
+
+# Approximate size of each search-NNN.json shard written next to a transcript
+SEARCH_SHARD_BYTES = 512 * 1024
+
+# Bump when the shape of search-index.json or its shards changes
+SEARCH_INDEX_VERSION = 1
+
+
+def message_search_text(message_data):
+    """Return a message's searchable plain text, with whitespace collapsed.
+
+    Covers text, thinking, tool calls (name and input JSON) and textual tool
+    results - roughly what a reader sees in the rendered message.
+    """
+    content = message_data.get("content", "")
+    parts = []
+    if isinstance(content, str):
+        parts.append(content)
+    elif isinstance(content, list):
+        for block in content:
+            if not isinstance(block, dict):
+                continue
+            block_type = block.get("type")
+            if block_type == "text":
+                parts.append(block.get("text", ""))
+            elif block_type == "thinking":
+                parts.append(block.get("thinking", ""))
+            elif block_type == "tool_use":
+                parts.append(block.get("name", ""))
+                parts.append(json.dumps(block.get("input", {}), ensure_ascii=False))
+            elif block_type == "tool_result":
+                parts.append(tool_result_text(block.get("content", "")))
+    return " ".join(" ".join(parts).split())
+
+
+def tool_result_text(content):
+    """Return the text of a tool_result block's content, ignoring images."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(
+            item.get("text", "")
+            for item in content
+            if isinstance(item, dict) and item.get("type") == "text"
+        )
+    return ""
+
+
+def message_role(log_type, message_data):
+    """Return the role class render_message_data() uses, or None if not rendered."""
+    if not message_data:
+        return None
+    if log_type == "user":
+        return "tool-reply" if is_tool_result_message(message_data) else "user"
+    if log_type == "assistant":
+        return "assistant"
+    return None
+
+
+def _page_search_records(page_num, page_convs):
+    """Yield the [message_id, page_number, role, text] search records of a page."""
+    for conv in page_convs:
+        for log_type, message_data, timestamp in conv["messages"]:
+            role = message_role(log_type, message_data)
+            if role is None:
+                continue
+            text = message_search_text(message_data)
+            if text:
+                yield [make_msg_id(timestamp), page_num, role, text]
+
+
+class SearchIndexWriter:
+    """Write a transcript's search index while its pages are rendered.
+
+    Each message becomes a [message_id, page_number, role, text] record.
+    Records are written to search-NNN.json shards of roughly shard_bytes as
+    they accumulate, so the index is never held in memory as a whole.
+    close() writes search-index.json, listing the shards, which search.js
+    loads first. shards and total_messages resume an index after shards that
+    were already written, as TranscriptWatcher does.
+    """
+
+    def __init__(self, output_dir, shard_bytes=None, shards=None, total_messages=0):
+        self.output_dir = Path(output_dir)
+        self.shard_bytes = shard_bytes or SEARCH_SHARD_BYTES
+        # Already written shards to keep, with the messages they hold
+        self.shards = list(shards or [])
+        self.records = []
+        self.size = 0
+        self.total_messages = total_messages
+
+    def add(self, msg_id, page_num, role, text):
+        self.records.append([msg_id, page_num, role, text])
+        self.size += len(msg_id) + len(role) + len(text)
+        self.total_messages += 1
+        if self.size >= self.shard_bytes:
+            self.flush()
+
+    def flush(self):
+        """Write the pending records as the next shard."""
+        if not self.records:
+            return
+        name = f"search-{len(self.shards) + 1:03d}.json"
+        with open(self.output_dir / name, "w", encoding="utf-8") as f:
+            json.dump(
+                {"messages": self.records},
+                f,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+        self.shards.append(name)
+        self.records = []
+        self.size = 0
+
+    def close(self, total_pages):
+        """Flush the last shard and write search-index.json."""
+        self.flush()
+        # Remove shards left over from an earlier, larger render
+        for path in self.output_dir.glob("search-[0-9][0-9][0-9]*.json"):
+            if path.name not in self.shards:
+                path.unlink()
+        index = {
+            "version": SEARCH_INDEX_VERSION,
+            "total_pages": total_pages,
+            "total_messages": self.total_messages,
+            "shards": self.shards,
+        }
+        (self.output_dir / "search-index.json").write_text(
+            json.dumps(index), encoding="utf-8"
+        )
+
+
+# Archive-wide search index written by generate_batch_html() into search/
+ARCHIVE_SEARCH_DIR = "search"
+
+# Approximate size at which a term-prefix shard is split on a longer prefix
+ARCHIVE_SEARCH_SHARD_BYTES = 256 * 1024
+
+# Shortest and longest term prefixes used to name shards
+ARCHIVE_SEARCH_MIN_PREFIX = 2
+ARCHIVE_SEARCH_MAX_PREFIX = 6
+
+# Terms in more messages than this are listed as common and not indexed
+ARCHIVE_SEARCH_MAX_POSTINGS = 20000
+
+# Postings buffered in memory before they are spooled to disk
+ARCHIVE_SEARCH_SPOOL_POSTINGS = 200000
+
+# Terms are runs of word characters, lowercased, between these lengths
+SEARCH_TERM_PATTERN = re.compile(r"\w+")
+SEARCH_TERM_MIN_LENGTH = 2
+SEARCH_TERM_MAX_LENGTH = 64
+
+
+def search_terms(text):
+    """Return the set of index terms in text.
+
+    archive_search.js splits queries the same way, so a query matches a
+    message when every one of its terms appears in the message.
+    """
+    return {
+        term
+        for term in SEARCH_TERM_PATTERN.findall(text.lower())
+        if SEARCH_TERM_MIN_LENGTH <= len(term) <= SEARCH_TERM_MAX_LENGTH
+    }
+
+
+class ArchiveSearchIndexBuilder:
+    """Build the inverted index searched from the archive's index pages.
+
+    Each term maps to postings of [session_number, page_number, message_id],
+    one per message containing the term. Terms are grouped into shards by
+    prefix: first by their first ARCHIVE_SEARCH_MIN_PREFIX characters, with
+    any shard bigger than shard_bytes split again on one more character.
+    search/index.json lists the sessions and the shard for each prefix, so
+    a search only downloads the shards for its own terms.
+
+    Terms are read back from each rendered session's search-NNN.json shards
+    and spooled to disk by prefix, so only one prefix group is held in
+    memory at a time however large the archive is.
+    """
+
+    def __init__(self, output_dir, shard_bytes=None):
+        self.output_dir = Path(output_dir)
+        self.search_dir = self.output_dir / ARCHIVE_SEARCH_DIR
+        self.shard_bytes = shard_bytes or ARCHIVE_SEARCH_SHARD_BYTES
+        self.sessions = []
+        self.shards = {}
+        self.common_terms = []
+        self.total_messages = 0
+        self._spool_dir = tempfile.TemporaryDirectory(prefix="transcripts-search-")
+        self._buffer = {}
+        self._buffered = 0
+
+    def add_session(self, project_name, session_name, summary, date):
+        """Index a rendered session from its search-index.json and shards.
+
+        Returns False if the session has no search index to read.
+        """
+        session_dir = self.output_dir / project_name / session_name
+        try:
+            index = json.loads((session_dir / "search-index.json").read_text("utf-8"))
+        except (OSError, ValueError):
+            return False
+        if index.get("version") != SEARCH_INDEX_VERSION:
+            return False
+
+        session_num = len(self.sessions)
+        self.sessions.append(
+            [project_name, session_name, _truncate_summary(summary, 100), date]
+        )
+        for shard in index["shards"]:
+            with open(session_dir / shard, encoding="utf-8") as f:
+                records = json.load(f)["messages"]
+            for msg_id, page_num, role, text in records:
+                self.total_messages += 1
+                posting = f"{session_num}\t{page_num}\t{msg_id}"
+                for term in search_terms(text):
+                    prefix = term[:ARCHIVE_SEARCH_MIN_PREFIX]
+                    self._buffer.setdefault(prefix, []).append(f"{term}\t{posting}\n")
+                    self._buffered += 1
+            if self._buffered >= ARCHIVE_SEARCH_SPOOL_POSTINGS:
+                self._spool()
+        return True
+
+    def _spool_path(self, prefix):
+        return Path(self._spool_dir.name) / f"{_prefix_filename(prefix)}.tsv"
+
+    def _spool(self):
+        """Append buffered postings to the per-prefix spool files."""
+        for prefix, lines in self._buffer.items():
+            with open(self._spool_path(prefix), "a", encoding="utf-8") as f:
+                f.writelines(lines)
+        self._buffer = {}
+        self._buffered = 0
+
+    def _read_prefix_group(self, prefix):
+        terms = {}
+        with open(self._spool_path(prefix), encoding="utf-8") as f:
+            for line in f:
+                term, session_num, page_num, msg_id = line.rstrip("\n").split("\t")
+                terms.setdefault(term, []).append(
+                    [int(session_num), int(page_num), msg_id]
+                )
+        return terms
+
+    def _write_shards(self, prefix, terms):
+        """Write terms as the shard for prefix, splitting it if it is too big."""
+        size = sum(
+            len(term) + sum(len(posting[2]) + 16 for posting in postings)
+            for term, postings in terms.items()
+        )
+        if size > self.shard_bytes and len(prefix) < ARCHIVE_SEARCH_MAX_PREFIX:
+            groups = {}
+            kept = {}
+            for term, postings in terms.items():
+                if len(term) > len(prefix):
+                    groups.setdefault(term[: len(prefix) + 1], {})[term] = postings
+                else:
+                    kept[term] = postings
+            for longer_prefix in sorted(groups):
+                self._write_shards(longer_prefix, groups[longer_prefix])
+            # Terms no longer than the prefix itself stay in its shard
+            terms = kept
+            if not terms:
+                return
+        name = f"{_prefix_filename(prefix)}.json"
+        with open(self.search_dir / name, "w", encoding="utf-8") as f:
+            json.dump(
+                {"terms": {term: terms[term] for term in sorted(terms)}},
+                f,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+        self.shards[prefix] = name
+
+    def close(self):
+        """Write the shards and search/index.json, removing stale shards."""
+        self._spool()
+        self.search_dir.mkdir(parents=True, exist_ok=True)
+        prefixes = sorted(
+            path.stem for path in Path(self._spool_dir.name).glob("*.tsv")
+        )
+        for encoded in prefixes:
+            prefix = bytes.fromhex(encoded).decode("utf-8")
+            terms = self._read_prefix_group(prefix)
+            # Terms in most messages would make huge shards and narrow
+            # nothing down; search skips them instead
+            common = [
+                term
+                for term, postings in terms.items()
+                if len(postings) > ARCHIVE_SEARCH_MAX_POSTINGS
+            ]
+            for term in common:
+                del terms[term]
+            self.common_terms.extend(common)
+            if terms:
+                self._write_shards(prefix, terms)
+        self._spool_dir.cleanup()
+
+        written = set(self.shards.values())
+        for path in self.search_dir.glob("*.json"):
+            if path.name != "index.json" and path.name not in written:
+                path.unlink()
+        index = {
+            "version": SEARCH_INDEX_VERSION,
+            "total_messages": self.total_messages,
+            "min_prefix": ARCHIVE_SEARCH_MIN_PREFIX,
+            "max_prefix": ARCHIVE_SEARCH_MAX_PREFIX,
+            "sessions": self.sessions,
+            "shards": self.shards,
+            "common_terms": sorted(self.common_terms),
+        }
+        (self.search_dir / "index.json").write_text(
+            json.dumps(index, ensure_ascii=False, separators=(",", ":")),
+            encoding="utf-8",
+        )
+
 
-    total_convs = len(conversations)
-    total_pages = (total_convs + PROMPTS_PER_PAGE - 1) // PROMPTS_PER_PAGE
+def _prefix_filename(prefix):
+    """Return a filename-safe name for a term prefix (hex of its UTF-8 bytes)."""
+    return prefix.encode("utf-8").hex()
 
-    for page_num in range(1, total_pages + 1):
-        start_idx = (page_num - 1) * PROMPTS_PER_PAGE
-        end_idx = min(start_idx + PROMPTS_PER_PAGE, total_convs)
-        page_convs = conversations[start_idx:end_idx]
+
+class TranscriptRenderer:
+    """Render a session's loglines to a paginated HTML transcript.
+
+    Pages are laid out by a PaginationPolicy (default: PROMPTS_PER_PAGE
+    conversations per page).
+
+    This is the single parse -> group -> render -> write pipeline shared by
+    every command. Loglines can come from any source: a session file via
+    load_session_loglines(), the "loglines" list of an API session, a URL
+    downloaded to a temporary file, or stdin. Re-iterable inputs are streamed
+    twice (a cheap counting pass, then the rendering pass); one-shot iterators
+    are buffered into a list first.
+
+    With external_assets, CSS and JS are written once to content-hashed
+    styles-<hash>.css and app-<hash>.js files in assets_dir (default: the
+    output directory) and linked from each page instead of being inlined.
+    With extract_images, base64 images are written to
+    <assets_dir>/assets/<sha256>.<ext> and referenced with loading="lazy";
+    release_image_data additionally drops each payload from the loglines
+    once written (only safe when the loglines are not reused afterwards).
+
+    Time spent in each stage is accumulated in the ``timings`` dict. Subclasses
+    can hook in caching by overriding render_page_messages(), write_page()
+    or write_index().
+    """
+
+    def __init__(
+        self,
+        output_dir,
+        github_repo=None,
+        theme=None,
+        echo=None,
+        external_assets=False,
+        assets_dir=None,
+        extract_images=False,
+        release_image_data=False,
+        pagination=None,
+    ):
+        self.output_dir = Path(output_dir)
+        self.pagination = pagination or PaginationPolicy()
+        self.github_repo = github_repo
+        self.theme = theme
+        self.echo = echo or click.echo
+        self.css = get_styles(theme)
+        self.external_assets = external_assets
+        self.assets_dir = Path(assets_dir) if assets_dir else self.output_dir
+        # Extra template variables linking external assets, set by render()
+        self.assets = {}
+        self.search_index = None
+        self.image_store = None
+        if extract_images:
+            images_dir = self.assets_dir / "assets"
+            self.image_store = ImageStore(
+                images_dir,
+                href_prefix=Path(
+                    os.path.relpath(images_dir, self.output_dir)
+                ).as_posix(),
+                release_data=release_image_data,
+            )
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Context manager that adds the time spent inside it to timings[name]."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    def render(self, loglines):
+        """Render loglines to index.html, page-NNN.html and theme.html."""
+        if iter(loglines) is loglines:
+            # One-shot iterator (e.g. stdin) - buffer it for the two passes
+            loglines = list(loglines)
+
+        self.output_dir.mkdir(exist_ok=True, parents=True)
+        if self.external_assets:
+            with self.stage("write"):
+                self.assets = _asset_links(self.css, self.assets_dir, self.output_dir)
+
+        # First pass: count conversations so every page knows the total page count
+        with self.stage("scan"):
+            conversation_sizes, detected_repo = _prescan_loglines(
+                loglines,
+                detect_repo=self.github_repo is None,
+                pagination=self.pagination,
+            )
+            total_convs = len(conversation_sizes)
+            plan = self.pagination.plan(conversation_sizes)
+            del conversation_sizes
+
+        # Auto-detect GitHub repo if not provided
+        if self.github_repo is None:
+            self.github_repo = detected_repo
+            if self.github_repo:
+                self.echo(f"Auto-detected GitHub repo: {self.github_repo}")
+            else:
+                self.echo(
+                    "Warning: Could not auto-detect GitHub repo. Commit links will be disabled."
+                )
+
+        # Set module-level variables for render functions
+        global _github_repo, _image_store
+        _github_repo = self.github_repo
+        _image_store = self.image_store
+
+        total_pages = len(plan)
+        self.total_pages = total_pages
+
+        # Second pass: write each page as soon as its conversations are complete,
+        # keeping only the per-conversation index metadata
+        index_entries = []
+        self.search_index = SearchIndexWriter(self.output_dir)
+        pages = _paginate_conversations(iter_conversations(loglines), plan)
+        for page_num, page_convs in enumerate(pages, start=1):
+            with self.stage("analyze"):
+                index_entries.extend(
+                    _index_entry(fragment["conversation"], page_num)
+                    for fragment in page_convs
+                    if fragment["conversation"] is not None
+                )
+            with self.stage("render"):
+                messages_html = self.render_page_messages(page_convs)
+            with self.stage("index"):
+                self.index_page_messages(page_num, page_convs)
+            self.write_page(page_num, total_pages, messages_html)
+
+        self.write_index(index_entries, total_convs, total_pages)
+        with self.stage("write"):
+            self.search_index.close(total_pages)
+
+        # Generate theme editor page
+        with self.stage("write"):
+            _generate_theme_html(self.output_dir, self.theme)
+
+        _image_store = None
+
+    def render_page_messages(self, page_convs):
+        """Render the messages of a page's conversations to a list of HTML fragments."""
         messages_html = []
         for conv in page_convs:
             is_first = True
-            for log_type, message_json, timestamp in conv["messages"]:
-                msg_html = render_message(log_type, message_json, timestamp)
+            for log_type, message_data, timestamp in conv["messages"]:
+                msg_html = render_message_data(log_type, message_data, timestamp)
                 if msg_html:
                     # Wrap continuation summaries in collapsed details
                     if is_first and conv.get("is_continuation"):
                         msg_html = f'<details class="continuation"><summary>Session continuation summary</summary>{msg_html}</details>'
                     messages_html.append(msg_html)
                 is_first = False
-        pagination_html = generate_pagination_html(page_num, total_pages)
-        page_template = get_template("page.html")
-        page_content = page_template.render(
-            css=css,
-            js=JS,
-            page_num=page_num,
-            total_pages=total_pages,
-            pagination_html=pagination_html,
-            messages_html="".join(messages_html),
+        return messages_html
+
+    def index_page_messages(self, page_num, page_convs):
+        """Add the messages of a page's conversations to the search index."""
+        for record in _page_search_records(page_num, page_convs):
+            self.search_index.add(*record)
+
+    def write_page(self, page_num, total_pages, messages_html):
+        """Write page-NNN.html from its rendered message fragments."""
+        with self.stage("render"):
+            pagination_html = generate_pagination_html(page_num, total_pages)
+            page_template = get_template("page.html")
+            page_content = page_template.render(
+                css=self.css,
+                js=JS,
+                page_num=page_num,
+                total_pages=total_pages,
+                pagination_html=pagination_html,
+                messages_html="".join(messages_html),
+                **self.assets,
+            )
+        with self.stage("write"):
+            (self.output_dir / f"page-{page_num:03d}.html").write_text(
+                page_content, encoding="utf-8"
+            )
+        self.echo(f"Generated page-{page_num:03d}.html")
+
+    def write_index(self, index_entries, total_convs, total_pages):
+        """Write index.html from the per-conversation index entries."""
+        with self.stage("index"):
+            index_content, prompt_num = _render_index(
+                index_entries, total_pages, self.css, self.assets
+            )
+        index_path = self.output_dir / "index.html"
+        with self.stage("write"):
+            index_path.write_text(index_content, encoding="utf-8")
+        self.echo(
+            f"Generated {index_path.resolve()} ({total_convs} prompts, {total_pages} pages)"
+        )
+
+
+# Seconds between checks for appended lines in --watch mode
+WATCH_INTERVAL = 1.0
+
+
+class TranscriptWatcher(TranscriptRenderer):
+    """Keep a session's HTML transcript up to date while its JSONL file grows.
+
+    Each update() parses only the lines appended since the previous one and
+    re-renders only the pages that can have changed, plus index.html and the
+    last search index shard. Because PaginationPolicy.plan() fills pages in
+    order, appending messages can only change pages from the one holding the
+    end of the second-to-last conversation onwards; everything before that is
+    final. The watcher keeps the loglines of those last conversations and the
+    index entries of the rest, so its memory use and the work per update
+    follow the size of the tail, not of the whole session. If the page count
+    changes, the page count in earlier pages is patched in place.
+
+    The output is the same as rendering the whole file again. A file that
+    shrinks or is replaced is rendered again from the start. Files that are
+    not JSONL cannot be read incrementally and are re-rendered in full.
+    """
+
+    def __init__(self, session_path, output_dir, **kwargs):
+        super().__init__(output_dir, **kwargs)
+        self.session_path = Path(session_path)
+        self.initial_github_repo = self.github_repo
+        # Pages written before a reset that the next render has to delete
+        self.stale_pages = 0
+        self.reset()
+
+    def reset(self):
+        """Forget everything read so far; the next update() renders from scratch."""
+        self.github_repo = self.initial_github_repo
+        self.offset = 0
+        self.signature = None
+        self.file_id = None
+        self.total_pages = None
+        # Conversations before tail_start: sizes for the pagination plan and
+        # index entries (for those starting before first_page)
+        self.fixed_sizes = []
+        self.fixed_entries = []
+        # Loglines from the start of conversation tail_start onwards
+        self.tail_loglines = []
+        self.tail_start = 0
+        # First page that appended lines can change
+        self.first_page = 1
+        # Search shards that are final, and records not yet in one of them
+        self.frozen_shards = []
+        self.frozen_messages = 0
+        self.open_records = []
+
+    def update(self):
+        """Render whatever was appended since the last call.
+
+        Returns the list of page numbers written, or None if nothing changed.
+        """
+        try:
+            stat = self.session_path.stat()
+        except FileNotFoundError:
+            return None
+        file_id = (stat.st_dev, stat.st_ino)
+        if self.file_id is not None and (
+            file_id != self.file_id or stat.st_size < self.offset
+        ):
+            # Truncated or replaced rather than appended to
+            self.stale_pages = max(self.stale_pages, self.total_pages or 0)
+            self.reset()
+        self.file_id = file_id
+
+        if self.session_path.suffix != ".jsonl":
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if self.total_pages is not None and signature == self.signature:
+                return None
+            self.signature = signature
+            self.render(load_session_loglines(self.session_path))
+            return list(range(1, self.total_pages + 1))
+
+        if self.total_pages is not None and stat.st_size == self.offset:
+            return None
+        with self.stage("scan"):
+            loglines, self.offset = read_appended_loglines(
+                self.session_path, self.offset
+            )
+        if self.total_pages is not None and not loglines:
+            return None
+        if self.github_repo is None and self.total_pages is not None:
+            github_repo = detect_github_repo(loglines)
+            if github_repo:
+                # Commit links on the pages already written need the repo
+                self.stale_pages = max(self.stale_pages, self.total_pages)
+                self.reset()
+                self.file_id = file_id
+                self.github_repo = github_repo
+                with self.stage("scan"):
+                    loglines, self.offset = read_appended_loglines(self.session_path, 0)
+        return self.render_appended(loglines)
+
+    def render_appended(self, loglines):
+        """Re-render the pages that loglines, appended to the session, affect."""
+        self.output_dir.mkdir(exist_ok=True, parents=True)
+        if self.external_assets and not self.assets:
+            with self.stage("write"):
+                self.assets = _asset_links(self.css, self.assets_dir, self.output_dir)
+        if self.github_repo is None:
+            self.github_repo = detect_github_repo(loglines)
+            if self.github_repo:
+                self.echo(f"Auto-detected GitHub repo: {self.github_repo}")
+
+        self.tail_loglines.extend(loglines)
+        with self.stage("scan"):
+            tail_sizes, _ = _prescan_loglines(
+                self.tail_loglines, pagination=self.pagination
+            )
+            plan = self.pagination.plan(self.fixed_sizes + tail_sizes)
+        total_pages = len(plan)
+        total_convs = len(self.fixed_sizes) + len(tail_sizes)
+
+        global _github_repo, _image_store
+        _github_repo = self.github_repo
+        _image_store = self.image_store
+
+        # Drop search records of the pages being rendered again
+        self.open_records = [
+            record for record in self.open_records if record[1] < self.first_page
+        ]
+        tail_plan = [
+            [(index - self.tail_start, start, end) for index, start, end in page]
+            for page in plan[self.first_page - 1 :]
+        ]
+        tail_entries = []
+        written = []
+        pages = _paginate_conversations(
+            iter_conversations(self.tail_loglines), tail_plan
         )
-        (output_dir / f"page-{page_num:03d}.html").write_text(
-            page_content, encoding="utf-8"
+        for page_num, page_convs in enumerate(pages, start=self.first_page):
+            with self.stage("analyze"):
+                tail_entries.extend(
+                    _index_entry(fragment["conversation"], page_num)
+                    for fragment in page_convs
+                    if fragment["conversation"] is not None
+                )
+            with self.stage("render"):
+                messages_html = self.render_page_messages(page_convs)
+            with self.stage("index"):
+                self.open_records.extend(_page_search_records(page_num, page_convs))
+            self.write_page(page_num, total_pages, messages_html)
+            written.append(page_num)
+
+        previous_total = self.total_pages
+        if previous_total is not None and previous_total != total_pages:
+            with self.stage("write"):
+                for page_num in range(1, min(self.first_page, total_pages + 1)):
+                    self._patch_page_total(page_num, previous_total, total_pages)
+        with self.stage("write"):
+            for page_num in range(
+                total_pages + 1, max(previous_total or 0, self.stale_pages) + 1
+            ):
+                (self.output_dir / f"page-{page_num:03d}.html").unlink(missing_ok=True)
+        self.stale_pages = 0
+        self.write_index(self.fixed_entries + tail_entries, total_convs, total_pages)
+        if previous_total is None:
+            with self.stage("write"):
+                _generate_theme_html(self.output_dir, self.theme)
+        self.total_pages = total_pages
+
+        self._advance(plan, tail_sizes, tail_entries)
+        with self.stage("write"):
+            self._write_search_index(total_pages)
+        _image_store = None
+        return written
+
+    def _advance(self, plan, tail_sizes, tail_entries):
+        """Move conversations that appended lines can no longer change out of the tail."""
+        last_conv = len(self.fixed_sizes) + len(tail_sizes) - 1
+        first_page = 1
+        if last_conv > 0:
+            # The page holding the end of the second-to-last conversation
+            for page_index in range(len(plan) - 1, -1, -1):
+                if any(index == last_conv - 1 for index, _, _ in plan[page_index]):
+                    first_page = page_index + 1
+                    break
+        tail_start = plan[first_page - 1][0][0] if plan else 0
+
+        # Loglines of the conversations before tail_start are no longer needed
+        drop = tail_start - self.tail_start
+        if drop > 0:
+            prompts = 0
+            for cut, entry in enumerate(self.tail_loglines):
+                message_data = entry.get("message")
+                if (
+                    message_data
+                    and entry.get("type") == "user"
+                    and extract_text_from_content(message_data.get("content", ""))
+                ):
+                    if prompts == drop:
+                        break
+                    prompts += 1
+            del self.tail_loglines[:cut]
+        self.fixed_sizes.extend(tail_sizes[:drop])
+        self.fixed_entries.extend(
+            entry for entry in tail_entries if entry["page_num"] < first_page
         )
-        print(f"Generated page-{page_num:03d}.html")
-
-    # Calculate overall stats and collect all commits for timeline
-    total_tool_counts = {}
-    total_messages = 0
-    all_commits = []  # (timestamp, hash, message, page_num, conv_index)
-    for i, conv in enumerate(conversations):
-        total_messages += len(conv["messages"])
-        stats = analyze_conversation(conv["messages"])
-        for tool, count in stats["tool_counts"].items():
-            total_tool_counts[tool] = total_tool_counts.get(tool, 0) + count
-        page_num = (i // PROMPTS_PER_PAGE) + 1
-        for commit_hash, commit_msg, commit_ts in stats["commits"]:
-            all_commits.append((commit_ts, commit_hash, commit_msg, page_num, i))
-    total_tool_calls = sum(total_tool_counts.values())
-    total_commits = len(all_commits)
+        self.tail_start = tail_start
+        self.first_page = first_page
+
+    def _write_search_index(self, total_pages):
+        """Rewrite the search shards after the frozen ones.
+
+        Shards are filled in order exactly as SearchIndexWriter fills them
+        when rendering the whole file, so a shard whose records all come
+        from final pages is itself final and is never written again.
+        """
+        writer = SearchIndexWriter(
+            self.output_dir,
+            shards=self.frozen_shards,
+            total_messages=self.frozen_messages,
+        )
+        frozen_records = 0
+        for count, record in enumerate(self.open_records, start=1):
+            shard_count = len(writer.shards)
+            writer.add(*record)
+            if len(writer.shards) > shard_count and record[1] < self.first_page:
+                self.frozen_shards = list(writer.shards)
+                self.frozen_messages = writer.total_messages
+                frozen_records = count
+        del self.open_records[:frozen_records]
+        writer.close(total_pages)
+
+    def _patch_page_total(self, page_num, old_total, new_total):
+        """Update the page count in an already written page."""
+        path = self.output_dir / f"page-{page_num:03d}.html"
+        content = path.read_text(encoding="utf-8")
+        # The heading and the first pagination come before the messages and
+        # the second pagination after them, so messages are never touched
+        old_heading = f"- page {page_num}/{old_total}</h1>"
+        new_heading = f"- page {page_num}/{new_total}</h1>"
+        content = content.replace(old_heading, new_heading, 1)
+        old_pagination = str(generate_pagination_html(page_num, old_total))
+        new_pagination = str(generate_pagination_html(page_num, new_total))
+        head, separator, rest = content.partition(old_pagination)
+        if separator:
+            content = head + new_pagination + rest
+        head, separator, rest = content.rpartition(old_pagination)
+        if separator:
+            content = head + new_pagination + rest
+        path.write_text(content, encoding="utf-8")
+
+
+class ArchiveWatcher:
+    """Keep an archive written by generate_batch_html() up to date as sessions grow.
+
+    Each poll() rescans the source folder, which the session metadata cache
+    keeps cheap, and hands every session whose mtime or size changed to its
+    own TranscriptWatcher. The first change to a session renders it in full,
+    later ones only re-render what the appended lines affect. The indexes of
+    the affected projects and the master index are rewritten after each
+    poll that changed something.
+
+    Sessions are compared against the archive's build manifest the first
+    time they are seen, so sessions generate_batch_html() just rendered are
+    left alone. close() records the watched sessions in the manifest and
+    rebuilds the archive-wide search index, so the next generate_batch_html()
+    run skips them.
+    """
+
+    def __init__(
+        self,
+        source_folder,
+        output_dir,
+        include_agents=False,
+        theme=None,
+        use_cache=True,
+        external_assets=False,
+        extract_images=False,
+        pagination=None,
+        echo=None,
+    ):
+        self.source_folder = Path(source_folder)
+        self.output_dir = Path(output_dir)
+        self.include_agents = include_agents
+        self.use_cache = use_cache
+        self.echo = echo or click.echo
+        # The same options generate_batch_html() renders sessions with
+        self.render_options = {
+            "theme": theme,
+            "external_assets": external_assets,
+            "extract_images": extract_images,
+            "pagination": pagination,
+        }
+        if external_assets or extract_images:
+            self.render_options["assets_dir"] = self.output_dir
+        self.index_assets_dir = self.output_dir if external_assets else None
+        self.manifest = BuildManifest(self.output_dir)
+        self.theme_hash = _theme_hash(
+            theme,
+            external_assets=external_assets,
+            extract_images=extract_images,
+            pagination=pagination,
+        )
+        self.tool_version = get_tool_version()
+        self.projects = []
+        # (mtime, size) each session had when it was last looked at
+        self.signatures = {}
+        self.watchers = {}
+        self.failed = set()
+
+    def poll(self):
+        """Render the sessions that changed since the last poll.
+
+        Returns the list of updated sessions as project/session names.
+        """
+        projects = find_all_sessions(
+            self.source_folder,
+            include_agents=self.include_agents,
+            use_cache=self.use_cache,
+        )
+        updated = []
+        affected_projects = set()
+        for project in projects:
+            for session in project["sessions"]:
+                path = session["path"]
+                output = f"{project['name']}/{path.stem}"
+                signature = (session["mtime"], session["size"])
+                if path in self.signatures:
+                    if self.signatures[path] == signature:
+                        continue
+                elif self.manifest.is_current(
+                    path,
+                    session["mtime"],
+                    session["size"],
+                    output,
+                    self.theme_hash,
+                    self.tool_version,
+                ):
+                    self.signatures[path] = signature
+                    continue
+                self.signatures[path] = signature
+
+                watcher = self.watchers.get(path)
+                if watcher is None:
+                    watcher = self.watchers[path] = TranscriptWatcher(
+                        path,
+                        self.output_dir / output,
+                        echo=lambda *args, **kwargs: None,
+                        **self.render_options,
+                    )
+                try:
+                    pages = watcher.update()
+                except Exception as e:
+                    self.echo(f"Warning: {output} failed: {e}")
+                    self.failed.add(path)
+                    # Start over once the file changes again
+                    watcher.reset()
+                    continue
+                self.failed.discard(path)
+                if pages is None:
+                    continue
+                self.echo(f"Updated {output} ({len(pages)} pages rendered)")
+                updated.append(output)
+                affected_projects.add(project["name"])
+
+        for project in projects:
+            if project["name"] in affected_projects:
+                _generate_project_index(
+                    project, self.output_dir / project["name"], self.index_assets_dir
+                )
+        if affected_projects:
+            _generate_master_index(projects, self.output_dir, self.index_assets_dir)
+        self.projects = projects
+        return updated
+
+    def close(self):
+        """Record the watched sessions in the build manifest and rebuild search."""
+        for path, watcher in self.watchers.items():
+            if path in self.failed:
+                self.manifest.discard(path)
+                continue
+            try:
+                sha256 = file_sha256(path)
+                stat = path.stat()
+            except OSError:
+                self.manifest.discard(path)
+                continue
+            if (stat.st_mtime, stat.st_size) != self.signatures[path]:
+                # Changed after it was last rendered: leave it to the next run
+                self.manifest.discard(path)
+                continue
+            project_name = watcher.output_dir.parent.name
+            self.manifest.record(
+                path,
+                stat.st_mtime,
+                stat.st_size,
+                sha256,
+                f"{project_name}/{watcher.output_dir.name}",
+                project_name,
+                self.theme_hash,
+                self.tool_version,
+            )
+        if self.watchers:
+            failed = {
+                (self.watchers[path].output_dir.parent.name, path.stem)
+                for path in self.failed
+            }
+            _generate_archive_search_index(
+                self.projects, self.output_dir, exclude=failed
+            )
+        self.manifest.save()
+
+
+def _watch(update, interval=None):
+    """Call update() every interval seconds until interrupted with Ctrl+C."""
+    try:
+        while True:
+            time.sleep(WATCH_INTERVAL if interval is None else interval)
+            update()
+    except KeyboardInterrupt:
+        pass
+
+
+def _render_index(index_entries, total_pages, css, assets=None):
+    """Render index.html content; returns (html, number_of_prompts).
+
+    assets holds optional css_href/js_src template variables for external assets.
+    """
+    # Calculate overall stats and collect all commits for timeline; each
+    # entry's stats were computed once, when its conversation was rendered
+    total_stats = merge_conversation_stats(entry["stats"] for entry in index_entries)
+    total_messages = sum(entry["message_count"] for entry in index_entries)
+    total_tool_calls = sum(total_stats["tool_counts"].values())
+    total_commits = len(total_stats["commits"])
+
+    # Group each prompt with the continuation conversations that follow it,
+    # so long_texts from continuations appear with the original prompt
+    prompts = []
+    current_prompt = None
+    for entry in index_entries:
+        if entry["is_continuation"]:
+            if current_prompt is not None:
+                current_prompt["chain"].append(entry)
+            continue
+        if entry["user_text"].startswith("Stop hook feedback:"):
+            current_prompt = None
+            continue
+        current_prompt = {"entry": entry, "chain": [entry]}
+        prompts.append(current_prompt)
 
     # Build timeline items: prompts and commits merged by timestamp
     timeline_items = []
 
     # Add prompts
     prompt_num = 0
-    for i, conv in enumerate(conversations):
-        if conv.get("is_continuation"):
-            continue
-        if conv["user_text"].startswith("Stop hook feedback:"):
-            continue
+    for prompt in prompts:
+        entry = prompt["entry"]
         prompt_num += 1
-        page_num = (i // PROMPTS_PER_PAGE) + 1
-        msg_id = make_msg_id(conv["timestamp"])
-        link = f"page-{page_num:03d}.html#{msg_id}"
-        rendered_content = render_markdown_text(conv["user_text"])
-
-        # Collect all messages including from subsequent continuation conversations
-        # This ensures long_texts from continuations appear with the original prompt
-        all_messages = list(conv["messages"])
-        for j in range(i + 1, len(conversations)):
-            if not conversations[j].get("is_continuation"):
-                break
-            all_messages.extend(conversations[j]["messages"])
-
-        # Analyze conversation for stats (excluding commits from inline display now)
-        stats = analyze_conversation(all_messages)
-        tool_stats_str = format_tool_stats(stats["tool_counts"])
+        msg_id = make_msg_id(entry["timestamp"])
+        link = f"page-{entry['page_num']:03d}.html#{msg_id}"
+        rendered_content = render_markdown_text(entry["user_text"])
+
+        chain_stats = merge_conversation_stats(
+            chained["stats"] for chained in prompt["chain"]
+        )
+        tool_stats_str = format_tool_stats(chain_stats["tool_counts"])
 
         long_texts_html = ""
-        for lt in stats["long_texts"]:
+        for lt in chain_stats["long_texts"]:
             rendered_lt = render_markdown_text(lt)
             long_texts_html += _macros.index_long_text(rendered_lt)
 
         stats_html = _macros.index_stats(tool_stats_str, long_texts_html)
 
         item_html = _macros.index_item(
-            prompt_num, link, conv["timestamp"], rendered_content, stats_html
+            prompt_num, link, entry["timestamp"], rendered_content, stats_html
         )
-        timeline_items.append((conv["timestamp"], "prompt", item_html))
+        timeline_items.append((entry["timestamp"], "prompt", item_html))
 
     # Add commits as separate timeline items
-    for commit_ts, commit_hash, commit_msg, page_num, conv_idx in all_commits:
+    for commit_hash, commit_msg, commit_ts in total_stats["commits"]:
         item_html = _macros.index_commit(
             commit_hash, commit_msg, commit_ts, _github_repo
         )
@@ -1530,15 +4408,37 @@ def generate_html(json_path, output_dir, github_repo=None, theme=None):
         total_commits=total_commits,
         total_pages=total_pages,
         index_items_html="".join(index_items),
+        **(assets or {}),
     )
-    index_path = output_dir / "index.html"
-    index_path.write_text(index_content, encoding="utf-8")
-    print(
-        f"Generated {index_path.resolve()} ({total_convs} prompts, {total_pages} pages)"
-    )
+    return index_content, prompt_num
+
+
+def generate_html(
+    json_path,
+    output_dir,
+    github_repo=None,
+    theme=None,
+    external_assets=False,
+    assets_dir=None,
+    extract_images=False,
+    pagination=None,
+):
+    """Generate an HTML transcript from a JSON or JSONL session file.
 
-    # Generate theme editor page
-    _generate_theme_html(output_dir, theme)
+    pagination is an optional PaginationPolicy controlling how pages are split.
+    """
+    renderer = TranscriptRenderer(
+        output_dir,
+        github_repo=github_repo,
+        theme=theme,
+        external_assets=external_assets,
+        assets_dir=assets_dir,
+        extract_images=extract_images,
+        # The loglines are private to this call, so written images can be freed
+        release_image_data=True,
+        pagination=pagination,
+    )
+    renderer.render(load_session_loglines(json_path))
 
 
 @click.group(cls=DefaultGroup, default="local", default_if_no_args=True)
@@ -1592,10 +4492,59 @@ def cli():
     "theme_name",
     help="Theme name (e.g., 'dark') or path to theme.json file.",
 )
+@click.option(
+    "--external-assets",
+    is_flag=True,
+    help="Link CSS and JS from shared content-hashed files instead of inlining them in every page.",
+)
+@click.option(
+    "--extract-images",
+    is_flag=True,
+    help="Write images to assets/<sha256>.<ext> files instead of embedding them as base64.",
+)
+@click.option(
+    "--prompts-per-page",
+    type=click.IntRange(min=1),
+    default=PROMPTS_PER_PAGE,
+    show_default=True,
+    help="Maximum number of prompts on each transcript page.",
+)
+@click.option(
+    "--page-messages",
+    type=click.IntRange(min=1),
+    help="Also split pages so none holds more than this many messages.",
+)
+@click.option(
+    "--page-bytes",
+    type=click.IntRange(min=1),
+    help="Also split pages at roughly this many bytes of message content.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Rescan every session instead of using the session metadata cache.",
+)
 def local_cmd(
-    output, output_auto, repo, gist, include_json, open_browser, limit, theme_name
+    output,
+    output_auto,
+    repo,
+    gist,
+    include_json,
+    open_browser,
+    limit,
+    theme_name,
+    external_assets,
+    extract_images,
+    prompts_per_page,
+    page_messages,
+    page_bytes,
+    no_cache,
 ):
     """Select and convert a local Claude Code session to HTML."""
+    if gist and (external_assets or extract_images):
+        raise click.UsageError(
+            "--external-assets and --extract-images cannot be combined with --gist."
+        )
     projects_folder = Path.home() / ".claude" / "projects"
 
     if not projects_folder.exists():
@@ -1604,12 +4553,14 @@ def local_cmd(
         return
 
     click.echo("Loading local sessions...")
-    results = find_local_sessions(projects_folder, limit=limit)
+    results = find_local_sessions(projects_folder, limit=limit, use_cache=not no_cache)
 
     if not results:
         click.echo("No local sessions found.")
         return
 
+    import questionary
+
     # Build choices for questionary
     choices = []
     for filepath, summary in results:
@@ -1649,7 +4600,15 @@ def local_cmd(
     # Load theme if specified
     theme = load_theme(theme_name) if theme_name else None
 
-    generate_html(session_file, output, github_repo=repo, theme=theme)
+    generate_html(
+        session_file,
+        output,
+        github_repo=repo,
+        theme=theme,
+        external_assets=external_assets,
+        extract_images=extract_images,
+        pagination=PaginationPolicy(prompts_per_page, page_messages, page_bytes),
+    )
 
     # Show output directory
     click.echo(f"Output: {output.resolve()}")
@@ -1681,40 +4640,183 @@ def is_url(path):
     return path.startswith("http://") or path.startswith("https://")
 
 
-def fetch_url_to_tempfile(url):
-    """Fetch a URL and save to a temporary file.
+def read_stdin_to_tempfile(stream=None):
+    """Save a JSON or JSONL session read from stdin to a temporary file.
 
+    The format is detected from the content: a JSON document with a
+    "loglines" key is saved as .json, anything else as .jsonl.
     Returns the Path to the temporary file.
-    Raises click.ClickException on network errors.
     """
+    stream = stream or click.open_file("-")
+    text = stream.read()
     try:
-        response = httpx.get(url, timeout=60.0, follow_redirects=True)
-        response.raise_for_status()
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = None
+    suffix = ".json" if isinstance(data, dict) and "loglines" in data else ".jsonl"
+
+    temp_file = Path(tempfile.gettempdir()) / f"claude-stdin{suffix}"
+    temp_file.write_text(text, encoding="utf-8")
+    return temp_file
+
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Bytes between progress messages while downloading a session URL
+DOWNLOAD_PROGRESS_BYTES = 16 * 1024 * 1024
+
+
+def _url_temp_path(url):
+    """Return (temp_file, name) for downloading a session URL.
+
+    The suffix comes from the URL path, ignoring a trailing .gz, and
+    defaults to .jsonl; name is the stem used for output directories.
+    """
+    url_path = url.split("?")[0]  # Remove query params
+    if url_path.endswith(".gz"):
+        url_path = url_path[: -len(".gz")]
+    suffix = ".json" if url_path.endswith(".json") else ".jsonl"
+    url_name = Path(url_path).stem or "session"
+    temp_dir = Path(tempfile.gettempdir())
+    return temp_dir / f"claude-url-{url_name}{suffix}", url_name
+
+
+def iter_url_chunks(url, client=None, use_cache=True, progress_callback=None):
+    """Yield the body of a URL in chunks as it downloads.
+
+    The body is never held in memory as a whole. Content-Encoding is decoded
+    by httpx, and a body that is itself gzip-compressed (a .jsonl.gz file)
+    is decompressed on the fly. progress_callback(downloaded, total) is
+    called after each chunk with the bytes received so far and the total
+    from Content-Length, or None if that is unknown.
+    Raises click.ClickException on network errors, after retrying transient ones.
+    client defaults to the shared client from get_http_client(), which
+    caches the download for URL_CACHE_TTL seconds and then revalidates it,
+    unless use_cache is False.
+    """
+    import httpx
+
+    from claude_code_transcripts.http_client import get_http_client
+
+    client = client or get_http_client()
+    headers, extensions = _cache_options(use_cache, URL_CACHE_TTL)
+    try:
+        with client.stream(
+            "GET",
+            url,
+            headers=headers,
+            timeout=60.0,
+            follow_redirects=True,
+            extensions=extensions,
+        ) as response:
+            response.raise_for_status()
+            total = response.headers.get("Content-Length")
+            if (
+                not (total and total.isdigit())
+                or "Content-Encoding" in response.headers
+            ):
+                # The length of an encoded body says nothing about the decoded one
+                total = None
+            else:
+                total = int(total)
+            downloaded = 0
+            head = b""
+            decompressor = None
+            for chunk in response.iter_bytes():
+                downloaded += len(chunk)
+                if head is not None:
+                    # Hold back the first bytes until gzip can be recognised
+                    head += chunk
+                    if len(head) < len(GZIP_MAGIC):
+                        continue
+                    chunk, head = head, None
+                    if chunk.startswith(GZIP_MAGIC):
+                        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                if decompressor is not None:
+                    chunk = decompressor.decompress(chunk)
+                if progress_callback:
+                    progress_callback(downloaded, total)
+                yield chunk
+            if head:
+                yield head
+            if decompressor is not None:
+                yield decompressor.flush()
     except httpx.RequestError as e:
         raise click.ClickException(f"Failed to fetch URL: {e}")
     except httpx.HTTPStatusError as e:
         raise click.ClickException(
             f"Failed to fetch URL: {e.response.status_code} {e.response.reason_phrase}"
         )
+    except zlib.error as e:
+        raise click.ClickException(f"Failed to decompress URL: {e}")
 
-    # Determine file extension from URL
-    url_path = url.split("?")[0]  # Remove query params
-    if url_path.endswith(".jsonl"):
-        suffix = ".jsonl"
-    elif url_path.endswith(".json"):
-        suffix = ".json"
-    else:
-        suffix = ".jsonl"  # Default to JSONL
 
-    # Extract a name from the URL for the temp file
-    url_name = Path(url_path).stem or "session"
+def fetch_url_to_tempfile(url, client=None, use_cache=True, progress_callback=None):
+    """Fetch a URL and save to a temporary file.
 
-    temp_dir = Path(tempfile.gettempdir())
-    temp_file = temp_dir / f"claude-url-{url_name}{suffix}"
-    temp_file.write_text(response.text, encoding="utf-8")
+    The body is streamed to the file as it downloads (see iter_url_chunks(),
+    which takes the other arguments).
+    Returns the Path to the temporary file.
+    Raises click.ClickException on network errors, after retrying transient ones.
+    """
+    temp_file, _ = _url_temp_path(url)
+    chunks = iter_url_chunks(
+        url, client=client, use_cache=use_cache, progress_callback=progress_callback
+    )
+    try:
+        with open(temp_file, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+    except BaseException:
+        temp_file.unlink(missing_ok=True)
+        raise
     return temp_file
 
 
+class DownloadingLoglines:
+    """Re-iterable loglines of a JSONL session URL, parsed as it downloads.
+
+    The first pass streams the body into temp_file and yields the logline of
+    each line as soon as it is complete, so rendering overlaps the download;
+    later passes re-read temp_file like load_session_loglines(). A first
+    pass that stops early is started again from scratch. fetch_options are
+    passed to iter_url_chunks().
+    """
+
+    def __init__(self, url, temp_file, **fetch_options):
+        self.url = url
+        self.temp_file = Path(temp_file)
+        self.fetch_options = fetch_options
+        self.complete = False
+
+    def __iter__(self):
+        if self.complete:
+            return _iter_jsonl_loglines(self.temp_file)
+        return self._download()
+
+    def _download(self):
+        parts = []
+        with open(self.temp_file, "wb") as f:
+            for chunk in iter_url_chunks(self.url, **self.fetch_options):
+                f.write(chunk)
+                start = 0
+                while (end := chunk.find(b"\n", start)) != -1:
+                    parts.append(chunk[start:end])
+                    entry = _parse_jsonl_line(
+                        b"".join(parts).decode("utf-8", "replace")
+                    )
+                    parts = []
+                    start = end + 1
+                    if entry is not None:
+                        yield entry
+                if start < len(chunk):
+                    parts.append(chunk[start:])
+        entry = _parse_jsonl_line(b"".join(parts).decode("utf-8", "replace"))
+        if entry is not None:
+            yield entry
+        self.complete = True
+
+
 @cli.command("json")
 @click.argument("json_file", type=click.Path())
 @click.option(
@@ -1755,17 +4857,100 @@ def fetch_url_to_tempfile(url):
     "theme_name",
     help="Theme name (e.g., 'dark') or path to theme.json file.",
 )
+@click.option(
+    "--external-assets",
+    is_flag=True,
+    help="Link CSS and JS from shared content-hashed files instead of inlining them in every page.",
+)
+@click.option(
+    "--extract-images",
+    is_flag=True,
+    help="Write images to assets/<sha256>.<ext> files instead of embedding them as base64.",
+)
+@click.option(
+    "--prompts-per-page",
+    type=click.IntRange(min=1),
+    default=PROMPTS_PER_PAGE,
+    show_default=True,
+    help="Maximum number of prompts on each transcript page.",
+)
+@click.option(
+    "--page-messages",
+    type=click.IntRange(min=1),
+    help="Also split pages so none holds more than this many messages.",
+)
+@click.option(
+    "--page-bytes",
+    type=click.IntRange(min=1),
+    help="Also split pages at roughly this many bytes of message content.",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep running and re-render as lines are appended to the session file.",
+)
+@click.option(
+    "--interval",
+    type=click.FloatRange(min=0.1),
+    default=WATCH_INTERVAL,
+    show_default=True,
+    help="Seconds between checks for changes in --watch mode.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Download a URL again instead of revalidating the cached copy.",
+)
 def json_cmd(
-    json_file, output, output_auto, repo, gist, include_json, open_browser, theme_name
+    json_file,
+    output,
+    output_auto,
+    repo,
+    gist,
+    include_json,
+    open_browser,
+    theme_name,
+    external_assets,
+    extract_images,
+    prompts_per_page,
+    page_messages,
+    page_bytes,
+    watch,
+    interval,
+    no_cache,
 ):
-    """Convert a Claude Code session JSON/JSONL file or URL to HTML."""
+    """Convert a Claude Code session JSON/JSONL file or URL to HTML.
+
+    Use - as JSON_FILE to read the session from stdin. With --watch, keeps
+    running and re-renders the affected pages as the session file grows.
+    """
+    if gist and (external_assets or extract_images):
+        raise click.UsageError(
+            "--external-assets and --extract-images cannot be combined with --gist."
+        )
+    if watch and (gist or json_file == "-" or is_url(json_file)):
+        raise click.UsageError(
+            "--watch only works with a local session file and cannot be combined with --gist."
+        )
+    loglines = None
+    # Handle stdin input
+    if json_file == "-":
+        json_file_path = read_stdin_to_tempfile()
+        url_name = "stdin"
     # Handle URL input
-    if is_url(json_file):
+    elif is_url(json_file):
         click.echo(f"Fetching {json_file}...")
-        temp_file = fetch_url_to_tempfile(json_file)
-        json_file_path = temp_file
         # Use URL path for naming
-        url_name = Path(json_file.split("?")[0]).stem or "session"
+        json_file_path, url_name = _url_temp_path(json_file)
+        fetch_options = {
+            "use_cache": not no_cache,
+            "progress_callback": _download_progress(),
+        }
+        if json_file_path.suffix == ".jsonl":
+            # Parse the lines as they arrive instead of after the download
+            loglines = DownloadingLoglines(json_file, json_file_path, **fetch_options)
+        else:
+            fetch_url_to_tempfile(json_file, **fetch_options)
     else:
         # Validate that local file exists
         json_file_path = Path(json_file)
@@ -1791,19 +4976,53 @@ def json_cmd(
     # Load theme if specified
     theme = load_theme(theme_name) if theme_name else None
 
-    generate_html(json_file_path, output, github_repo=repo, theme=theme)
+    pagination = PaginationPolicy(prompts_per_page, page_messages, page_bytes)
+    if watch:
+        watcher = TranscriptWatcher(
+            json_file_path,
+            output,
+            github_repo=repo,
+            theme=theme,
+            external_assets=external_assets,
+            extract_images=extract_images,
+            pagination=pagination,
+        )
+        watcher.update()
+    elif loglines is not None:
+        TranscriptRenderer(
+            output,
+            github_repo=repo,
+            theme=theme,
+            external_assets=external_assets,
+            extract_images=extract_images,
+            release_image_data=True,
+            pagination=pagination,
+        ).render(loglines)
+    else:
+        generate_html(
+            json_file_path,
+            output,
+            github_repo=repo,
+            theme=theme,
+            external_assets=external_assets,
+            extract_images=extract_images,
+            pagination=pagination,
+        )
 
     # Show output directory
     click.echo(f"Output: {output.resolve()}")
 
-    # Copy JSON file to output directory if requested
-    if include_json:
+    def copy_json():
         output.mkdir(exist_ok=True)
         json_dest = output / json_file_path.name
         shutil.copy(json_file_path, json_dest)
         json_size_kb = json_dest.stat().st_size / 1024
         click.echo(f"JSON: {json_dest} ({json_size_kb:.1f} KB)")
 
+    # Copy JSON file to output directory if requested
+    if include_json:
+        copy_json()
+
     if gist:
         # Inject gist preview JS and create gist
         inject_gist_preview_js(output)
@@ -1817,6 +5036,33 @@ def json_cmd(
         index_url = (output / "index.html").resolve().as_uri()
         webbrowser.open(index_url)
 
+    if watch:
+        click.echo(f"Watching {json_file_path} for changes (press Ctrl+C to stop)")
+        _watch(watcher.update, interval)
+        if include_json:
+            copy_json()
+
+
+def _download_progress():
+    """Return a progress_callback for iter_url_chunks() that reports large downloads."""
+    reported = 0
+
+    def on_progress(downloaded, total):
+        nonlocal reported
+        if downloaded - reported < DOWNLOAD_PROGRESS_BYTES:
+            return
+        reported = downloaded
+        downloaded_mb = downloaded / (1024 * 1024)
+        if total:
+            click.echo(
+                f"  Downloaded {downloaded_mb:.1f} of {total / (1024 * 1024):.1f} MB "
+                f"({downloaded * 100 // total}%)..."
+            )
+        else:
+            click.echo(f"  Downloaded {downloaded_mb:.1f} MB...")
+
+    return on_progress
+
 
 def resolve_credentials(token, org_uuid):
     """Resolve token and org_uuid from arguments or auto-detect.
@@ -1865,180 +5111,26 @@ def format_session_for_display(session_data):
 
 
 def generate_html_from_session_data(
-    session_data, output_dir, github_repo=None, theme=None
+    session_data,
+    output_dir,
+    github_repo=None,
+    theme=None,
+    external_assets=False,
+    assets_dir=None,
+    extract_images=False,
+    pagination=None,
 ):
     """Generate HTML from session data dict (instead of file path)."""
-    output_dir = Path(output_dir)
-    output_dir.mkdir(exist_ok=True, parents=True)
-
-    # Get CSS for the theme
-    css = get_styles(theme)
-
-    loglines = session_data.get("loglines", [])
-
-    # Auto-detect GitHub repo if not provided
-    if github_repo is None:
-        github_repo = detect_github_repo(loglines)
-        if github_repo:
-            click.echo(f"Auto-detected GitHub repo: {github_repo}")
-
-    # Set module-level variable for render functions
-    global _github_repo
-    _github_repo = github_repo
-
-    conversations = []
-    current_conv = None
-    for entry in loglines:
-        log_type = entry.get("type")
-        timestamp = entry.get("timestamp", "")
-        is_compact_summary = entry.get("isCompactSummary", False)
-        message_data = entry.get("message", {})
-        if not message_data:
-            continue
-        # Convert message dict to JSON string for compatibility with existing render functions
-        message_json = json.dumps(message_data)
-        is_user_prompt = False
-        user_text = None
-        if log_type == "user":
-            content = message_data.get("content", "")
-            text = extract_text_from_content(content)
-            if text:
-                is_user_prompt = True
-                user_text = text
-        if is_user_prompt:
-            if current_conv:
-                conversations.append(current_conv)
-            current_conv = {
-                "user_text": user_text,
-                "timestamp": timestamp,
-                "messages": [(log_type, message_json, timestamp)],
-                "is_continuation": bool(is_compact_summary),
-            }
-        elif current_conv:
-            current_conv["messages"].append((log_type, message_json, timestamp))
-    if current_conv:
-        conversations.append(current_conv)
-
-    total_convs = len(conversations)
-    total_pages = (total_convs + PROMPTS_PER_PAGE - 1) // PROMPTS_PER_PAGE
-
-    for page_num in range(1, total_pages + 1):
-        start_idx = (page_num - 1) * PROMPTS_PER_PAGE
-        end_idx = min(start_idx + PROMPTS_PER_PAGE, total_convs)
-        page_convs = conversations[start_idx:end_idx]
-        messages_html = []
-        for conv in page_convs:
-            is_first = True
-            for log_type, message_json, timestamp in conv["messages"]:
-                msg_html = render_message(log_type, message_json, timestamp)
-                if msg_html:
-                    # Wrap continuation summaries in collapsed details
-                    if is_first and conv.get("is_continuation"):
-                        msg_html = f'<details class="continuation"><summary>Session continuation summary</summary>{msg_html}</details>'
-                    messages_html.append(msg_html)
-                is_first = False
-        pagination_html = generate_pagination_html(page_num, total_pages)
-        page_template = get_template("page.html")
-        page_content = page_template.render(
-            css=css,
-            js=JS,
-            page_num=page_num,
-            total_pages=total_pages,
-            pagination_html=pagination_html,
-            messages_html="".join(messages_html),
-        )
-        (output_dir / f"page-{page_num:03d}.html").write_text(
-            page_content, encoding="utf-8"
-        )
-        click.echo(f"Generated page-{page_num:03d}.html")
-
-    # Calculate overall stats and collect all commits for timeline
-    total_tool_counts = {}
-    total_messages = 0
-    all_commits = []  # (timestamp, hash, message, page_num, conv_index)
-    for i, conv in enumerate(conversations):
-        total_messages += len(conv["messages"])
-        stats = analyze_conversation(conv["messages"])
-        for tool, count in stats["tool_counts"].items():
-            total_tool_counts[tool] = total_tool_counts.get(tool, 0) + count
-        page_num = (i // PROMPTS_PER_PAGE) + 1
-        for commit_hash, commit_msg, commit_ts in stats["commits"]:
-            all_commits.append((commit_ts, commit_hash, commit_msg, page_num, i))
-    total_tool_calls = sum(total_tool_counts.values())
-    total_commits = len(all_commits)
-
-    # Build timeline items: prompts and commits merged by timestamp
-    timeline_items = []
-
-    # Add prompts
-    prompt_num = 0
-    for i, conv in enumerate(conversations):
-        if conv.get("is_continuation"):
-            continue
-        if conv["user_text"].startswith("Stop hook feedback:"):
-            continue
-        prompt_num += 1
-        page_num = (i // PROMPTS_PER_PAGE) + 1
-        msg_id = make_msg_id(conv["timestamp"])
-        link = f"page-{page_num:03d}.html#{msg_id}"
-        rendered_content = render_markdown_text(conv["user_text"])
-
-        # Collect all messages including from subsequent continuation conversations
-        # This ensures long_texts from continuations appear with the original prompt
-        all_messages = list(conv["messages"])
-        for j in range(i + 1, len(conversations)):
-            if not conversations[j].get("is_continuation"):
-                break
-            all_messages.extend(conversations[j]["messages"])
-
-        # Analyze conversation for stats (excluding commits from inline display now)
-        stats = analyze_conversation(all_messages)
-        tool_stats_str = format_tool_stats(stats["tool_counts"])
-
-        long_texts_html = ""
-        for lt in stats["long_texts"]:
-            rendered_lt = render_markdown_text(lt)
-            long_texts_html += _macros.index_long_text(rendered_lt)
-
-        stats_html = _macros.index_stats(tool_stats_str, long_texts_html)
-
-        item_html = _macros.index_item(
-            prompt_num, link, conv["timestamp"], rendered_content, stats_html
-        )
-        timeline_items.append((conv["timestamp"], "prompt", item_html))
-
-    # Add commits as separate timeline items
-    for commit_ts, commit_hash, commit_msg, page_num, conv_idx in all_commits:
-        item_html = _macros.index_commit(
-            commit_hash, commit_msg, commit_ts, _github_repo
-        )
-        timeline_items.append((commit_ts, "commit", item_html))
-
-    # Sort by timestamp
-    timeline_items.sort(key=lambda x: x[0])
-    index_items = [item[2] for item in timeline_items]
-
-    index_pagination = generate_index_pagination_html(total_pages)
-    index_template = get_template("index.html")
-    index_content = index_template.render(
-        css=css,
-        js=JS,
-        pagination_html=index_pagination,
-        prompt_num=prompt_num,
-        total_messages=total_messages,
-        total_tool_calls=total_tool_calls,
-        total_commits=total_commits,
-        total_pages=total_pages,
-        index_items_html="".join(index_items),
-    )
-    index_path = output_dir / "index.html"
-    index_path.write_text(index_content, encoding="utf-8")
-    click.echo(
-        f"Generated {index_path.resolve()} ({total_convs} prompts, {total_pages} pages)"
+    renderer = TranscriptRenderer(
+        output_dir,
+        github_repo=github_repo,
+        theme=theme,
+        external_assets=external_assets,
+        assets_dir=assets_dir,
+        extract_images=extract_images,
+        pagination=pagination,
     )
-
-    # Generate theme editor page
-    _generate_theme_html(output_dir, theme)
+    renderer.render(session_data.get("loglines", []))
 
 
 @cli.command("web")
@@ -2085,6 +5177,63 @@ def generate_html_from_session_data(
     "theme_name",
     help="Theme name (e.g., 'dark') or path to theme.json file.",
 )
+@click.option(
+    "--external-assets",
+    is_flag=True,
+    help="Link CSS and JS from shared content-hashed files instead of inlining them in every page.",
+)
+@click.option(
+    "--extract-images",
+    is_flag=True,
+    help="Write images to assets/<sha256>.<ext> files instead of embedding them as base64.",
+)
+@click.option(
+    "--prompts-per-page",
+    type=click.IntRange(min=1),
+    default=PROMPTS_PER_PAGE,
+    show_default=True,
+    help="Maximum number of prompts on each transcript page.",
+)
+@click.option(
+    "--page-messages",
+    type=click.IntRange(min=1),
+    help="Also split pages so none holds more than this many messages.",
+)
+@click.option(
+    "--page-bytes",
+    type=click.IntRange(min=1),
+    help="Also split pages at roughly this many bytes of message content.",
+)
+@click.option(
+    "--all",
+    "all_sessions",
+    is_flag=True,
+    help="Fetch every session into an archive with project and session indexes.",
+)
+@click.option(
+    "--since",
+    type=click.DateTime(),
+    help="With --all, only sessions updated since this local date or time.",
+)
+@click.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=WEB_FETCH_CONCURRENCY,
+    show_default=True,
+    help="With --all, how many sessions to fetch at once.",
+)
+@click.option(
+    "--rate",
+    type=click.FloatRange(min=0, min_open=True),
+    default=WEB_FETCH_RATE,
+    show_default=True,
+    help="With --all, most requests to start per second.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Fetch everything from the API instead of using cached responses.",
+)
 def web_cmd(
     session_id,
     output,
@@ -2096,20 +5245,66 @@ def web_cmd(
     include_json,
     open_browser,
     theme_name,
+    external_assets,
+    extract_images,
+    prompts_per_page,
+    page_messages,
+    page_bytes,
+    all_sessions,
+    since,
+    concurrency,
+    rate,
+    no_cache,
 ):
     """Select and convert a web session from the Claude API to HTML.
 
     If SESSION_ID is not provided, displays an interactive picker to select a session.
+    With --all, fetches every session into a browsable archive instead.
     """
+    if gist and (external_assets or extract_images):
+        raise click.UsageError(
+            "--external-assets and --extract-images cannot be combined with --gist."
+        )
+    if all_sessions and (session_id or gist or output_auto):
+        raise click.UsageError(
+            "--all cannot be combined with SESSION_ID, --gist or --output-auto."
+        )
+    if since and not all_sessions:
+        raise click.UsageError("--since can only be used with --all.")
+
+    import httpx
+
     try:
         token, org_uuid = resolve_credentials(token, org_uuid)
     except click.ClickException:
         raise
 
+    if all_sessions:
+        output = Path(output or "./claude-web-archive")
+        _export_web_archive(
+            token,
+            org_uuid,
+            output,
+            # Dates on the command line are in local time
+            since=since.astimezone() if since else None,
+            concurrency=concurrency,
+            rate=rate,
+            include_json=include_json,
+            github_repo=repo,
+            theme=load_theme(theme_name) if theme_name else None,
+            external_assets=external_assets,
+            extract_images=extract_images,
+            pagination=PaginationPolicy(prompts_per_page, page_messages, page_bytes),
+            use_cache=not no_cache,
+        )
+        if open_browser:
+            webbrowser.open((output / "index.html").resolve().as_uri())
+        return
+
     # If no session ID provided, show interactive picker
     if session_id is None:
         try:
-            sessions_data = fetch_sessions(token, org_uuid)
+            sessions_data = fetch_sessions(token, org_uuid, use_cache=not no_cache)
         except httpx.HTTPStatusError as e:
             raise click.ClickException(
                 f"API request failed: {e.response.status_code} {e.response.text}"
@@ -2121,6 +5316,8 @@ def web_cmd(
         if not sessions:
             raise click.ClickException("No sessions found.")
 
+        import questionary
+
         # Build choices for questionary
         choices = []
         for s in sessions:
@@ -2147,7 +5344,9 @@ def web_cmd(
     # Fetch the session
     click.echo(f"Fetching session {session_id}...")
     try:
-        session_data = fetch_session(token, org_uuid, session_id)
+        session_data = fetch_session(
+            token, org_uuid, session_id, use_cache=not no_cache
+        )
     except httpx.HTTPStatusError as e:
         raise click.ClickException(
             f"API request failed: {e.response.status_code} {e.response.text}"
@@ -2171,7 +5370,15 @@ def web_cmd(
     theme = load_theme(theme_name) if theme_name else None
 
     click.echo(f"Generating HTML in {output}/...")
-    generate_html_from_session_data(session_data, output, github_repo=repo, theme=theme)
+    generate_html_from_session_data(
+        session_data,
+        output,
+        github_repo=repo,
+        theme=theme,
+        external_assets=external_assets,
+        extract_images=extract_images,
+        pagination=PaginationPolicy(prompts_per_page, page_messages, page_bytes),
+    )
 
     # Show output directory
     click.echo(f"Output: {output.resolve()}")
@@ -2240,14 +5447,99 @@ def web_cmd(
     "theme_name",
     help="Theme name (e.g., 'dark') or path to theme.json file.",
 )
-def all_cmd(source, output, include_agents, dry_run, open_browser, quiet, theme_name):
+@click.option(
+    "--external-assets",
+    is_flag=True,
+    help="Link CSS and JS from shared content-hashed files instead of inlining them in every page.",
+)
+@click.option(
+    "--extract-images",
+    is_flag=True,
+    help="Write images to assets/<sha256>.<ext> files instead of embedding them as base64.",
+)
+@click.option(
+    "--prompts-per-page",
+    type=click.IntRange(min=1),
+    default=PROMPTS_PER_PAGE,
+    show_default=True,
+    help="Maximum number of prompts on each transcript page.",
+)
+@click.option(
+    "--page-messages",
+    type=click.IntRange(min=1),
+    help="Also split pages so none holds more than this many messages.",
+)
+@click.option(
+    "--page-bytes",
+    type=click.IntRange(min=1),
+    help="Also split pages at roughly this many bytes of message content.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Rescan every session instead of using the session metadata cache.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    help="Number of sessions to render in parallel (default: number of CPUs).",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    help="Re-render every session, even those unchanged since the last run.",
+)
+@click.option(
+    "--sqlite",
+    "sqlite_path",
+    type=click.Path(dir_okay=False),
+    help="Also load every session into this SQLite database.",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep running and update the archive as sessions are added or grow.",
+)
+@click.option(
+    "--interval",
+    type=click.FloatRange(min=0.1),
+    default=WATCH_INTERVAL,
+    show_default=True,
+    help="Seconds between checks for changes in --watch mode.",
+)
+def all_cmd(
+    source,
+    output,
+    include_agents,
+    dry_run,
+    open_browser,
+    quiet,
+    theme_name,
+    external_assets,
+    extract_images,
+    prompts_per_page,
+    page_messages,
+    page_bytes,
+    no_cache,
+    jobs,
+    force,
+    sqlite_path,
+    watch,
+    interval,
+):
     """Convert all local Claude Code sessions to a browsable HTML archive.
 
     Creates a directory structure with:
     - Master index listing all projects
     - Per-project pages listing sessions
     - Individual session transcripts
+
+    With --watch, keeps running afterwards and updates the archive as
+    sessions are added or grow.
     """
+    if watch and dry_run:
+        raise click.UsageError("--watch cannot be combined with --dry-run.")
     # Default source folder
     if source is None:
         source = Path.home() / ".claude" / "projects"
@@ -2262,7 +5554,9 @@ def all_cmd(source, output, include_agents, dry_run, open_browser, quiet, theme_
     if not quiet:
         click.echo(f"Scanning {source}...")
 
-    projects = find_all_sessions(source, include_agents=include_agents)
+    projects = find_all_sessions(
+        source, include_agents=include_agents, use_cache=not no_cache
+    )
 
     if not projects:
         if not quiet:
@@ -2310,6 +5604,12 @@ def all_cmd(source, output, include_agents, dry_run, open_browser, quiet, theme_
         include_agents=include_agents,
         progress_callback=on_progress,
         theme=theme,
+        use_cache=not no_cache,
+        jobs=jobs or os.cpu_count() or 1,
+        force=force,
+        external_assets=external_assets,
+        extract_images=extract_images,
+        pagination=PaginationPolicy(prompts_per_page, page_messages, page_bytes),
     )
 
     # Report any failures
@@ -2325,12 +5625,257 @@ def all_cmd(source, output, include_agents, dry_run, open_browser, quiet, theme_
             f"\nGenerated archive with {stats['total_projects']} projects, "
             f"{stats['total_sessions']} sessions"
         )
+        if stats["skipped_sessions"] or stats["removed_sessions"]:
+            click.echo(
+                f"Skipped {stats['skipped_sessions']} unchanged sessions, "
+                f"removed {stats['removed_sessions']} deleted sessions"
+            )
         click.echo(f"Output: {output.resolve()}")
 
+    if sqlite_path:
+        _export_sqlite(
+            source, sqlite_path, include_agents, quiet, use_cache=not no_cache
+        )
+
     if open_browser:
         index_url = (output / "index.html").resolve().as_uri()
         webbrowser.open(index_url)
 
+    if watch:
+        watcher = ArchiveWatcher(
+            source,
+            output,
+            include_agents=include_agents,
+            theme=theme,
+            use_cache=not no_cache,
+            external_assets=external_assets,
+            extract_images=extract_images,
+            pagination=PaginationPolicy(prompts_per_page, page_messages, page_bytes),
+            echo=(lambda *args, **kwargs: None) if quiet else None,
+        )
+        if not quiet:
+            click.echo(f"\nWatching {source} for changes (press Ctrl+C to stop)")
+        _watch(watcher.poll, interval)
+        watcher.close()
+
+
+@cli.command("sqlite")
+@click.argument("db_path", type=click.Path(dir_okay=False))
+@click.option(
+    "-s",
+    "--source",
+    type=click.Path(exists=True),
+    help="Source directory containing Claude projects (default: ~/.claude/projects).",
+)
+@click.option(
+    "--include-agents",
+    is_flag=True,
+    help="Include agent-* session files (excluded by default).",
+)
+@click.option(
+    "-q",
+    "--quiet",
+    is_flag=True,
+    help="Suppress all output except errors.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Rescan every session instead of using the session metadata cache.",
+)
+def sqlite_cmd(db_path, source, include_agents, quiet, no_cache):
+    """Load all local Claude Code sessions into a SQLite database.
+
+    Creates tables for sessions, messages, content blocks, tool calls, tool
+    results and commits, plus a messages_fts full-text index. Running it
+    again only loads new or changed sessions.
+    """
+    if source is None:
+        source = Path.home() / ".claude" / "projects"
+    else:
+        source = Path(source)
+
+    if not source.exists():
+        raise click.ClickException(f"Source directory not found: {source}")
+
+    _export_sqlite(source, db_path, include_agents, quiet, use_cache=not no_cache)
+
+
+@cli.command("serve")
+@click.option(
+    "-s",
+    "--source",
+    type=click.Path(exists=True),
+    help="Source directory containing Claude projects (default: ~/.claude/projects).",
+)
+@click.option(
+    "--host",
+    default="127.0.0.1",
+    show_default=True,
+    help="Interface to listen on.",
+)
+@click.option(
+    "-p",
+    "--port",
+    type=click.IntRange(min=0, max=65535),
+    default=8000,
+    show_default=True,
+    help="Port to listen on (0 picks a free port).",
+)
+@click.option(
+    "--include-agents",
+    is_flag=True,
+    help="Include agent-* session files (excluded by default).",
+)
+@click.option(
+    "--theme",
+    "theme_name",
+    help="Theme name (e.g., 'dark') or path to theme.json file.",
+)
+@click.option(
+    "--cache-size",
+    type=click.IntRange(min=1),
+    default=SERVE_CACHE_BYTES // (1024 * 1024),
+    show_default=True,
+    help="Maximum size in MB of rendered pages kept in memory.",
+)
+@click.option(
+    "--open",
+    "open_browser",
+    is_flag=True,
+    help="Open the archive in your default browser.",
+)
+@click.option(
+    "-q",
+    "--quiet",
+    is_flag=True,
+    help="Do not log requests.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Rescan every session instead of using the session metadata cache.",
+)
+def serve_cmd(
+    source,
+    host,
+    port,
+    include_agents,
+    theme_name,
+    cache_size,
+    open_browser,
+    quiet,
+    no_cache,
+):
+    """Browse all local Claude Code sessions through a local web server.
+
+    Serves the same archive as the all command, but renders each session
+    the first time it is opened instead of rendering everything up front.
+    """
+    if source is None:
+        source = Path.home() / ".claude" / "projects"
+    else:
+        source = Path(source)
+
+    if not source.exists():
+        raise click.ClickException(f"Source directory not found: {source}")
+
+    theme = load_theme(theme_name) if theme_name else None
+
+    try:
+        server = TranscriptServer(
+            (host, port),
+            source,
+            theme=theme,
+            include_agents=include_agents,
+            cache_bytes=cache_size * 1024 * 1024,
+            use_cache=not no_cache,
+            echo=(lambda *args, **kwargs: None) if quiet else None,
+        )
+    except OSError as e:
+        raise click.ClickException(f"Could not listen on {host}:{port}: {e}")
+
+    url = f"http://{host}:{server.server_address[1]}/"
+    click.echo(f"Serving {source} at {url} (press Ctrl+C to stop)")
+    if open_browser:
+        webbrowser.open(url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def _export_web_archive(token, org_uuid, output, **kwargs):
+    """Run generate_web_archive() for the CLI, reporting progress."""
+    import httpx
+
+    click.echo(f"Fetching all sessions into {output}...")
+
+    def on_progress(project_name, session_name, current, total):
+        if current % 10 == 0 or current == total:
+            click.echo(f"  Fetched {current}/{total} sessions...")
+
+    try:
+        stats = generate_web_archive(
+            token, org_uuid, output, progress_callback=on_progress, **kwargs
+        )
+    except httpx.HTTPStatusError as e:
+        raise click.ClickException(
+            f"API request failed: {e.response.status_code} {e.response.text}"
+        )
+    except httpx.RequestError as e:
+        raise click.ClickException(f"Network error: {e}")
+
+    if stats["failed_sessions"]:
+        click.echo(f"\nWarning: {len(stats['failed_sessions'])} session(s) failed:")
+        for failure in stats["failed_sessions"]:
+            click.echo(
+                f"  {failure['project']}/{failure['session']}: {failure['error']}"
+            )
+
+    click.echo(
+        f"\nGenerated archive with {stats['total_projects']} projects, "
+        f"{stats['total_sessions']} sessions"
+    )
+    click.echo(f"Output: {output.resolve()}")
+
+
+def _export_sqlite(source, db_path, include_agents, quiet, use_cache=True):
+    """Run export_sessions_to_sqlite() for the CLI, reporting progress."""
+    if not quiet:
+        click.echo(f"\nLoading sessions into {db_path}...")
+
+    def on_progress(project_name, session_name, current, total):
+        if not quiet and current % 100 == 0:
+            click.echo(f"  Loaded {current}/{total} sessions...")
+
+    try:
+        stats = export_sessions_to_sqlite(
+            source,
+            db_path,
+            include_agents=include_agents,
+            progress_callback=on_progress,
+            use_cache=use_cache,
+        )
+    except (sqlite3.Error, ValueError) as e:
+        raise click.ClickException(f"SQLite export failed: {e}")
+
+    if stats["failed_sessions"]:
+        click.echo(f"\nWarning: {len(stats['failed_sessions'])} session(s) failed:")
+        for failure in stats["failed_sessions"]:
+            click.echo(
+                f"  {failure['project']}/{failure['session']}: {failure['error']}"
+            )
+
+    if not quiet:
+        click.echo(
+            f"Added {stats['added_sessions']} sessions, updated "
+            f"{stats['updated_sessions']}, skipped {stats['skipped_sessions']} "
+            f"unchanged"
+        )
+
 
 def main():
     cli()
@@ -0,0 +1,414 @@
+"""On-disk caches for Claude Code transcripts.
+
+This module provides:
+- CACHE_ROOT: ~/.claude-code-transcripts, where caches are stored
+- SessionMetadataCache: per-session metadata keyed by path, mtime and size
+- BuildManifest: what generate_batch_html() rendered into an archive, so
+  later runs only re-render sessions whose inputs changed
+- template_bytecode_cache(): compiled Jinja2 templates shared by processes
+- ResponseCache and ResponseWriter: HTTP responses fetched from the API
+  and session URLs, evicting the least recently used beyond a size limit
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+CACHE_ROOT = Path.home() / ".claude-code-transcripts"
+
+# Session metadata cache used by find_local_sessions() and find_all_sessions()
+SESSION_METADATA_PATH = CACHE_ROOT / "session-metadata.json"
+
+# Bump when the shape of cached metadata changes to invalidate old caches
+SESSION_METADATA_VERSION = 1
+
+# Build manifest written into the root of each archive
+BUILD_MANIFEST_NAME = ".build-manifest.json"
+BUILD_MANIFEST_VERSION = 1
+
+# Compiled Jinja2 templates, so each process does not recompile them
+TEMPLATE_CACHE_DIR = CACHE_ROOT / "templates"
+
+# HTTP response cache used by the shared HTTP client
+RESPONSE_CACHE_DIR = CACHE_ROOT / "cache"
+RESPONSE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+RESPONSE_CACHE_VERSION = 1
+
+
+def get_tool_version():
+    """Return the installed claude-code-transcripts version, used to invalidate caches."""
+    from importlib import metadata
+
+    try:
+        return metadata.version("claude-code-transcripts")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def file_sha256(path):
+    """Return the hex SHA-256 digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_json_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write to a temporary file first so readers never see a partial file
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def template_bytecode_cache(path=None):
+    """Return a Jinja2 bytecode cache for the package templates, or None.
+
+    Jinja2 already recompiles a template whose source changed; the file
+    names also carry the package and Jinja2 versions, so an upgrade never
+    loads bytecode compiled by another release, and files left behind by
+    other versions are deleted. None is returned if the directory cannot
+    be created, in which case templates are compiled in memory as before.
+    """
+    import jinja2
+    from jinja2 import FileSystemBytecodeCache
+
+    path = Path(path) if path else TEMPLATE_CACHE_DIR
+    prefix = f"{get_tool_version()}-jinja{jinja2.__version__}-"
+    try:
+        path.mkdir(parents=True, exist_ok=True, mode=0o700)
+        for cached in path.glob("*.cache"):
+            if not cached.name.startswith(prefix):
+                cached.unlink(missing_ok=True)
+    except OSError:
+        return None
+    return FileSystemBytecodeCache(str(path), pattern=prefix + "%s.cache")
+
+
+class SessionMetadataCache:
+    """Session metadata persisted as a JSON file, keyed by path + mtime + size.
+
+    A cached entry is only returned while the session file's mtime and size
+    still match, so unchanged files never have to be reopened. Entries for
+    files that have disappeared are dropped by prune().
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else SESSION_METADATA_PATH
+        self.entries = self._load()
+        self.seen = set()
+        self.dirty = False
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        if data.get("version") != SESSION_METADATA_VERSION:
+            return {}
+        return data.get("sessions", {})
+
+    @staticmethod
+    def _key(filepath):
+        return os.path.abspath(filepath)
+
+    def get(self, filepath, stat):
+        """Return cached metadata for filepath, or None if missing or stale."""
+        key = self._key(filepath)
+        self.seen.add(key)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry.get("mtime") != stat.st_mtime or entry.get("size") != stat.st_size:
+            return None
+        return entry
+
+    def set(self, filepath, metadata):
+        """Store metadata (which must include mtime and size) for filepath."""
+        key = self._key(filepath)
+        self.seen.add(key)
+        self.entries[key] = metadata
+        self.dirty = True
+
+    def prune(self, folder):
+        """Drop entries under folder that were not looked up since loading.
+
+        Call this after scanning every session in folder: anything not seen
+        during the scan no longer exists.
+        """
+        prefix = os.path.join(self._key(folder), "")
+        stale = [
+            key
+            for key in self.entries
+            if key.startswith(prefix) and key not in self.seen
+        ]
+        for key in stale:
+            del self.entries[key]
+        if stale:
+            self.dirty = True
+
+    def save(self):
+        """Write the cache to disk if anything changed."""
+        if not self.dirty:
+            return
+        data = {"version": SESSION_METADATA_VERSION, "sessions": self.entries}
+        _write_json_atomic(self.path, data)
+        self.dirty = False
+
+
+class BuildManifest:
+    """Record of the sessions rendered into an archive directory.
+
+    Each entry maps a source session file to the output directory it was
+    rendered into, along with the inputs that produced it: the file's mtime,
+    size and SHA-256, a hash of the theme and the tool version. A session
+    only needs re-rendering when one of those inputs changes. The content
+    hash is only computed when mtime or size differ, so touching a file
+    without changing it does not trigger a re-render.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = Path(output_dir)
+        self.path = self.output_dir / BUILD_MANIFEST_NAME
+        self.entries = self._load()
+        self.dirty = False
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        if data.get("version") != BUILD_MANIFEST_VERSION:
+            return {}
+        return data.get("sessions", {})
+
+    @staticmethod
+    def _key(filepath):
+        return os.path.abspath(filepath)
+
+    def is_current(self, filepath, mtime, size, output, theme_hash, tool_version):
+        """Return True if filepath was already rendered to output from the same inputs."""
+        entry = self.entries.get(self._key(filepath))
+        if entry is None:
+            return False
+        if entry.get("output") != output:
+            return False
+        if entry.get("theme_hash") != theme_hash:
+            return False
+        if entry.get("tool_version") != tool_version:
+            return False
+        if not (self.output_dir / output / "index.html").exists():
+            return False
+        if entry.get("mtime") == mtime and entry.get("size") == size:
+            return True
+        if entry.get("sha256") != file_sha256(filepath):
+            return False
+        # Same content with a new mtime: remember it to skip hashing next time
+        entry["mtime"] = mtime
+        entry["size"] = size
+        self.dirty = True
+        return True
+
+    def record(
+        self, filepath, mtime, size, sha256, output, project, theme_hash, tool_version
+    ):
+        """Record that filepath was rendered into output (relative to the archive)."""
+        self.entries[self._key(filepath)] = {
+            "mtime": mtime,
+            "size": size,
+            "sha256": sha256,
+            "theme_hash": theme_hash,
+            "tool_version": tool_version,
+            "project": project,
+            "output": output,
+        }
+        self.dirty = True
+
+    def discard(self, filepath):
+        """Forget filepath, e.g. because rendering it failed."""
+        if self.entries.pop(self._key(filepath), None) is not None:
+            self.dirty = True
+
+    def remove_missing(self, filepaths):
+        """Delete outputs for recorded sessions that are not in filepaths.
+
+        Returns the list of removed manifest entries.
+        """
+        keep = {self._key(filepath) for filepath in filepaths}
+        removed = []
+        for key in [key for key in self.entries if key not in keep]:
+            entry = self.entries.pop(key)
+            output_path = (self.output_dir / entry["output"]).resolve()
+            # Never delete anything outside of the archive directory
+            if self.output_dir.resolve() in output_path.parents:
+                shutil.rmtree(output_path, ignore_errors=True)
+            removed.append(entry)
+        if removed:
+            self.dirty = True
+        return removed
+
+    def save(self):
+        """Write the manifest into the archive directory if anything changed."""
+        if not self.dirty:
+            return
+        data = {"version": BUILD_MANIFEST_VERSION, "sessions": self.entries}
+        _write_json_atomic(self.path, data)
+        self.dirty = False
+
+
+class ResponseCache:
+    """HTTP responses stored on disk as <key>.json metadata and <key>.body files.
+
+    Bodies are written as they download (see writer()) and read back as
+    files, so large responses never have to fit in memory. Opening an entry
+    updates its body's mtime, so once the files add up to more than
+    max_bytes the least recently used are deleted first. Responses can hold
+    private session data, so the directory is only readable by the current
+    user.
+    """
+
+    def __init__(self, path=None, max_bytes=None):
+        self.path = Path(path) if path else RESPONSE_CACHE_DIR
+        self.max_bytes = RESPONSE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    @staticmethod
+    def key(*parts):
+        """Return the cache key for a request described by parts (strings)."""
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def _metadata_path(self, key):
+        return self.path / f"{key}.json"
+
+    def _body_path(self, key):
+        return self.path / f"{key}.body"
+
+    def get_metadata(self, key):
+        """Return the metadata dict stored for key, or None if it is not cached."""
+        try:
+            with open(self._metadata_path(key), encoding="utf-8") as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(metadata, dict):
+            return None
+        if metadata.get("version") != RESPONSE_CACHE_VERSION:
+            return None
+        return metadata
+
+    def open(self, key):
+        """Return the body stored for key as a binary file, or None."""
+        path = self._body_path(key)
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return None
+        try:
+            # Mark as recently used
+            os.utime(path)
+        except OSError:
+            pass
+        return f
+
+    def get(self, key):
+        """Return (metadata, body) for key, or None if it is not cached."""
+        metadata = self.get_metadata(key)
+        if metadata is None:
+            return None
+        f = self.open(key)
+        if f is None:
+            return None
+        with f:
+            return metadata, f.read()
+
+    def set(self, key, metadata, body):
+        """Store body with its metadata (a JSON-serializable dict) under key."""
+        writer = self.writer(key, metadata)
+        writer.write(body)
+        writer.commit()
+
+    def update(self, key, metadata):
+        """Replace the metadata stored for key, keeping its body."""
+        if self._body_path(key).exists():
+            _write_json_atomic(
+                self._metadata_path(key),
+                {**metadata, "version": RESPONSE_CACHE_VERSION},
+            )
+
+    def writer(self, key, metadata):
+        """Return a ResponseWriter that stores a body written in chunks under key."""
+        return ResponseWriter(self, key, metadata)
+
+    def evict(self):
+        """Delete the least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for path in self.path.glob("*.body"):
+            metadata_path = path.with_suffix(".json")
+            try:
+                stat = path.stat()
+                size = stat.st_size + metadata_path.stat().st_size
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, size, path, metadata_path))
+        total = sum(entry[1] for entry in entries)
+        for _, size, path, metadata_path in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            metadata_path.unlink(missing_ok=True)
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+class ResponseWriter:
+    """A ResponseCache entry being written, stored by commit().
+
+    The body goes to a temporary file, so a download that fails part way,
+    or outgrows the cache, is discarded without touching the stored entry.
+    """
+
+    def __init__(self, cache, key, metadata):
+        self.cache = cache
+        self.key = key
+        self.metadata = {**metadata, "version": RESPONSE_CACHE_VERSION}
+        self.size = 0
+        cache.path.mkdir(parents=True, exist_ok=True, mode=0o700)
+        fd, temp_name = tempfile.mkstemp(dir=cache.path, suffix=".tmp")
+        self.temp_path = Path(temp_name)
+        self.file = os.fdopen(fd, "wb")
+
+    def write(self, data):
+        if self.file is None:
+            return
+        self.size += len(data)
+        if self.size > self.cache.max_bytes:
+            self.discard()
+            return
+        self.file.write(data)
+
+    def commit(self):
+        """Store the body written so far; later writes are ignored."""
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        os.replace(self.temp_path, self.cache._body_path(self.key))
+        _write_json_atomic(self.cache._metadata_path(self.key), self.metadata)
+        self.cache.evict()
+
+    def discard(self):
+        """Throw away the body written so far, unless it was committed."""
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        self.temp_path.unlink(missing_ok=True)
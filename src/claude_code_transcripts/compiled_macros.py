@@ -0,0 +1,371 @@
+"""Python string builders for the macros rendered once per content block.
+
+Each function here produces exactly the markup its namesake in
+templates/macros.html does, without the cost of a Jinja macro call. The
+macros stay the reference implementation: a change to one of them must be
+made to its function here too, and tests/test_compiled_macros.py checks the
+two agree. Macros rendered once per page, such as pagination, are only
+available from the template.
+
+As in the templates, ``{{ value }}`` is escape(value) and ``{{ value|safe }}``
+is str(value), and every function returns Markup.
+"""
+
+from markupsafe import Markup, escape
+
+# Stands in for Jinja's Undefined when an attribute lookup fails
+_UNDEFINED = object()
+
+
+def _attribute(obj, name):
+    """Look up obj.name the way templates do, returning _UNDEFINED if missing."""
+    try:
+        return getattr(obj, name)
+    except AttributeError:
+        pass
+    try:
+        return obj[name]
+    except (TypeError, LookupError):
+        return _UNDEFINED
+
+
+def _text(value):
+    """Render a looked-up value as ``{{ value }}`` does."""
+    return "" if value is _UNDEFINED else escape(value)
+
+
+def _is_true(value):
+    return value is not _UNDEFINED and bool(value)
+
+
+def _short_name(file_path):
+    return file_path.split("/")[-1] if "/" in file_path else file_path
+
+
+def _commit_link(github_repo, commit_hash):
+    return escape(f"https://github.com/{github_repo}/commit/{commit_hash}")
+
+
+def todo_list(todos, tool_id):
+    items = []
+    for todo in todos:
+        status = _attribute(todo, "status")
+        if status is _UNDEFINED:
+            status = "pending"
+        content = _attribute(todo, "content")
+        if content is _UNDEFINED:
+            content = ""
+        if status == "completed":
+            icon, status_class = "✓", "todo-completed"
+        elif status == "in_progress":
+            icon, status_class = "→", "todo-in-progress"
+        else:
+            icon, status_class = "○", "todo-pending"
+        items.append(
+            f'<li class="todo-item {status_class}"><span class="todo-icon">{icon}</span>'
+            f'<span class="todo-content">{escape(content)}</span></li>'
+        )
+    return Markup(
+        f'\n<div class="todo-list" data-tool-id="{escape(tool_id)}">'
+        '<div class="todo-header"><span class="todo-header-icon">☰</span> Task List</div>'
+        f'<ul class="todo-items">{"".join(items)}</ul></div>'
+    )
+
+
+def write_tool(file_path, content, tool_id):
+    return Markup(
+        f'<div class="file-tool write-tool" data-tool-id="{escape(tool_id)}">\n'
+        '<div class="file-tool-header write-header"><span class="file-tool-icon">📝</span>'
+        f' Write <span class="file-tool-path">{escape(_short_name(file_path))}</span></div>\n'
+        f'<div class="file-tool-fullpath">{escape(file_path)}</div>\n'
+        '<div class="truncatable"><div class="truncatable-content">'
+        f'<pre class="file-content">{escape(content)}</pre></div>'
+        '<button class="expand-btn">Show more</button></div>\n'
+        "</div>"
+    )
+
+
+def edit_tool(file_path, old_string, new_string, replace_all, tool_id):
+    replace_all_html = (
+        ' <span class="edit-replace-all">(replace all)</span>' if replace_all else ""
+    )
+    return Markup(
+        f'<div class="file-tool edit-tool" data-tool-id="{escape(tool_id)}">\n'
+        '<div class="file-tool-header edit-header"><span class="file-tool-icon">✏️</span>'
+        f' Edit <span class="file-tool-path">{escape(_short_name(file_path))}</span>'
+        f"{replace_all_html}</div>\n"
+        f'<div class="file-tool-fullpath">{escape(file_path)}</div>\n'
+        '<div class="truncatable"><div class="truncatable-content">\n'
+        '<div class="edit-section edit-old"><div class="edit-label">−</div>'
+        f'<pre class="edit-content">{escape(old_string)}</pre></div>\n'
+        '<div class="edit-section edit-new"><div class="edit-label">+</div>'
+        f'<pre class="edit-content">{escape(new_string)}</pre></div>\n'
+        '</div><button class="expand-btn">Show more</button></div>\n'
+        "</div>"
+    )
+
+
+def bash_tool(command, description, tool_id):
+    description_html = (
+        f'\n<div class="tool-description">{escape(description)}</div>'
+        if description
+        else ""
+    )
+    return Markup(
+        f'\n<div class="tool-use bash-tool" data-tool-id="{escape(tool_id)}">\n'
+        '<div class="tool-header"><span class="tool-icon">$</span> Bash</div>'
+        f"{description_html}"
+        '<div class="truncatable"><div class="truncatable-content">'
+        f'<pre class="bash-command">{escape(command)}</pre></div>'
+        '<button class="expand-btn">Show more</button></div>\n'
+        "</div>"
+    )
+
+
+def read_tool(filename, file_path, range_info, tool_id):
+    return Markup(
+        f'\n<div class="file-tool read-tool" data-tool-id="{escape(tool_id)}">\n'
+        '<div class="file-tool-header read-header"><span class="file-tool-icon">📖</span>'
+        f' Read <span class="file-tool-path">{escape(filename)}</span></div>\n'
+        f'<div class="file-tool-fullpath">{escape(file_path)}{escape(range_info)}</div>\n'
+        "</div>"
+    )
+
+
+def grep_tool(pattern, path, tool_id):
+    return Markup(
+        f'\n<div class="file-tool grep-tool" data-tool-id="{escape(tool_id)}">\n'
+        '<div class="file-tool-header grep-header"><span class="file-tool-icon">🔍</span>'
+        f' Grep <code class="pattern">{escape(pattern)}</code></div>\n'
+        f'<div class="file-tool-fullpath">in {escape(path if path else ".")}</div>\n'
+        "</div>"
+    )
+
+
+def glob_tool(pattern, path, tool_id):
+    path_html = (
+        f'\n<div class="file-tool-fullpath">in {escape(path)}</div>' if path else ""
+    )
+    return Markup(
+        f'\n<div class="file-tool glob-tool" data-tool-id="{escape(tool_id)}">\n'
+        '<div class="file-tool-header glob-header"><span class="file-tool-icon">📁</span>'
+        f' Glob <code class="pattern">{escape(pattern)}</code></div>'
+        f"{path_html}\n"
+        "</div>"
+    )
+
+
+def task_tool(description, prompt, subagent_type, tool_id):
+    type_html = (
+        f' <span class="task-type">{escape(subagent_type)}</span>'
+        if subagent_type
+        else ""
+    )
+    return Markup(
+        f'\n<div class="tool-use task-tool" data-tool-id="{escape(tool_id)}">\n'
+        f'<div class="tool-header"><span class="tool-icon">⚙</span> Task{type_html}</div>\n'
+        f'<div class="task-description">{escape(description)}</div>\n'
+        '<details class="task-prompt"><summary>View prompt</summary>'
+        f"<pre>{escape(prompt)}</pre></details>\n"
+        "</div>"
+    )
+
+
+def ask_user_question(questions, tool_id):
+    parts = [f'\n<div class="tool-use ask-user-tool" data-tool-id="{escape(tool_id)}">']
+    for question in questions:
+        header = _attribute(question, "header")
+        header_html = (
+            f' <span class="question-header">{escape(header)}</span>'
+            if _is_true(header)
+            else ""
+        )
+        parts.append(
+            '\n<div class="question-block">\n'
+            f'<div class="tool-header"><span class="tool-icon">❓</span> Question{header_html}</div>\n'
+            f'<div class="question-text">{_text(_attribute(question, "question"))}</div>'
+        )
+        options = _attribute(question, "options")
+        if _is_true(options):
+            parts.append('\n<div class="question-options">')
+            for option in options:
+                description = _attribute(option, "description")
+                description_html = (
+                    f'<span class="option-desc">{escape(description)}</span>'
+                    if _is_true(description)
+                    else ""
+                )
+                parts.append(
+                    f'\n<div class="option"><strong>{_text(_attribute(option, "label"))}</strong>'
+                    f"{description_html}</div>"
+                )
+            parts.append("\n</div>")
+        parts.append("\n</div>")
+    parts.append("\n</div>")
+    return Markup("".join(parts))
+
+
+def simple_tool(icon, label, tool_id):
+    return Markup(
+        f'\n<div class="tool-use simple-tool" data-tool-id="{escape(tool_id)}">\n'
+        f'<div class="tool-header"><span class="tool-icon">{escape(icon)}</span> {escape(label)}</div>\n'
+        "</div>"
+    )
+
+
+def tool_use(tool_name, description, input_json, tool_id):
+    description_html = (
+        f'<div class="tool-description">{escape(description)}</div>'
+        if description
+        else ""
+    )
+    return Markup(
+        f'\n<div class="tool-use" data-tool-id="{escape(tool_id)}">'
+        f'<div class="tool-header"><span class="tool-icon">⚙</span> {escape(tool_name)}</div>'
+        f"{description_html}"
+        '<div class="truncatable"><div class="truncatable-content">'
+        f'<pre class="json">{escape(input_json)}</pre></div>'
+        '<button class="expand-btn">Show more</button></div></div>'
+    )
+
+
+def tool_result(content_html, is_error, has_images=False):
+    error_class = " tool-error" if is_error else ""
+    if has_images:
+        return Markup(f'<div class="tool-result{error_class}">{content_html}</div>')
+    return Markup(
+        f'<div class="tool-result{error_class}"><div class="truncatable">'
+        f'<div class="truncatable-content">{content_html}</div>'
+        '<button class="expand-btn">Show more</button></div></div>'
+    )
+
+
+def thinking(content_html):
+    return Markup(
+        '\n<div class="thinking"><div class="thinking-label">Thinking</div>'
+        f"{content_html}</div>"
+    )
+
+
+def assistant_text(content_html):
+    return Markup(f'\n<div class="assistant-text">{content_html}</div>')
+
+
+def user_content(content_html):
+    return Markup(f'\n<div class="user-content">{content_html}</div>')
+
+
+def image_block(media_type, data):
+    return Markup(
+        f'\n<div class="image-block"><img src="data:{escape(media_type)};base64,'
+        f'{escape(data)}" style="max-width: 100%"></div>'
+    )
+
+
+def image_file_block(src):
+    return Markup(
+        f'\n<div class="image-block"><img src="{escape(src)}" loading="lazy"'
+        ' style="max-width: 100%"></div>'
+    )
+
+
+def commit_card(commit_hash, commit_msg, github_repo):
+    card = (
+        f'<span class="commit-card-hash">{escape(commit_hash[:7])}</span>'
+        f" {escape(commit_msg)}"
+    )
+    if github_repo:
+        card = f'<a href="{_commit_link(github_repo, commit_hash)}">{card}</a>'
+    return Markup(f'<div class="commit-card">{card}</div>')
+
+
+def message(role_class, role_label, msg_id, timestamp, content_html):
+    msg_id = escape(msg_id)
+    timestamp = escape(timestamp)
+    return Markup(
+        f'\n<div class="message {escape(role_class)}" id="{msg_id}">'
+        f'<div class="message-header"><span class="role-label">{escape(role_label)}</span>'
+        f'<a href="#{msg_id}" class="timestamp-link">'
+        f'<time datetime="{timestamp}" data-timestamp="{timestamp}">{timestamp}</time></a></div>'
+        f'<div class="message-content">{content_html}</div></div>'
+    )
+
+
+def continuation(content_html):
+    return Markup(
+        '\n<details class="continuation"><summary>Session continuation summary</summary>'
+        f"{content_html}</details>"
+    )
+
+
+def index_item(prompt_num, link, timestamp, rendered_content, stats_html):
+    timestamp = escape(timestamp)
+    return Markup(
+        f'\n<div class="index-item"><a href="{escape(link)}"><div class="index-item-header">'
+        f'<span class="index-item-number">#{escape(prompt_num)}</span>'
+        f'<time datetime="{timestamp}" data-timestamp="{timestamp}">{timestamp}</time></div>'
+        f'<div class="index-item-content">{rendered_content}</div></a>{stats_html}</div>'
+    )
+
+
+def index_commit(commit_hash, commit_msg, timestamp, github_repo):
+    timestamp = escape(timestamp)
+    commit = (
+        '<div class="index-commit-header">'
+        f'<span class="index-commit-hash">{escape(commit_hash[:7])}</span>'
+        f'<time datetime="{timestamp}" data-timestamp="{timestamp}">{timestamp}</time></div>'
+        f'<div class="index-commit-msg">{escape(commit_msg)}</div>'
+    )
+    if github_repo:
+        commit = f'<a href="{_commit_link(github_repo, commit_hash)}">{commit}</a>'
+    return Markup(f'<div class="index-commit">{commit}</div>')
+
+
+def index_stats(tool_stats_str, long_texts_html):
+    if not (tool_stats_str or long_texts_html):
+        return Markup("")
+    stats_html = f"<span>{escape(tool_stats_str)}</span>" if tool_stats_str else ""
+    return Markup(
+        f'<div class="index-item-stats">{stats_html}{long_texts_html}\n</div>'
+    )
+
+
+def index_long_text(rendered_content):
+    return Markup(
+        '\n<div class="index-item-long-text"><div class="truncatable">'
+        '<div class="truncatable-content"><div class="index-item-long-text-content">'
+        f"{rendered_content}</div></div>"
+        '<button class="expand-btn">Show more</button></div></div>'
+    )
+
+
+# The macros above by name, for the renderer to use in place of macros.html
+MACROS = {
+    macro.__name__: macro
+    for macro in [
+        todo_list,
+        write_tool,
+        edit_tool,
+        bash_tool,
+        read_tool,
+        grep_tool,
+        glob_tool,
+        task_tool,
+        ask_user_question,
+        simple_tool,
+        tool_use,
+        tool_result,
+        thinking,
+        assistant_text,
+        user_content,
+        image_block,
+        image_file_block,
+        commit_card,
+        message,
+        continuation,
+        index_item,
+        index_commit,
+        index_stats,
+        index_long_text,
+    ]
+}
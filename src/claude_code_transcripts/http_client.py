@@ -0,0 +1,520 @@
+"""Shared HTTP client for the Claude API and session URLs.
+
+This module provides:
+- RetryTransport: retries requests that failed with 429, 5xx or a network
+  error, with exponential backoff, jitter and support for Retry-After
+- create_http_client(): an httpx.Client using it, with keep-alive and HTTP/2
+  when the optional h2 package is installed
+- get_http_client(): the client shared by fetch_sessions(), fetch_session()
+  and fetch_url_to_tempfile(), so repeated requests reuse connections
+- AsyncRetryTransport, create_async_http_client() and AsyncRateLimiter: the
+  same for concurrent requests with httpx.AsyncClient
+- CachingTransport and AsyncCachingTransport: serve GET requests from a
+  ResponseCache while fresh and revalidate them with ETag/Last-Modified
+"""
+
+import asyncio
+import atexit
+import email.utils
+import importlib.util
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from claude_code_transcripts.cache import ResponseCache
+
+# Retries after the first attempt, for requests that fail transiently
+HTTP_RETRIES = 3
+
+# Backoff before retry n is a random delay up to HTTP_BACKOFF * 2**n seconds
+HTTP_BACKOFF = 0.5
+HTTP_BACKOFF_MAX = 30.0
+
+# Longest Retry-After honoured; servers asking for more get this instead
+HTTP_RETRY_AFTER_MAX = 120.0
+
+HTTP_TIMEOUT = 60.0
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Only these are safe to send again after a failure part way through
+RETRY_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# Request headers whose values select a different cached response
+CACHE_VARY_HEADERS = ("authorization", "x-organization-uuid", "anthropic-version")
+
+# Response headers that describe the connection rather than the cached body
+CACHE_SKIP_HEADERS = frozenset({"connection", "keep-alive", "transfer-encoding"})
+
+# Bytes read at a time from cached bodies
+CACHE_CHUNK_SIZE = 1024 * 1024
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def http2_available():
+    """Return True if the h2 package needed for HTTP/2 is installed."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def parse_retry_after(response):
+    """Return the delay in seconds a response's Retry-After header asks for, or None.
+
+    Retry-After is either a number of seconds or an HTTP date.
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class _RetryPolicy:
+    """When and how long RetryTransport and AsyncRetryTransport wait to retry."""
+
+    def __init__(self, retries=None, backoff=None, backoff_max=None):
+        self.retries = HTTP_RETRIES if retries is None else retries
+        self.backoff = HTTP_BACKOFF if backoff is None else backoff
+        self.backoff_max = HTTP_BACKOFF_MAX if backoff_max is None else backoff_max
+
+    def delay(self, attempt, response=None):
+        """Return the seconds to wait before retry number attempt (from 0)."""
+        if response is not None:
+            retry_after = parse_retry_after(response)
+            if retry_after is not None:
+                return min(retry_after, HTTP_RETRY_AFTER_MAX)
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2**attempt))
+
+
+class RetryTransport(_RetryPolicy, httpx.BaseTransport):
+    """Transport that retries failed requests on top of another transport.
+
+    Responses with a status in RETRY_STATUS_CODES and network errors are
+    retried up to retries times. The delay before retry n is the response's
+    Retry-After if it has one (capped at HTTP_RETRY_AFTER_MAX), otherwise a
+    random delay between zero and backoff * 2**n, capped at backoff_max.
+    The random "full jitter" keeps clients that failed together from
+    retrying together. The last response or error is returned or raised.
+    """
+
+    def __init__(
+        self,
+        transport=None,
+        retries=None,
+        backoff=None,
+        backoff_max=None,
+        sleep=None,
+    ):
+        super().__init__(retries, backoff, backoff_max)
+        self.transport = transport or httpx.HTTPTransport()
+        self.sleep = sleep or time.sleep
+
+    def handle_request(self, request):
+        attempt = 0
+        while True:
+            can_retry = attempt < self.retries and request.method in RETRY_METHODS
+            try:
+                response = self.transport.handle_request(request)
+            except httpx.TransportError:
+                if not can_retry:
+                    raise
+                self.sleep(self.delay(attempt))
+            else:
+                if not can_retry or response.status_code not in RETRY_STATUS_CODES:
+                    return response
+                delay = self.delay(attempt, response)
+                response.close()
+                self.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncRetryTransport(_RetryPolicy, httpx.AsyncBaseTransport):
+    """RetryTransport for httpx.AsyncClient; sleep must be a coroutine function.
+
+    With an AsyncRateLimiter as limiter, every attempt waits for its turn.
+    """
+
+    def __init__(
+        self,
+        transport=None,
+        retries=None,
+        backoff=None,
+        backoff_max=None,
+        sleep=None,
+        limiter=None,
+    ):
+        super().__init__(retries, backoff, backoff_max)
+        self.transport = transport or httpx.AsyncHTTPTransport()
+        self.sleep = sleep or asyncio.sleep
+        self.limiter = limiter
+
+    async def handle_async_request(self, request):
+        attempt = 0
+        while True:
+            can_retry = attempt < self.retries and request.method in RETRY_METHODS
+            if self.limiter is not None:
+                await self.limiter.wait()
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError:
+                if not can_retry:
+                    raise
+                await self.sleep(self.delay(attempt))
+            else:
+                if not can_retry or response.status_code not in RETRY_STATUS_CODES:
+                    return response
+                delay = self.delay(attempt, response)
+                await response.aclose()
+                await self.sleep(delay)
+            attempt += 1
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class AsyncRateLimiter:
+    """Spaces out the start of concurrent requests to at most rate per second.
+
+    Each wait() reserves the next free slot, so waiters are released in
+    order, 1/rate seconds apart. A rate of None or 0 does not limit.
+    """
+
+    def __init__(self, rate=None, clock=None, sleep=None):
+        self.interval = 1 / rate if rate else 0
+        self.clock = clock or time.monotonic
+        self.sleep = sleep or asyncio.sleep
+        self.next_slot = None
+
+    async def wait(self):
+        if not self.interval:
+            return
+        now = self.clock()
+        slot = now if self.next_slot is None else max(now, self.next_slot)
+        self.next_slot = slot + self.interval
+        if slot > now:
+            await self.sleep(slot - now)
+
+
+class _CachePolicy:
+    """What CachingTransport and AsyncCachingTransport store and for how long.
+
+    Successful GET responses are stored. Each stays fresh, and is returned
+    without a request, for the max-age of its Cache-Control header or else
+    the cache_ttl request extension (in seconds), which defaults to ttl.
+    Stale responses are revalidated with If-None-Match/If-Modified-Since,
+    so an unchanged one costs a round trip but not its body. A request with
+    Cache-Control: no-cache skips the cache but still stores the response;
+    no-store on either side keeps it out of the cache. Bodies are stored
+    as received, before any Content-Encoding is decoded.
+    """
+
+    def __init__(self, cache=None, ttl=0):
+        self.cache = cache or ResponseCache()
+        self.ttl = ttl
+
+    def key(self, request):
+        vary = [request.headers.get(name, "") for name in CACHE_VARY_HEADERS]
+        return self.cache.key(request.method, str(request.url), *vary)
+
+    @staticmethod
+    def cache_control(headers):
+        directives = {}
+        for directive in headers.get("Cache-Control", "").split(","):
+            name, _, value = directive.strip().partition("=")
+            directives[name.lower()] = value.strip('"')
+        return directives
+
+    def lifetime(self, request, response):
+        """Return the seconds response stays fresh, or None to not store it."""
+        directives = self.cache_control(response.headers)
+        if "no-store" in directives or "no-store" in self.cache_control(
+            request.headers
+        ):
+            return None
+        if "no-cache" in directives:
+            return 0
+        try:
+            return max(0, int(directives["max-age"]))
+        except (KeyError, ValueError):
+            return request.extensions.get("cache_ttl", self.ttl)
+
+    def lookup(self, request, key):
+        """Return the cached metadata for request, or None.
+
+        For a stale entry, validators are added to request's headers.
+        """
+        directives = self.cache_control(request.headers)
+        if "no-cache" in directives or "no-store" in directives:
+            return None
+        metadata = self.cache.get_metadata(key)
+        if metadata is not None and not self.is_fresh(metadata):
+            if metadata.get("etag"):
+                request.headers["If-None-Match"] = metadata["etag"]
+            if metadata.get("last_modified"):
+                request.headers["If-Modified-Since"] = metadata["last_modified"]
+        return metadata
+
+    @staticmethod
+    def is_fresh(metadata):
+        return metadata.get("fresh_until", 0) > time.time()
+
+    def metadata_for(self, request, response, previous=None):
+        """Return the metadata to store response under, or None to not store it.
+
+        previous is the metadata of the entry a 304 response revalidated;
+        its headers and validators are kept unless the 304 replaces them.
+        """
+        lifetime = self.lifetime(request, response)
+        if lifetime is None:
+            return None
+        previous = previous or {}
+        headers = previous.get("headers") or [
+            [name, value]
+            for name, value in response.headers.multi_items()
+            if name.lower() not in CACHE_SKIP_HEADERS
+        ]
+        return {
+            "url": str(request.url),
+            "status": 200,
+            "headers": headers,
+            "etag": response.headers.get("ETag") or previous.get("etag"),
+            "last_modified": response.headers.get("Last-Modified")
+            or previous.get("last_modified"),
+            "fresh_until": time.time() + lifetime,
+        }
+
+    @staticmethod
+    def replay(request, metadata, stream=None, content=None):
+        """Return the cached response as an httpx.Response to request."""
+        response = httpx.Response(
+            metadata["status"],
+            headers=metadata["headers"],
+            stream=stream,
+            content=content,
+            request=request,
+        )
+        response.extensions["from_cache"] = True
+        return response
+
+
+class _CachedStream(httpx.SyncByteStream):
+    """Response body read from an open ResponseCache file."""
+
+    def __init__(self, file):
+        self.file = file
+
+    def __iter__(self):
+        while chunk := self.file.read(CACHE_CHUNK_SIZE):
+            yield chunk
+
+    def close(self):
+        self.file.close()
+
+
+class _CachingStream(httpx.SyncByteStream):
+    """Response body passed through to a ResponseWriter as it is read.
+
+    The entry is only stored once the body has been read to the end.
+    """
+
+    def __init__(self, stream, writer):
+        self.stream = stream
+        self.writer = writer
+
+    def __iter__(self):
+        for chunk in self.stream:
+            self.writer.write(chunk)
+            yield chunk
+        self.writer.commit()
+
+    def close(self):
+        self.writer.discard()
+        self.stream.close()
+
+
+class CachingTransport(_CachePolicy, httpx.BaseTransport):
+    """Transport that answers GET requests from a ResponseCache when it can.
+
+    Bodies are streamed to and from the cache files, so responses of any
+    size can be read with httpx.Client.stream().
+    """
+
+    def __init__(self, transport, cache=None, ttl=0):
+        super().__init__(cache, ttl)
+        self.transport = transport
+
+    def handle_request(self, request):
+        if request.method != "GET":
+            return self.transport.handle_request(request)
+        key = self.key(request)
+        metadata = self.lookup(request, key)
+        if metadata is not None and self.is_fresh(metadata):
+            body = self.cache.open(key)
+            if body is not None:
+                return self.replay(request, metadata, stream=_CachedStream(body))
+        response = self.transport.handle_request(request)
+        if metadata is not None and response.status_code == 304:
+            body = self.cache.open(key)
+            if body is not None:
+                response.close()
+                # Still valid: keep the body, refresh how long it stays fresh
+                updated = self.metadata_for(request, response, previous=metadata)
+                if updated is not None:
+                    self.cache.update(key, updated)
+                return self.replay(request, metadata, stream=_CachedStream(body))
+        if response.status_code == 200:
+            metadata = self.metadata_for(request, response)
+            if metadata is not None:
+                writer = self.cache.writer(key, metadata)
+                return httpx.Response(
+                    response.status_code,
+                    headers=response.headers,
+                    stream=_CachingStream(response.stream, writer),
+                    extensions=response.extensions,
+                    request=request,
+                )
+        return response
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncCachingTransport(_CachePolicy, httpx.AsyncBaseTransport):
+    """CachingTransport for httpx.AsyncClient.
+
+    Cache files are accessed in a thread and bodies are read whole, which
+    suits the API responses it is used for.
+    """
+
+    def __init__(self, transport, cache=None, ttl=0):
+        super().__init__(cache, ttl)
+        self.transport = transport
+
+    async def handle_async_request(self, request):
+        if request.method != "GET":
+            return await self.transport.handle_async_request(request)
+        key = self.key(request)
+        metadata = await asyncio.to_thread(self.lookup, request, key)
+        if metadata is not None and self.is_fresh(metadata):
+            entry = await asyncio.to_thread(self.cache.get, key)
+            if entry is not None:
+                return self.replay(request, metadata, content=entry[1])
+        response = await self.transport.handle_async_request(request)
+        if metadata is not None and response.status_code == 304:
+            entry = await asyncio.to_thread(self.cache.get, key)
+            if entry is not None:
+                await response.aclose()
+                updated = self.metadata_for(request, response, previous=metadata)
+                if updated is not None:
+                    await asyncio.to_thread(self.cache.update, key, updated)
+                return self.replay(request, metadata, content=entry[1])
+        if response.status_code == 200:
+            metadata = self.metadata_for(request, response)
+            if metadata is not None:
+                body = b"".join([chunk async for chunk in response.stream])
+                await response.aclose()
+                await asyncio.to_thread(self.cache.set, key, metadata, body)
+                return httpx.Response(
+                    response.status_code,
+                    headers=response.headers,
+                    content=body,
+                    extensions=response.extensions,
+                    request=request,
+                )
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def create_http_client(
+    retries=None,
+    backoff=None,
+    http2=None,
+    transport=None,
+    timeout=HTTP_TIMEOUT,
+    cache=None,
+):
+    """Create an httpx.Client that retries transient failures.
+
+    http2 defaults to whether the optional h2 package is installed. transport
+    replaces the network transport, e.g. with an httpx.MockTransport in tests;
+    retries still apply on top of it. With a ResponseCache as cache, GET
+    responses are cached as described in CachingTransport.
+    """
+    if transport is None:
+        if http2 is None:
+            http2 = http2_available()
+        transport = httpx.HTTPTransport(http2=http2)
+    transport = RetryTransport(transport, retries=retries, backoff=backoff)
+    if cache is not None:
+        transport = CachingTransport(transport, cache)
+    return httpx.Client(transport=transport, timeout=timeout)
+
+
+def create_async_http_client(
+    retries=None,
+    backoff=None,
+    http2=None,
+    transport=None,
+    timeout=HTTP_TIMEOUT,
+    max_connections=None,
+    cache=None,
+    rate=None,
+):
+    """Create an httpx.AsyncClient that retries transient failures.
+
+    Takes the same arguments as create_http_client(); max_connections caps
+    the connections kept open at once and rate the requests sent per second.
+    Responses served from the cache do not count towards the rate.
+    """
+    limits = httpx.Limits(
+        max_connections=max_connections, max_keepalive_connections=max_connections
+    )
+    if transport is None:
+        if http2 is None:
+            http2 = http2_available()
+        transport = httpx.AsyncHTTPTransport(http2=http2, limits=limits)
+    transport = AsyncRetryTransport(
+        transport,
+        retries=retries,
+        backoff=backoff,
+        limiter=AsyncRateLimiter(rate) if rate else None,
+    )
+    if cache is not None:
+        transport = AsyncCachingTransport(transport, cache)
+    return httpx.AsyncClient(transport=transport, timeout=timeout)
+
+
+def get_http_client():
+    """Return the shared HTTP client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = create_http_client(cache=ResponseCache())
+            atexit.register(_client.close)
+        return _client
+
+
+def set_http_client(client):
+    """Replace the shared HTTP client, returning the previous one (or None)."""
+    global _client
+    with _client_lock:
+        previous, _client = _client, client
+    return previous
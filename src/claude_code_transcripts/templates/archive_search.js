@@ -0,0 +1,260 @@
+(function() {
+    // Inverted index written by generate_batch_html() into the archive's search/
+    var searchRoot = {{ search_root|tojson }};
+    var linkRoot = {{ link_root|tojson }};
+    var projectFilter = {{ project_filter|tojson }};
+    var searchBox = document.getElementById('search-box');
+    var searchInput = document.getElementById('search-input');
+    var searchBtn = document.getElementById('search-btn');
+    var modal = document.getElementById('search-modal');
+    var modalInput = document.getElementById('modal-search-input');
+    var modalSearchBtn = document.getElementById('modal-search-btn');
+    var modalCloseBtn = document.getElementById('modal-close-btn');
+    var searchStatus = document.getElementById('search-status');
+    var searchResults = document.getElementById('search-results');
+
+    if (!searchBox || !modal) return;
+
+    // Hide search on file:// protocol (doesn't work due to CORS restrictions)
+    if (window.location.protocol === 'file:') return;
+
+    var archiveIndex = null;
+    var termShards = {};
+    var maxSessionResults = 200;
+    var maxMessageLinks = 5;
+    // Incremented by every search so a superseded search stops adding results
+    var searchGeneration = 0;
+
+    async function loadArchiveIndex() {
+        if (archiveIndex !== null) return archiveIndex;
+        try {
+            var response = await fetch(searchRoot + 'index.json');
+            if (!response.ok) throw new Error('No search index');
+            archiveIndex = await response.json();
+        } catch (e) {
+            archiveIndex = false;
+        }
+        return archiveIndex;
+    }
+
+    // Must match search_terms() in the Python package
+    function searchTerms(text) {
+        var words = text.toLowerCase().match(/[\p{L}\p{N}_]+/gu) || [];
+        var terms = [];
+        words.forEach(function(word) {
+            var length = Array.from(word).length;
+            if (length >= 2 && length <= 64 && terms.indexOf(word) === -1) {
+                terms.push(word);
+            }
+        });
+        return terms;
+    }
+
+    function shardForTerm(index, term) {
+        // Use the longest prefix that has a shard of its own
+        var chars = Array.from(term);
+        for (var length = Math.min(chars.length, index.max_prefix); length >= index.min_prefix; length--) {
+            var prefix = chars.slice(0, length).join('');
+            if (Object.prototype.hasOwnProperty.call(index.shards, prefix)) {
+                return index.shards[prefix];
+            }
+        }
+        return null;
+    }
+
+    async function loadPostings(index, term) {
+        var name = shardForTerm(index, term);
+        if (!name) return [];
+        if (!termShards[name]) {
+            termShards[name] = fetch(searchRoot + name).then(function(response) {
+                if (!response.ok) throw new Error('Failed to fetch ' + name);
+                return response.json();
+            }).catch(function(e) {
+                delete termShards[name];
+                throw e;
+            });
+        }
+        var shard = await termShards[name];
+        return Object.prototype.hasOwnProperty.call(shard.terms, term) ? shard.terms[term] : [];
+    }
+
+    function intersectPostings(lists) {
+        // Start from the rarest term and keep messages containing all the others
+        lists.sort(function(a, b) { return a.length - b.length; });
+        var result = lists[0];
+        for (var i = 1; i < lists.length && result.length; i++) {
+            var keys = new Set(lists[i].map(function(posting) {
+                return posting[0] + '\t' + posting[2];
+            }));
+            result = result.filter(function(posting) {
+                return keys.has(posting[0] + '\t' + posting[2]);
+            });
+        }
+        return result;
+    }
+
+    function pageFile(page) {
+        return 'page-' + String(page).padStart(3, '0') + '.html';
+    }
+
+    function addSessionResult(session, hits) {
+        var sessionUrl = linkRoot + session[0] + '/' + session[1] + '/';
+
+        var header = document.createElement('a');
+        header.href = sessionUrl + 'index.html';
+        var pageDiv = document.createElement('div');
+        pageDiv.className = 'search-result-page';
+        pageDiv.textContent = session[0] + ' · ' + session[3] + ' · ' +
+            hits.length + ' message' + (hits.length !== 1 ? 's' : '');
+        var contentDiv = document.createElement('div');
+        contentDiv.className = 'search-result-content';
+        contentDiv.textContent = session[2];
+        header.appendChild(pageDiv);
+        header.appendChild(contentDiv);
+
+        var resultDiv = document.createElement('div');
+        resultDiv.className = 'search-result';
+        resultDiv.appendChild(header);
+        hits.slice(0, maxMessageLinks).forEach(function(hit) {
+            var link = document.createElement('a');
+            link.href = sessionUrl + pageFile(hit[1]) + '#' + hit[2];
+            var linkDiv = document.createElement('div');
+            linkDiv.className = 'search-result-page';
+            linkDiv.textContent = pageFile(hit[1]) + '#' + hit[2];
+            link.appendChild(linkDiv);
+            resultDiv.appendChild(link);
+        });
+        searchResults.appendChild(resultDiv);
+    }
+
+    function openModal(query) {
+        modalInput.value = query || '';
+        searchResults.innerHTML = '';
+        searchStatus.textContent = '';
+        modal.showModal();
+        modalInput.focus();
+        if (query) {
+            performSearch(query);
+        }
+    }
+
+    function closeModal() {
+        modal.close();
+        if (window.location.hash.startsWith('#search=')) {
+            history.replaceState(null, '', window.location.pathname + window.location.search);
+        }
+    }
+
+    function updateUrlHash(query) {
+        if (query) {
+            history.replaceState(null, '', window.location.pathname + window.location.search + '#search=' + encodeURIComponent(query));
+        }
+    }
+
+    async function performSearch(query) {
+        if (!query.trim()) {
+            searchStatus.textContent = 'Enter a search term';
+            return;
+        }
+
+        updateUrlHash(query);
+        searchResults.innerHTML = '';
+        searchStatus.textContent = 'Searching...';
+        var generation = ++searchGeneration;
+
+        var index = await loadArchiveIndex();
+        if (generation !== searchGeneration) return;
+        if (!index || index.version !== 1) {
+            searchStatus.textContent = 'No search index found for this archive.';
+            return;
+        }
+
+        var common = new Set(index.common_terms);
+        var terms = searchTerms(query).filter(function(term) {
+            return !common.has(term);
+        });
+        if (!terms.length) {
+            searchStatus.textContent = 'Search for words of at least two letters that are not too common';
+            return;
+        }
+
+        var lists;
+        try {
+            lists = await Promise.all(terms.map(function(term) {
+                return loadPostings(index, term);
+            }));
+        } catch (e) {
+            searchStatus.textContent = 'Failed to load the search index.';
+            return;
+        }
+        if (generation !== searchGeneration) return;
+
+        // Group matching messages by session
+        var bySession = new Map();
+        intersectPostings(lists).forEach(function(posting) {
+            var session = index.sessions[posting[0]];
+            if (projectFilter !== null && session[0] !== projectFilter) return;
+            if (!bySession.has(posting[0])) bySession.set(posting[0], []);
+            bySession.get(posting[0]).push(posting);
+        });
+
+        // Most matches first; sessions are listed most recent first within ties
+        var sessionNums = Array.from(bySession.keys()).sort(function(a, b) {
+            return bySession.get(b).length - bySession.get(a).length || a - b;
+        });
+        var totalMessages = 0;
+        sessionNums.forEach(function(sessionNum, i) {
+            var hits = bySession.get(sessionNum);
+            totalMessages += hits.length;
+            if (i < maxSessionResults) {
+                addSessionResult(index.sessions[sessionNum], hits);
+            }
+        });
+
+        var status = 'Found ' + totalMessages + ' message(s) in ' + sessionNums.length + ' session(s)';
+        if (sessionNums.length > maxSessionResults) {
+            status += ' (showing the first ' + maxSessionResults + ')';
+        }
+        searchStatus.textContent = status;
+    }
+
+    // Show search box (progressive enhancement)
+    searchBox.style.display = 'flex';
+
+    searchBtn.addEventListener('click', function() {
+        openModal(searchInput.value);
+    });
+
+    searchInput.addEventListener('keydown', function(e) {
+        if (e.key === 'Enter') {
+            openModal(searchInput.value);
+        }
+    });
+
+    modalSearchBtn.addEventListener('click', function() {
+        performSearch(modalInput.value);
+    });
+
+    modalInput.addEventListener('keydown', function(e) {
+        if (e.key === 'Enter') {
+            performSearch(modalInput.value);
+        }
+    });
+
+    modalCloseBtn.addEventListener('click', closeModal);
+
+    modal.addEventListener('click', function(e) {
+        if (e.target === modal) {
+            closeModal();
+        }
+    });
+
+    // Check for #search= in URL on page load
+    if (window.location.hash.startsWith('#search=')) {
+        var query = decodeURIComponent(window.location.hash.substring(8));
+        if (query) {
+            searchInput.value = query;
+            openModal(query);
+        }
+    }
+})();
@@ -63,6 +63,146 @@
         return pageFile;
     }
 
+    // Prebuilt search index (search-index.json plus search-NNN.json shards)
+    var searchIndex = null;
+    var searchShards = {};
+    var maxIndexResults = 500;
+    // Incremented by every search so a superseded search stops adding results
+    var searchGeneration = 0;
+
+    async function loadSearchIndex() {
+        if (searchIndex !== null) return searchIndex;
+        try {
+            var response = await fetch(getPageFetchUrl('search-index.json'));
+            if (!response.ok) throw new Error('No search index');
+            searchIndex = await response.json();
+        } catch (e) {
+            // No index (older transcripts, gist previews) - scan the pages instead
+            searchIndex = false;
+        }
+        return searchIndex;
+    }
+
+    async function loadShard(name) {
+        if (!searchShards[name]) {
+            var response = await fetch(getPageFetchUrl(name));
+            if (!response.ok) throw new Error('Failed to fetch ' + name);
+            var data = await response.json();
+            searchShards[name] = data.messages.map(function(record) {
+                return {
+                    id: record[0],
+                    page: record[1],
+                    role: record[2],
+                    text: record[3],
+                    lower: foldCase(record[3]).lower
+                };
+            });
+        }
+        return searchShards[name];
+    }
+
+    // Lowercase text one character at a time, recording for each code unit of
+    // the result where its character starts and ends in text. toLowerCase()
+    // can change the length of a string (e.g. 'İ'), so offsets found in the
+    // lowercased text have to be mapped back before slicing the original.
+    function foldCase(text) {
+        var lower = '';
+        var starts = [];
+        var ends = [];
+        for (var i = 0; i < text.length;) {
+            var ch = String.fromCodePoint(text.codePointAt(i));
+            var folded = ch.toLowerCase();
+            for (var j = 0; j < folded.length; j++) {
+                starts.push(i);
+                ends.push(i + ch.length);
+            }
+            lower += folded;
+            i += ch.length;
+        }
+        return {lower: lower, starts: starts, ends: ends};
+    }
+
+    // Return the [start, end) ranges of text matching query, ignoring case
+    function findMatches(text, query) {
+        var folded = foldCase(text);
+        var needle = foldCase(query).lower;
+        var matches = [];
+        if (!needle) return matches;
+        var pos = 0;
+        var idx;
+        while ((idx = folded.lower.indexOf(needle, pos)) !== -1) {
+            matches.push([folded.starts[idx], folded.ends[idx + needle.length - 1]]);
+            pos = idx + needle.length;
+        }
+        return matches;
+    }
+
+    function appendHighlighted(element, text, query) {
+        var pos = 0;
+        findMatches(text, query).forEach(function(match) {
+            element.appendChild(document.createTextNode(text.slice(pos, match[0])));
+            var mark = document.createElement('mark');
+            mark.textContent = text.slice(match[0], match[1]);
+            element.appendChild(mark);
+            pos = match[1];
+        });
+        element.appendChild(document.createTextNode(text.slice(pos)));
+    }
+
+    function addIndexResult(record, query) {
+        var pageFile = 'page-' + String(record.page).padStart(3, '0') + '.html';
+        var match = findMatches(record.text, query)[0] || [0, 0];
+        var start = Math.max(0, match[0] - 80);
+        var end = Math.min(record.text.length, match[1] + 160);
+        var snippet = (start > 0 ? '\u2026' : '') + record.text.slice(start, end) +
+            (end < record.text.length ? '\u2026' : '');
+
+        var link = document.createElement('a');
+        link.href = getPageLinkUrl(pageFile) + '#' + record.id;
+        var pageDiv = document.createElement('div');
+        pageDiv.className = 'search-result-page';
+        pageDiv.textContent = pageFile + ' \u00b7 ' + record.role;
+        var contentDiv = document.createElement('div');
+        contentDiv.className = 'search-result-content';
+        appendHighlighted(contentDiv, snippet, query);
+        link.appendChild(pageDiv);
+        link.appendChild(contentDiv);
+
+        var resultDiv = document.createElement('div');
+        resultDiv.className = 'search-result';
+        resultDiv.appendChild(link);
+        searchResults.appendChild(resultDiv);
+    }
+
+    async function searchWithIndex(index, query, generation) {
+        var needle = foldCase(query).lower;
+        var resultsFound = 0;
+        var totalShards = index.shards.length;
+        for (var i = 0; i < totalShards; i++) {
+            var records;
+            try {
+                records = await loadShard(index.shards[i]);
+            } catch (e) {
+                records = [];
+            }
+            if (generation !== searchGeneration) return;
+            records.forEach(function(record) {
+                if (record.lower.indexOf(needle) !== -1) {
+                    resultsFound++;
+                    if (resultsFound <= maxIndexResults) {
+                        addIndexResult(record, query);
+                    }
+                }
+            });
+            searchStatus.textContent = 'Found ' + resultsFound + ' result(s) in ' + (i + 1) + '/' + totalShards + ' chunks...';
+        }
+        var status = 'Found ' + resultsFound + ' result(s) in ' + index.total_pages + ' pages';
+        if (resultsFound > maxIndexResults) {
+            status += ' (showing the first ' + maxIndexResults + ')';
+        }
+        searchStatus.textContent = status;
+    }
+
     function escapeHtml(text) {
         var div = document.createElement('div');
         div.textContent = text;
@@ -184,6 +324,7 @@
         updateUrlHash(query);
         searchResults.innerHTML = '';
         searchStatus.textContent = 'Searching...';
+        var generation = ++searchGeneration;
 
         // Load gist info if on gistpreview (needed for constructing URLs)
         if (isGistPreview && !gistInfoLoaded) {
@@ -195,6 +336,14 @@
             }
         }
 
+        var index = await loadSearchIndex();
+        if (generation !== searchGeneration) return;
+        if (index && index.version === 1) {
+            await searchWithIndex(index, query, generation);
+            return;
+        }
+
+        // Fallback: fetch every page and scan its messages
         var resultsFound = 0;
         var pagesSearched = 0;
 
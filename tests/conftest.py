@@ -1,7 +1,46 @@
 """Pytest configuration and fixtures for claude-code-transcripts tests."""
 
+import shutil
+from pathlib import Path
+
+import httpx
 import pytest
 
+from claude_code_transcripts.http_client import RetryTransport, set_http_client
+
+
+@pytest.fixture(autouse=True, scope="session")
+def isolated_template_cache(tmp_path_factory):
+    """Compile templates into a temporary bytecode cache for the whole session."""
+    import claude_code_transcripts
+
+    cache_dir = tmp_path_factory.mktemp("templates")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("claude_code_transcripts.cache.TEMPLATE_CACHE_DIR", cache_dir)
+        # Created again on first use, with the patched directory
+        mp.setattr(claude_code_transcripts, "_jinja_env", None)
+        mp.setattr(
+            claude_code_transcripts, "_macros", claude_code_transcripts._Macros()
+        )
+        yield cache_dir
+
+
+@pytest.fixture
+def demo_project(tmp_path):
+    """Create an empty project folder in a temporary projects folder."""
+    project = tmp_path / "projects" / "-home-user-projects-demo"
+    project.mkdir(parents=True)
+    return project
+
+
+@pytest.fixture
+def projects_dir(demo_project):
+    """Create a projects folder holding the sample JSONL session."""
+    shutil.copy(
+        Path(__file__).parent / "sample_session.jsonl", demo_project / "sample.jsonl"
+    )
+    return demo_project.parent
+
 
 @pytest.fixture(autouse=True)
 def mock_webbrowser_open(monkeypatch):
@@ -14,3 +53,59 @@ def mock_webbrowser_open(monkeypatch):
 
     monkeypatch.setattr("claude_code_transcripts.webbrowser.open", mock_open)
     return opened_urls
+
+
+@pytest.fixture(autouse=True)
+def isolated_session_metadata_cache(monkeypatch, tmp_path_factory):
+    """Keep the session metadata cache out of the real home directory."""
+    cache_path = tmp_path_factory.mktemp("cache") / "session-metadata.json"
+    monkeypatch.setattr(
+        "claude_code_transcripts.cache.SESSION_METADATA_PATH", cache_path
+    )
+    return cache_path
+
+
+@pytest.fixture(autouse=True)
+def isolated_response_cache(monkeypatch, tmp_path_factory):
+    """Keep cached HTTP responses out of the real home directory.
+
+    The shared HTTP client is dropped around each test, so the next one
+    created caches its responses in a fresh directory.
+    """
+    cache_dir = tmp_path_factory.mktemp("responses")
+    monkeypatch.setattr("claude_code_transcripts.cache.RESPONSE_CACHE_DIR", cache_dir)
+    previous = set_http_client(None)
+    yield cache_dir
+    client = set_http_client(previous)
+    if client is not None:
+        client.close()
+
+
+@pytest.fixture
+def mock_http_client():
+    """Install a shared HTTP client whose requests go to a handler function.
+
+    Call the fixture with handler(request) -> httpx.Response; it returns the
+    list the requests are recorded in. Retries apply, without the delays.
+    """
+    clients = []
+
+    def install(handler):
+        requests = []
+
+        def record(request):
+            requests.append(request)
+            return handler(request)
+
+        client = httpx.Client(
+            transport=RetryTransport(
+                httpx.MockTransport(record), sleep=lambda seconds: None
+            )
+        )
+        clients.append((client, set_http_client(client)))
+        return requests
+
+    yield install
+    for client, previous in reversed(clients):
+        set_http_client(previous)
+        client.close()
@@ -0,0 +1,272 @@
+"""Tests for the on-disk caches: session metadata, build manifest and templates."""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from jinja2 import Environment, PackageLoader
+
+from claude_code_transcripts import (
+    find_all_sessions,
+    find_local_sessions,
+    get_session_metadata,
+    get_session_summary,
+    get_template,
+)
+from claude_code_transcripts.cache import (
+    BuildManifest,
+    SessionMetadataCache,
+    template_bytecode_cache,
+)
+
+
+@pytest.fixture
+def projects_dir(demo_project):
+    """Create a projects folder with a single small session."""
+    (demo_project / "abc.jsonl").write_text(
+        '{"type": "user", "timestamp": "2025-01-01T10:00:00.000Z", "message": {"role": "user", "content": "Hello cache"}}\n'
+        '{"type": "assistant", "timestamp": "2025-01-01T10:00:05.000Z", "message": {"role": "assistant", "content": [{"type": "tool_use", "name": "Bash", "id": "1", "input": {}}]}}\n'
+    )
+    return demo_project.parent
+
+
+class TestGetSessionMetadata:
+    """Tests for get_session_metadata."""
+
+    def test_collects_metadata(self, projects_dir):
+        """Test that summary, timestamps and counts are extracted."""
+        session = next(projects_dir.glob("**/abc.jsonl"))
+        metadata = get_session_metadata(session)
+
+        assert metadata["summary"] == "Hello cache"
+        assert metadata["first_timestamp"] == "2025-01-01T10:00:00.000Z"
+        assert metadata["last_timestamp"] == "2025-01-01T10:00:05.000Z"
+        assert metadata["message_count"] == 2
+        assert metadata["tool_counts"] == {"Bash": 1}
+        assert metadata["size"] == session.stat().st_size
+
+    def test_unchanged_file_is_not_reopened(self, projects_dir, tmp_path, monkeypatch):
+        """Test that a cache hit never opens the session file."""
+        session = next(projects_dir.glob("**/abc.jsonl"))
+        cache_path = tmp_path / "metadata.json"
+        cache = SessionMetadataCache(cache_path)
+        get_session_metadata(session, cache)
+        cache.save()
+
+        def fail(*args, **kwargs):
+            raise AssertionError("session file should not be reopened")
+
+        monkeypatch.setattr("claude_code_transcripts.get_session_summary", fail)
+        monkeypatch.setattr("claude_code_transcripts.load_session_loglines", fail)
+        monkeypatch.setattr("claude_code_transcripts._scan_jsonl_metadata", fail)
+
+        metadata = get_session_metadata(session, SessionMetadataCache(cache_path))
+        assert metadata["summary"] == "Hello cache"
+
+    def test_modified_file_is_rescanned(self, projects_dir, tmp_path):
+        """Test that a change in size or mtime invalidates the cached entry."""
+        session = next(projects_dir.glob("**/abc.jsonl"))
+        cache = SessionMetadataCache(tmp_path / "metadata.json")
+        get_session_metadata(session, cache)
+
+        session.write_text(
+            '{"type": "summary", "summary": "Renamed session"}\n' + session.read_text()
+        )
+        os.utime(session, (1, 1))
+
+        assert get_session_metadata(session, cache)["summary"] == "Renamed session"
+
+    def test_session_file_is_read_once(self, projects_dir, monkeypatch):
+        """Test that summary and counts come from a single pass over the file."""
+        session = next(projects_dir.glob("**/abc.jsonl"))
+        session.write_text(
+            session.read_text()
+            + '{"type": "summary", "summary": "Late summary"}\n'
+            + '{"type": "user", "isMeta": true, "message": {"content": "Meta"}}\n'
+        )
+        opened = []
+        real_open = open
+
+        def counting_open(file, *args, **kwargs):
+            opened.append(file)
+            return real_open(file, *args, **kwargs)
+
+        monkeypatch.setattr("builtins.open", counting_open)
+        metadata = get_session_metadata(session)
+
+        assert opened == [session]
+        assert metadata["summary"] == "Late summary"
+        assert metadata["message_count"] == 3
+        assert metadata["tool_counts"] == {"Bash": 1}
+
+    def test_summary_matches_bounded_scan(self, tmp_path):
+        """Test that the full scan picks the summary the picker's scan picks."""
+        session = tmp_path / "long.jsonl"
+        padding = '{"type":"assistant","message":{"content":"%s"}}\n' % ("x" * 1000)
+        session.write_text(
+            '{"type":"user","message":{"role":"user","content":"Early prompt"}}\n'
+            + padding * 300
+            + '{"type":"summary","summary":"Late summary"}\n'
+        )
+
+        full = get_session_metadata(session)
+        assert full["summary"] == get_session_summary(session) == "Early prompt"
+        assert full["message_count"] == 301
+
+    def test_summary_only(self, projects_dir, tmp_path, monkeypatch):
+        """Test that counts=False reads the head of the file only, and is cached."""
+        session = next(projects_dir.glob("**/abc.jsonl"))
+        cache = SessionMetadataCache(tmp_path / "metadata.json")
+
+        def fail(*args, **kwargs):
+            raise AssertionError("the whole session should not be read")
+
+        with monkeypatch.context() as m:
+            m.setattr("claude_code_transcripts._scan_jsonl_metadata", fail)
+            metadata = get_session_metadata(session, cache, counts=False)
+        assert metadata["summary"] == "Hello cache"
+        assert "message_count" not in metadata
+
+        # Callers that need the counts do not take the summary-only entry
+        assert get_session_metadata(session, cache)["message_count"] == 2
+        assert get_session_metadata(session, cache, counts=False)["message_count"] == 2
+
+
+class TestSessionMetadataCache:
+    """Tests for SessionMetadataCache persistence."""
+
+    def test_find_all_sessions_writes_cache(
+        self, projects_dir, isolated_session_metadata_cache
+    ):
+        """Test that scanning sessions persists their metadata."""
+        find_all_sessions(projects_dir)
+
+        data = json.loads(isolated_session_metadata_cache.read_text())
+        assert len(data["sessions"]) == 1
+        entry = next(iter(data["sessions"].values()))
+        assert entry["summary"] == "Hello cache"
+
+    def test_use_cache_false_skips_cache(
+        self, projects_dir, isolated_session_metadata_cache
+    ):
+        """Test that use_cache=False neither reads nor writes the cache."""
+        find_local_sessions(projects_dir, use_cache=False)
+        assert not isolated_session_metadata_cache.exists()
+
+    def test_stale_entries_are_pruned(
+        self, projects_dir, isolated_session_metadata_cache
+    ):
+        """Test that entries for deleted sessions are removed on the next scan."""
+        session = next(projects_dir.glob("**/abc.jsonl"))
+        other = session.with_name("def.jsonl")
+        other.write_text(session.read_text())
+        find_all_sessions(projects_dir)
+        other.unlink()
+
+        find_all_sessions(projects_dir)
+
+        data = json.loads(isolated_session_metadata_cache.read_text())
+        assert list(data["sessions"]) == [os.path.abspath(session)]
+
+    def test_prune_keeps_entries_outside_folder(self, tmp_path):
+        """Test that pruning one folder leaves other folders' entries alone."""
+        cache = SessionMetadataCache(tmp_path / "metadata.json")
+        cache.entries = {
+            os.path.abspath(tmp_path / "a" / "one.jsonl"): {},
+            os.path.abspath(tmp_path / "b" / "two.jsonl"): {},
+        }
+
+        cache.prune(tmp_path / "a")
+
+        assert list(cache.entries) == [os.path.abspath(tmp_path / "b" / "two.jsonl")]
+
+    def test_corrupt_cache_is_ignored(self, tmp_path):
+        """Test that an unreadable cache file starts an empty cache."""
+        cache_path = tmp_path / "metadata.json"
+        cache_path.write_text("{not json")
+        assert SessionMetadataCache(cache_path).entries == {}
+
+
+class TestBuildManifest:
+    """Tests for the archive build manifest."""
+
+    def test_corrupt_manifest_is_ignored(self, tmp_path):
+        (tmp_path / ".build-manifest.json").write_text("{not json")
+        assert BuildManifest(tmp_path).entries == {}
+
+    def test_round_trip(self, tmp_path):
+        source = tmp_path / "session.jsonl"
+        source.write_text("{}\n")
+        (tmp_path / "archive" / "proj" / "session").mkdir(parents=True)
+        (tmp_path / "archive" / "proj" / "session" / "index.html").write_text("")
+        stat = source.stat()
+
+        manifest = BuildManifest(tmp_path / "archive")
+        manifest.record(
+            source, stat.st_mtime, stat.st_size, "abc", "proj/session", "proj", "t", "1"
+        )
+        manifest.save()
+
+        reloaded = BuildManifest(tmp_path / "archive")
+        assert reloaded.is_current(
+            source, stat.st_mtime, stat.st_size, "proj/session", "t", "1"
+        )
+        assert not reloaded.is_current(
+            source, stat.st_mtime, stat.st_size, "proj/session", "t", "2"
+        )
+
+    def test_remove_missing_stays_inside_archive(self, tmp_path):
+        outside = tmp_path / "outside"
+        outside.mkdir()
+        manifest = BuildManifest(tmp_path / "archive")
+        manifest.entries["/gone.jsonl"] = {"output": "../outside", "project": "p"}
+
+        removed = manifest.remove_missing([])
+
+        assert len(removed) == 1
+        assert outside.exists()
+        assert manifest.entries == {}
+
+
+def compile_templates(bytecode_cache):
+    env = Environment(
+        loader=PackageLoader("claude_code_transcripts", "templates"),
+        autoescape=True,
+        bytecode_cache=bytecode_cache,
+    )
+    env.get_template("macros.html")
+
+
+class TestTemplateBytecodeCache:
+    """Tests for template_bytecode_cache."""
+
+    def test_shared_environment_uses_cache(self, isolated_template_cache):
+        get_template("page.html")
+        assert list(isolated_template_cache.glob("*.cache"))
+
+    def test_keyed_on_versions(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            "claude_code_transcripts.cache.get_tool_version", lambda: "1.0"
+        )
+        compile_templates(template_bytecode_cache(tmp_path))
+        old_files = list(tmp_path.glob("*.cache"))
+        assert old_files
+        assert all(path.name.startswith("1.0-jinja") for path in old_files)
+
+        # Upgrading drops bytecode compiled by the previous release
+        monkeypatch.setattr(
+            "claude_code_transcripts.cache.get_tool_version", lambda: "1.1"
+        )
+        bytecode_cache = template_bytecode_cache(tmp_path)
+        assert not any(path.exists() for path in old_files)
+        compile_templates(bytecode_cache)
+        assert all(
+            path.name.startswith("1.1-jinja") for path in tmp_path.glob("*.cache")
+        )
+
+    def test_unusable_directory(self, tmp_path):
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+        assert template_bytecode_cache(blocker / "templates") is None
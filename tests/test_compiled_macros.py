@@ -0,0 +1,165 @@
+"""Tests that the compiled macros render exactly what macros.html does."""
+
+from pathlib import Path
+
+import click
+import pytest
+from click.testing import CliRunner
+from markupsafe import Markup
+
+import claude_code_transcripts
+from claude_code_transcripts import MACRO_BACKEND_ENV, _Macros, cli, generate_html
+from claude_code_transcripts.compiled_macros import MACROS
+
+TRICKY = "<script>alert('x & \"y\"')</script>"
+HTML = Markup("<p>Already <b>escaped</b> &amp; safe</p>")
+
+CASES = [
+    ("todo_list", ([], "t1")),
+    (
+        "todo_list",
+        (
+            [
+                {"status": "completed", "content": TRICKY},
+                {"status": "in_progress", "content": "Working"},
+                {"status": None, "content": None},
+                {"content": "No status"},
+                {"status": "pending"},
+                "not a todo",
+            ],
+            TRICKY,
+        ),
+    ),
+    ("write_tool", ("src/<app>.py", TRICKY, "t2")),
+    ("write_tool", ("README.md", "", "t3")),
+    ("edit_tool", ("/a/b/c.py", TRICKY, HTML, True, "t4")),
+    ("edit_tool", ("c.py", "old", "new", False, TRICKY)),
+    ("bash_tool", (TRICKY, "List <files>", "t5")),
+    ("bash_tool", ("ls", "", "t6")),
+    ("bash_tool", ("ls", None, "t6")),
+    ("read_tool", ("c.py", "/a/c.py", " (lines 1-10)", "t7")),
+    ("read_tool", (TRICKY, TRICKY, "", "t7")),
+    ("grep_tool", (TRICKY, "src", "t8")),
+    ("grep_tool", ("TODO", "", "t8")),
+    ("glob_tool", ("**/*.py", TRICKY, "t9")),
+    ("glob_tool", ("**/*.py", None, "t9")),
+    ("task_tool", (TRICKY, TRICKY, "Explore", "t10")),
+    ("task_tool", ("Look around", "prompt", "", "t10")),
+    ("ask_user_question", ([], "t11")),
+    (
+        "ask_user_question",
+        (
+            [
+                {
+                    "header": TRICKY,
+                    "question": "Which?",
+                    "options": [
+                        {"label": "A", "description": TRICKY},
+                        {"label": "B"},
+                        "C",
+                    ],
+                },
+                {"question": "Free text?", "options": []},
+                "not a question",
+            ],
+            "t11",
+        ),
+    ),
+    ("simple_tool", ("📋", TRICKY, "t12")),
+    ("tool_use", (TRICKY, TRICKY, '{"a": "<b>"}', "t13")),
+    ("tool_use", ("Tool", "", "{}", "t13")),
+    ("tool_result", (HTML, True)),
+    ("tool_result", (HTML, False, True)),
+    ("tool_result", ("", None, False)),
+    ("thinking", (HTML,)),
+    ("assistant_text", (HTML,)),
+    ("assistant_text", ("",)),
+    ("user_content", (HTML,)),
+    ("image_block", ("image/png", "iVBOR<w0>")),
+    ("image_file_block", ('assets/a "b".png',)),
+    ("commit_card", ("abcdef1234", TRICKY, "owner/repo")),
+    ("commit_card", ("abcdef1234", "Fix it", None)),
+    ("commit_card", ("abc", "Short", "<owner>/repo")),
+    ("message", ("user", "User", "msg-1", "2025-01-01T00:00:00Z", HTML)),
+    ("message", (TRICKY, TRICKY, TRICKY, TRICKY, "")),
+    ("continuation", (HTML,)),
+    ("index_item", (3, "page-001.html#msg-1", "2025-01-01", HTML, HTML)),
+    ("index_item", (TRICKY, TRICKY, TRICKY, "", "")),
+    ("index_commit", ("abcdef1234", TRICKY, "2025-01-01", "owner/repo")),
+    ("index_commit", ("abcdef1234", "Fix it", "2025-01-01", "")),
+    ("index_stats", ("3 bash · 1 edit", HTML)),
+    ("index_stats", ("", HTML)),
+    ("index_stats", (TRICKY, "")),
+    ("index_stats", ("", "")),
+    ("index_long_text", (HTML,)),
+]
+
+
+@pytest.fixture
+def jinja_macros():
+    return _Macros("jinja")
+
+
+class TestCompiledMacros:
+    """Tests for the compiled macros against the macros.html reference."""
+
+    @pytest.mark.parametrize("name,args", CASES)
+    def test_matches_jinja_macro(self, jinja_macros, name, args):
+        expected = getattr(jinja_macros, name)(*args)
+        rendered = MACROS[name](*args)
+        assert isinstance(rendered, Markup)
+        assert rendered == expected
+
+    def test_every_compiled_macro_is_tested(self):
+        assert set(MACROS) == {name for name, _ in CASES}
+
+    def test_uses_jinja_macros_by_default(self, monkeypatch):
+        monkeypatch.delenv(MACRO_BACKEND_ENV, raising=False)
+        macros = _Macros()
+        assert macros.bash_tool is not MACROS["bash_tool"]
+        assert macros.backend == "jinja"
+
+    def test_compiled_backend_from_environment(self, monkeypatch):
+        monkeypatch.setenv(MACRO_BACKEND_ENV, "compiled")
+        macros = _Macros()
+        assert macros.bash_tool is MACROS["bash_tool"]
+        # Macros without a compiled version come from the template
+        assert macros.pagination is not None
+        assert "pagination" not in MACROS
+
+    def test_explicit_backend_overrides_environment(self, monkeypatch):
+        monkeypatch.setenv(MACRO_BACKEND_ENV, "compiled")
+        assert _Macros("jinja").bash_tool is not MACROS["bash_tool"]
+
+    def test_unknown_backend(self, monkeypatch):
+        with pytest.raises(ValueError):
+            _Macros("mako")
+        monkeypatch.setenv(MACRO_BACKEND_ENV, "mako")
+        with pytest.raises(click.ClickException, match=MACRO_BACKEND_ENV):
+            _Macros().bash_tool
+
+    def test_cli_uses_compiled_backend_from_environment(self, monkeypatch, tmp_path):
+        session_path = Path(__file__).parent / "sample_session.json"
+        monkeypatch.setattr(claude_code_transcripts, "_macros", _Macros())
+        result = CliRunner().invoke(
+            cli,
+            ["json", str(session_path), "-o", str(tmp_path / "out")],
+            env={MACRO_BACKEND_ENV: "compiled"},
+        )
+        assert result.exit_code == 0, result.output
+        assert claude_code_transcripts._macros.backend == "compiled"
+        assert (tmp_path / "out" / "index.html").exists()
+
+    @pytest.mark.parametrize("session", ["sample_session.json", "sample_session.jsonl"])
+    def test_sessions_render_identically(self, monkeypatch, tmp_path, session):
+        session_path = Path(__file__).parent / session
+        outputs = {}
+        for backend in ["compiled", "jinja"]:
+            monkeypatch.setattr(claude_code_transcripts, "_macros", _Macros(backend))
+            generate_html(session_path, tmp_path / backend)
+            outputs[backend] = {
+                path.name: path.read_text()
+                for path in sorted((tmp_path / backend).glob("*.html"))
+            }
+        assert len(outputs["compiled"]) > 1
+        assert outputs["compiled"] == outputs["jinja"]
@@ -1,5 +1,6 @@
 """Tests for HTML generation from Claude Code session JSON."""
 
+import base64
 import json
 import tempfile
 from pathlib import Path
@@ -9,8 +10,13 @@ from syrupy.extensions.single_file import SingleFileSnapshotExtension, WriteMode
 
 from claude_code_transcripts import (
     generate_html,
+    generate_html_from_session_data,
+    TranscriptRenderer,
+    PaginationPolicy,
     detect_github_repo,
     render_markdown_text,
+    markdown_cache_info,
+    clear_markdown_cache,
     format_json,
     is_json_like,
     render_todo_write,
@@ -19,15 +25,25 @@ from claude_code_transcripts import (
     render_bash_tool,
     render_content_block,
     analyze_conversation,
+    analyze_conversation_data,
+    merge_conversation_stats,
+    render_message,
+    render_message_data,
     format_tool_stats,
+    generate_pagination_html,
+    generate_index_pagination_html,
+    pagination_window,
     is_tool_result_message,
     inject_gist_preview_js,
     create_gist,
     GIST_PREVIEW_JS,
     parse_session_file,
+    load_session_loglines,
+    iter_conversations,
     get_session_summary,
     find_local_sessions,
 )
+from claude_code_transcripts.theme import DEFAULT_THEME
 
 
 class HTMLSnapshotExtension(SingleFileSnapshotExtension):
@@ -131,6 +147,49 @@ class TestRenderFunctions:
         assert render_markdown_text("") == ""
         assert render_markdown_text(None) == ""
 
+    def test_render_markdown_text_matches_markdown_module(self):
+        """Test the reused Markdown instance renders like a fresh one."""
+        import markdown
+
+        texts = [
+            "```python\nprint('hi')\n```",
+            "| a | b |\n|---|---|\n| 1 | 2 |",
+            "Plain <b>html</b> & text",
+        ]
+        clear_markdown_cache()
+        for text in texts:
+            assert render_markdown_text(text) == markdown.markdown(
+                text, extensions=["fenced_code", "tables"]
+            )
+
+    def test_render_markdown_text_cache_hits(self):
+        """Test repeated text is served from the cache and counted."""
+        clear_markdown_cache()
+        first = render_markdown_text("Repeated *prompt*")
+        second = render_markdown_text("Repeated *prompt*")
+        render_markdown_text("Another prompt")
+
+        assert first == second
+        info = markdown_cache_info()
+        assert info["hits"] == 1
+        assert info["misses"] == 2
+        assert info["size"] == 2
+
+    def test_render_markdown_text_cache_is_bounded(self, monkeypatch):
+        """Test the least recently used entries are evicted."""
+        monkeypatch.setattr("claude_code_transcripts.MARKDOWN_CACHE_SIZE", 2)
+        clear_markdown_cache()
+        render_markdown_text("one")
+        render_markdown_text("two")
+        render_markdown_text("one")
+        render_markdown_text("three")
+
+        assert markdown_cache_info()["size"] == 2
+        render_markdown_text("one")
+        assert markdown_cache_info()["hits"] == 2
+        render_markdown_text("two")
+        assert markdown_cache_info()["misses"] == 4
+
     def test_format_json(self, snapshot_html):
         """Test JSON formatting."""
         result = format_json({"key": "value", "number": 42, "nested": {"a": 1}})
@@ -430,6 +489,76 @@ class TestAnalyzeConversation:
         assert "Add new feature" in result["commits"][0][1]
 
 
+class TestDictNativeMessages:
+    """Tests for the dict-based render and analysis functions."""
+
+    message = {
+        "role": "assistant",
+        "content": [
+            {"type": "text", "text": "Running the tests"},
+            {"type": "tool_use", "name": "Bash", "id": "1", "input": {}},
+        ],
+    }
+
+    def test_render_message_data_matches_string_api(self):
+        """Test that render_message is a thin wrapper over render_message_data."""
+        timestamp = "2025-01-01T00:00:00Z"
+        from_dict = render_message_data("assistant", self.message, timestamp)
+        from_json = render_message("assistant", json.dumps(self.message), timestamp)
+
+        assert "Running the tests" in from_dict
+        assert from_dict == from_json
+
+    def test_render_message_data_empty(self):
+        """Test that empty messages render to nothing."""
+        assert render_message_data("assistant", {}, "2025-01-01T00:00:00Z") == ""
+
+    def test_analyze_conversation_data_matches_string_api(self):
+        """Test that analyze_conversation gives the same result for JSON strings."""
+        messages = [("assistant", self.message, "2025-01-01T00:00:00Z")]
+        json_messages = [
+            (log_type, json.dumps(data), ts) for log_type, data, ts in messages
+        ]
+
+        result = analyze_conversation_data(messages)
+        assert result["tool_counts"] == {"Bash": 1}
+        assert result == analyze_conversation(json_messages)
+
+    def test_analyze_conversation_skips_invalid_json(self):
+        """Test that the string API still ignores undecodable messages."""
+        result = analyze_conversation([("assistant", "not json", "ts")])
+        assert result["tool_counts"] == {}
+
+
+class TestMergeConversationStats:
+    """Tests for merging per-conversation stats."""
+
+    def test_merges_counts_texts_and_commits(self):
+        first = {
+            "tool_counts": {"Bash": 2, "Read": 1},
+            "long_texts": ["first"],
+            "commits": [("abc1234", "One", "2025-01-01T10:00:00Z")],
+        }
+        second = {
+            "tool_counts": {"Bash": 1},
+            "long_texts": ["second"],
+            "commits": [("def5678", "Two", "2025-01-01T11:00:00Z")],
+        }
+        merged = merge_conversation_stats([first, second])
+        assert merged["tool_counts"] == {"Bash": 3, "Read": 1}
+        assert merged["long_texts"] == ["first", "second"]
+        assert [c[0] for c in merged["commits"]] == ["abc1234", "def5678"]
+        # Inputs are left untouched
+        assert first["tool_counts"] == {"Bash": 2, "Read": 1}
+
+    def test_empty(self):
+        assert merge_conversation_stats([]) == {
+            "tool_counts": {},
+            "long_texts": [],
+            "commits": [],
+        }
+
+
 class TestFormatToolStats:
     """Tests for tool stats formatting."""
 
@@ -446,6 +575,85 @@ class TestFormatToolStats:
         assert format_tool_stats({}) == ""
 
 
+class TestWindowedPagination:
+    """Tests for windowed pagination links."""
+
+    def test_small_sessions_link_every_page(self):
+        assert pagination_window(2, 5) is None
+        html = generate_pagination_html(2, 5)
+        for page in range(1, 6):
+            assert f">{page}<" in html
+        assert "page-jump" not in html
+
+    def test_window_around_current_page(self):
+        assert pagination_window(50, 100) == [
+            1,
+            None,
+            47,
+            48,
+            49,
+            50,
+            51,
+            52,
+            53,
+            None,
+            100,
+        ]
+        assert pagination_window(50, 100, window=1) == [1, None, 49, 50, 51, None, 100]
+
+    def test_window_at_edges(self):
+        assert pagination_window(1, 20) == [1, 2, 3, 4, 5, 6, 7, None, 20]
+        assert pagination_window(20, 20) == [1, None, 14, 15, 16, 17, 18, 19, 20]
+        assert pagination_window(3, 20, window=1) == [1, 2, 3, 4, None, 20]
+
+    def test_window_none_links_every_page(self):
+        assert pagination_window(50, 100, window=None) is None
+        html = generate_pagination_html(50, 100, window=None)
+        # 99 other pages plus prev and next
+        assert html.count('href="page-') == 101
+
+    def test_windowed_html_has_ellipsis_and_jump(self):
+        html = generate_pagination_html(50, 100)
+        assert '<span class="current">50</span>' in html
+        assert 'href="page-001.html"' in html
+        assert 'href="page-100.html"' in html
+        assert 'href="page-049.html">&larr; Prev' in html
+        assert 'href="page-051.html">Next &rarr;' in html
+        assert "page-020.html" not in html
+        assert html.count("&hellip;") == 2
+        assert 'class="page-jump"' in html
+        assert 'max="100"' in html
+
+    def test_windowed_index_pagination(self):
+        html = generate_index_pagination_html(100)
+        assert 'href="page-001.html"' in html
+        assert 'href="page-100.html"' in html
+        assert "page-050.html" not in html
+        assert 'class="page-jump"' in html
+
+    def test_pagination_size_is_linear_in_page_count(self):
+        """Benchmark: total pagination markup across all pages of a session.
+
+        Linking every page from every page grows quadratically; the windowed
+        markup is the same size on every page, so the total grows linearly.
+        """
+
+        def total_bytes(total_pages, window):
+            return sum(
+                len(generate_pagination_html(page, total_pages, window=window))
+                for page in range(1, total_pages + 1)
+            )
+
+        full_400 = total_bytes(400, None)
+        windowed_100 = total_bytes(100, 3)
+        windowed_400 = total_bytes(400, 3)
+
+        # Four times the pages costs about four times the bytes
+        assert windowed_400 < 4.5 * windowed_100
+        # ...and is a small fraction of linking every page
+        assert windowed_400 * 10 < full_400
+
+
 class TestIsToolResultMessage:
     """Tests for tool result message detection."""
 
@@ -833,6 +1041,53 @@ class TestContinuationLongTexts:
         ), "Long text from continuation conversation should appear in index"
         assert "Redis JavaScript Module" in index_html
 
+    def test_each_conversation_analyzed_once(self, output_dir, monkeypatch):
+        """Test that long continuation chains are analysed in linear time."""
+        import claude_code_transcripts
+
+        loglines = [
+            {
+                "type": "user",
+                "timestamp": "2025-01-01T10:00:00.000Z",
+                "message": {"content": "Start a long task", "role": "user"},
+            }
+        ]
+        for i in range(30):
+            loglines.append(
+                {
+                    "type": "user",
+                    "timestamp": f"2025-01-01T11:{i:02d}:00.000Z",
+                    "isCompactSummary": True,
+                    "message": {"content": f"Continued {i}", "role": "user"},
+                }
+            )
+            loglines.append(
+                {
+                    "type": "assistant",
+                    "timestamp": f"2025-01-01T11:{i:02d}:05.000Z",
+                    "message": {
+                        "role": "assistant",
+                        "content": [{"type": "tool_use", "name": "Bash", "id": str(i)}],
+                    },
+                }
+            )
+
+        calls = []
+        original = claude_code_transcripts.analyze_conversation_data
+
+        def counting_analyze(messages):
+            calls.append(len(messages))
+            return original(messages)
+
+        monkeypatch.setattr(
+            claude_code_transcripts, "analyze_conversation_data", counting_analyze
+        )
+        generate_html_from_session_data({"loglines": loglines}, output_dir)
+
+        assert len(calls) == 31
+        index_html = (output_dir / "index.html").read_text(encoding="utf-8")
+        assert "30 bash" in index_html
+
 
 class TestSessionJsonOption:
     """Tests for the session command --json option."""
@@ -1143,6 +1398,604 @@ class TestParseSessionFile:
         assert index_html == snapshot_html
 
 
+class TestStreamingGeneration:
+    """Tests for the streaming parse -> group -> page pipeline."""
+
+    def test_load_session_loglines_jsonl_is_reiterable(self):
+        """Test that JSONL loglines are streamed from disk on each iteration."""
+        fixture_path = Path(__file__).parent / "sample_session.jsonl"
+        loglines = load_session_loglines(fixture_path)
+
+        assert not isinstance(loglines, list)
+        first_pass = list(loglines)
+        assert first_pass == list(loglines)
+        assert first_pass == parse_session_file(fixture_path)["loglines"]
+
+    def test_iter_conversations_is_lazy(self):
+        """Test that conversations are yielded before the input is exhausted."""
+        consumed = []
+
+        def loglines():
+            for i in range(3):
+                consumed.append(i)
+                yield {
+                    "type": "user",
+                    "timestamp": f"2025-01-01T10:0{i}:00.000Z",
+                    "message": {"role": "user", "content": f"Prompt {i}"},
+                }
+
+        conversations = iter_conversations(loglines())
+        first = next(conversations)
+
+        assert first["user_text"] == "Prompt 0"
+        # Only the entry that closed the first conversation has been read
+        assert consumed == [0, 1]
+
+    def test_generate_html_does_not_materialise_jsonl(self, output_dir, monkeypatch):
+        """Test that JSONL sessions are rendered without building the loglines list."""
+
+        def fail(*args, **kwargs):
+            raise AssertionError("loglines should be streamed, not materialised")
+
+        monkeypatch.setattr("claude_code_transcripts._parse_jsonl_file", fail)
+        fixture_path = Path(__file__).parent / "sample_session.jsonl"
+        generate_html(fixture_path, output_dir)
+
+        assert (output_dir / "index.html").exists()
+        assert (output_dir / "page-001.html").exists()
+
+    def test_pages_match_prompts_per_page(self, tmp_path):
+        """Test that streamed pages hold PROMPTS_PER_PAGE conversations each."""
+        jsonl_file = tmp_path / "session.jsonl"
+        lines = [
+            json.dumps(
+                {
+                    "type": "user",
+                    "timestamp": f"2025-01-01T10:{i:02d}:00.000Z",
+                    "message": {"role": "user", "content": f"Prompt {i}"},
+                }
+            )
+            for i in range(12)
+        ]
+        jsonl_file.write_text("\n".join(lines) + "\n")
+
+        output_dir = tmp_path / "output"
+        generate_html(jsonl_file, output_dir)
+
+        assert sorted(p.name for p in output_dir.glob("page-*.html")) == [
+            "page-001.html",
+            "page-002.html",
+            "page-003.html",
+        ]
+        page_3 = (output_dir / "page-003.html").read_text(encoding="utf-8")
+        assert "page 3/3" in page_3
+        assert "Prompt 10" in page_3
+        assert "Prompt 9" not in page_3
+        index_html = (output_dir / "index.html").read_text(encoding="utf-8")
+        assert "12 prompts" in index_html
+
+    def prompt_lines(self, start, stop):
+        return "".join(
+            json.dumps(
+                {
+                    "type": "user",
+                    "timestamp": f"2025-01-01T10:{i:02d}:00.000Z",
+                    "message": {"role": "user", "content": f"Prompt {i}"},
+                }
+            )
+            + "\n"
+            for i in range(start, stop)
+        )
+
+    def test_passes_stop_where_the_first_ended(self, tmp_path):
+        """Test that lines appended after the first pass are not read later."""
+        jsonl_file = tmp_path / "session.jsonl"
+        jsonl_file.write_text(self.prompt_lines(0, 3))
+        loglines = load_session_loglines(jsonl_file)
+
+        first_pass = list(loglines)
+        with open(jsonl_file, "a") as f:
+            f.write(self.prompt_lines(3, 5))
+
+        assert len(first_pass) == 3
+        assert list(loglines) == first_pass
+        assert len(list(load_session_loglines(jsonl_file))) == 5
+
+    def test_lines_appended_after_prescan_are_ignored(self, tmp_path, monkeypatch):
+        """Test that every pass stops where the session ended when rendering began."""
+        import claude_code_transcripts
+
+        jsonl_file = tmp_path / "session.jsonl"
+        jsonl_file.write_text(self.prompt_lines(0, 5))
+        prescan = claude_code_transcripts._prescan_loglines
+
+        def prescan_then_append(*args, **kwargs):
+            result = prescan(*args, **kwargs)
+            reply = {
+                "type": "assistant",
+                "timestamp": "2025-01-01T10:04:30.000Z",
+                "message": {
+                    "role": "assistant",
+                    "content": [{"type": "text", "text": "Late reply"}],
+                },
+            }
+            with open(jsonl_file, "a") as f:
+                f.write(json.dumps(reply) + "\n" + self.prompt_lines(5, 12))
+            return result
+
+        monkeypatch.setattr(
+            "claude_code_transcripts._prescan_loglines", prescan_then_append
+        )
+        output_dir = tmp_path / "output"
+        generate_html(jsonl_file, output_dir)
+
+        assert [p.name for p in output_dir.glob("page-*.html")] == ["page-001.html"]
+        page_1 = (output_dir / "page-001.html").read_text(encoding="utf-8")
+        assert "Prompt 4" in page_1
+        assert "Late reply" not in page_1
+        assert "Prompt 5" not in page_1
+        index_html = (output_dir / "index.html").read_text(encoding="utf-8")
+        assert "5 prompts" in index_html
+
+    def test_session_truncated_after_prescan(self, tmp_path, monkeypatch):
+        """Test that a session cut short between the passes is reported clearly."""
+        import claude_code_transcripts
+
+        jsonl_file = tmp_path / "session.jsonl"
+        jsonl_file.write_text(self.prompt_lines(0, 12))
+        prescan = claude_code_transcripts._prescan_loglines
+
+        def prescan_then_truncate(*args, **kwargs):
+            result = prescan(*args, **kwargs)
+            jsonl_file.write_text(self.prompt_lines(0, 2))
+            return result
+
+        monkeypatch.setattr(
+            "claude_code_transcripts._prescan_loglines", prescan_then_truncate
+        )
+        with pytest.raises(ValueError, match="Session changed while rendering"):
+            generate_html(jsonl_file, tmp_path / "output")
+
+
+class TestTranscriptRenderer:
+    """Tests for the shared TranscriptRenderer engine."""
+
+    def test_session_data_matches_file_output(self, sample_session, tmp_path):
+        """Test that the file and session-data entry points produce identical HTML."""
+        fixture_path = Path(__file__).parent / "sample_session.json"
+        generate_html(fixture_path, tmp_path / "file", github_repo="example/project")
+        generate_html_from_session_data(
+            sample_session, tmp_path / "data", github_repo="example/project"
+        )
+
+        for name in ("index.html", "page-001.html", "page-002.html"):
+            assert (tmp_path / "file" / name).read_text(encoding="utf-8") == (
+                tmp_path / "data" / name
+            ).read_text(encoding="utf-8")
+
+    def test_accepts_one_shot_iterator(self, sample_session, tmp_path):
+        """Test that a generator of loglines is buffered for both passes."""
+        renderer = TranscriptRenderer(tmp_path / "gen", github_repo="example/project")
+        renderer.render(entry for entry in sample_session["loglines"])
+        generate_html_from_session_data(
+            sample_session, tmp_path / "list", github_repo="example/project"
+        )
+
+        assert (tmp_path / "gen" / "index.html").read_text(encoding="utf-8") == (
+            tmp_path / "list" / "index.html"
+        ).read_text(encoding="utf-8")
+
+    def test_records_stage_timings(self, sample_session, tmp_path):
+        """Test that time spent in each pipeline stage is recorded."""
+        renderer = TranscriptRenderer(tmp_path, github_repo="example/project")
+        renderer.render(sample_session["loglines"])
+
+        for stage in ("scan", "analyze", "render", "index", "write"):
+            assert renderer.timings[stage] >= 0
+
+    def test_echo_hook_receives_progress(self, sample_session, tmp_path):
+        """Test that progress messages go through the echo callable."""
+        messages = []
+        renderer = TranscriptRenderer(tmp_path, echo=messages.append)
+        renderer.render(sample_session["loglines"])
+
+        assert "Auto-detected GitHub repo: example/project" in messages
+        assert "Generated page-001.html" in messages
+
+    def test_render_page_messages_can_be_overridden(self, sample_session, tmp_path):
+        """Test that subclasses can hook into page rendering."""
+
+        class CountingRenderer(TranscriptRenderer):
+            pages = 0
+
+            def render_page_messages(self, page_convs):
+                CountingRenderer.pages += 1
+                return super().render_page_messages(page_convs)
+
+        CountingRenderer(tmp_path).render(sample_session["loglines"])
+        assert CountingRenderer.pages == 2
+
+    def test_json_command_reads_stdin(self, tmp_path, monkeypatch):
+        """Test that json - reads a JSONL session from stdin."""
+        from click.testing import CliRunner
+        from claude_code_transcripts import cli
+
+        monkeypatch.setattr(
+            "claude_code_transcripts.tempfile.gettempdir", lambda: str(tmp_path)
+        )
+        jsonl = (
+            '{"type": "user", "timestamp": "2025-01-01T10:00:00.000Z", "message": {"role": "user", "content": "Hello from stdin"}}\n'
+            '{"type": "assistant", "timestamp": "2025-01-01T10:00:05.000Z", "message": {"role": "assistant", "content": [{"type": "text", "text": "Hi!"}]}}\n'
+        )
+        output = tmp_path / "out"
+
+        runner = CliRunner()
+        result = runner.invoke(cli, ["json", "-", "-o", str(output)], input=jsonl)
+
+        assert result.exit_code == 0, result.output
+        assert "Hello from stdin" in (output / "page-001.html").read_text(
+            encoding="utf-8"
+        )
+
+    def test_json_command_reads_json_document_from_stdin(
+        self, tmp_path, monkeypatch, sample_session
+    ):
+        """Test that a JSON session document on stdin is detected as JSON."""
+        from click.testing import CliRunner
+        from claude_code_transcripts import cli
+
+        monkeypatch.setattr(
+            "claude_code_transcripts.tempfile.gettempdir", lambda: str(tmp_path)
+        )
+        output = tmp_path / "out"
+
+        runner = CliRunner()
+        result = runner.invoke(
+            cli,
+            ["json", "-", "-o", str(output), "--json"],
+            input=json.dumps(sample_session),
+        )
+
+        assert result.exit_code == 0, result.output
+        assert (output / "claude-stdin.json").exists()
+        assert (output / "page-002.html").exists()
+
+
+class TestPaginationPolicy:
+    """Tests for size-aware pagination."""
+
+    def test_default_plan_groups_prompts(self):
+        plan = PaginationPolicy().plan([[0]] * 12)
+        assert [len(page) for page in plan] == [5, 5, 2]
+        assert plan[2] == [(10, 0, 1), (11, 0, 1)]
+
+    def test_message_budget_keeps_conversations_whole(self):
+        policy = PaginationPolicy(max_prompts=10, max_messages=5)
+        plan = policy.plan([[0] * 3, [0] * 2, [0] * 2, [0] * 3])
+        assert plan == [
+            [(0, 0, 3), (1, 0, 2)],
+            [(2, 0, 2), (3, 0, 3)],
+        ]
+
+    def test_oversized_conversation_is_split(self):
+        policy = PaginationPolicy(max_messages=4)
+        plan = policy.plan([[0] * 2, [0] * 10, [0]])
+        assert plan == [
+            [(0, 0, 2)],
+            [(1, 0, 4)],
+            [(1, 4, 8)],
+            [(1, 8, 10), (2, 0, 1)],
+        ]
+
+    def test_byte_budget(self):
+        policy = PaginationPolicy(max_bytes=100)
+        plan = policy.plan([[60], [30], [50], [500, 10]])
+        assert plan == [
+            [(0, 0, 1), (1, 0, 1)],
+            [(2, 0, 1)],
+            # A message larger than the budget gets a page to itself
+            [(3, 0, 1)],
+            [(3, 1, 2)],
+        ]
+
+    def test_message_size_only_measured_for_byte_budgets(self):
+        message = {"role": "user", "content": "hello"}
+        assert PaginationPolicy().message_size(message) == 0
+        assert PaginationPolicy(max_bytes=10).message_size(message) == len(
+            json.dumps(message)
+        )
+
+    def test_rejects_zero_prompts(self):
+        with pytest.raises(ValueError):
+            PaginationPolicy(max_prompts=0)
+
+    def _tool_heavy_session(self, tool_calls=12):
+        loglines = [
+            {
+                "type": "user",
+                "timestamp": "2025-01-01T10:00:00.000Z",
+                "message": {"role": "user", "content": "Run lots of tools"},
+            }
+        ]
+        for i in range(tool_calls):
+            loglines.append(
+                {
+                    "type": "assistant",
+                    "timestamp": f"2025-01-01T10:01:{i:02d}.000Z",
+                    "message": {
+                        "role": "assistant",
+                        "content": [{"type": "text", "text": f"Step {i}"}],
+                    },
+                }
+            )
+        loglines.append(
+            {
+                "type": "user",
+                "timestamp": "2025-01-01T11:00:00.000Z",
+                "message": {"role": "user", "content": "Next prompt"},
+            }
+        )
+        return {"loglines": loglines}
+
+    def test_split_conversation_anchors_resolve(self, tmp_path):
+        generate_html_from_session_data(
+            self._tool_heavy_session(),
+            tmp_path,
+            pagination=PaginationPolicy(max_messages=5),
+        )
+
+        pages = sorted(tmp_path.glob("page-*.html"))
+        assert len(pages) == 3
+        html_by_page = {p.name: p.read_text(encoding="utf-8") for p in pages}
+        # Every message anchor appears on exactly one page
+        for i in range(12):
+            msg_id = f"msg-2025-01-01T10-01-{i:02d}-000Z"
+            assert sum(f'id="{msg_id}"' in h for h in html_by_page.values()) == 1
+        # Index links point at the page holding each prompt
+        index_html = (tmp_path / "index.html").read_text(encoding="utf-8")
+        assert 'href="page-001.html#msg-2025-01-01T10-00-00-000Z"' in index_html
+        assert 'href="page-003.html#msg-2025-01-01T11-00-00-000Z"' in index_html
+        assert 'id="msg-2025-01-01T11-00-00-000Z"' in html_by_page["page-003.html"]
+        # Stats for the split conversation are still counted once
+        assert "2 prompts" in index_html
+
+    def test_pagination_cli_options(self, tmp_path):
+        from click.testing import CliRunner
+        from claude_code_transcripts import cli
+
+        session_file = tmp_path / "session.json"
+        session_file.write_text(json.dumps(self._tool_heavy_session()))
+        output = tmp_path / "out"
+        runner = CliRunner()
+        result = runner.invoke(
+            cli,
+            ["json", str(session_file), "-o", str(output), "--page-messages", "5"],
+        )
+
+        assert result.exit_code == 0
+        assert len(list(output.glob("page-*.html"))) == 3
+
+    def test_prompts_per_page_cli_option(self, tmp_path):
+        from click.testing import CliRunner
+        from claude_code_transcripts import cli
+
+        fixture_path = Path(__file__).parent / "sample_session.json"
+        runner = CliRunner()
+        result = runner.invoke(
+            cli,
+            ["json", str(fixture_path), "-o", str(tmp_path), "--prompts-per-page", "1"],
+        )
+
+        assert result.exit_code == 0
+        assert len(list(tmp_path.glob("page-*.html"))) > 2
+
+
+class TestExternalAssets:
+    """Tests for linking CSS and JS from shared content-hashed files."""
+
+    def test_writes_hashed_assets_and_links_them(self, sample_session, tmp_path):
+        generate_html_from_session_data(
+            sample_session,
+            tmp_path,
+            github_repo="example/project",
+            external_assets=True,
+        )
+
+        css_files = list(tmp_path.glob("styles-*.css"))
+        js_files = list(tmp_path.glob("app-*.js"))
+        assert len(css_files) == 1
+        assert len(js_files) == 1
+        for name in ("index.html", "page-001.html", "page-002.html"):
+            page = (tmp_path / name).read_text(encoding="utf-8")
+            assert f'<link rel="stylesheet" href="{css_files[0].name}">' in page
+            assert f'<script src="{js_files[0].name}"></script>' in page
+            assert "<style>" not in page
+        assert ":root" in css_files[0].read_text(encoding="utf-8")
+
+    def test_asset_name_depends_on_content(self, sample_session, tmp_path):
+        generate_html_from_session_data(
+            sample_session, tmp_path / "light", external_assets=True
+        )
+        dark = {**DEFAULT_THEME, "bg_color": "#000000"}
+        generate_html_from_session_data(
+            sample_session, tmp_path / "dark", theme=dark, external_assets=True
+        )
+
+        light_css = next((tmp_path / "light").glob("styles-*.css")).name
+        dark_css = next((tmp_path / "dark").glob("styles-*.css")).name
+        assert light_css != dark_css
+        # JS does not depend on the theme
+        assert (
+            next((tmp_path / "light").glob("app-*.js")).name
+            == next((tmp_path / "dark").glob("app-*.js")).name
+        )
+
+    def test_shared_assets_dir_uses_relative_links(self, sample_session, tmp_path):
+        generate_html_from_session_data(
+            sample_session,
+            tmp_path / "project" / "session",
+            external_assets=True,
+            assets_dir=tmp_path,
+        )
+
+        css_name = next(tmp_path.glob("styles-*.css")).name
+        page = (tmp_path / "project" / "session" / "page-001.html").read_text(
+            encoding="utf-8"
+        )
+        assert f'href="../../{css_name}"' in page
+        assert not list((tmp_path / "project" / "session").glob("styles-*.css"))
+
+    def test_inline_by_default(self, sample_session, tmp_path):
+        generate_html_from_session_data(sample_session, tmp_path)
+
+        assert not list(tmp_path.glob("styles-*.css"))
+        assert "<style>" in (tmp_path / "index.html").read_text(encoding="utf-8")
+
+    def test_external_assets_cli_option(self, tmp_path):
+        from click.testing import CliRunner
+        from claude_code_transcripts import cli
+
+        fixture_path = Path(__file__).parent / "sample_session.json"
+        runner = CliRunner()
+        result = runner.invoke(
+            cli,
+            ["json", str(fixture_path), "-o", str(tmp_path), "--external-assets"],
+        )
+
+        assert result.exit_code == 0
+        assert list(tmp_path.glob("styles-*.css"))
+
+    def test_external_assets_rejects_gist(self, tmp_path):
+        from click.testing import CliRunner
+        from claude_code_transcripts import cli
+
+        fixture_path = Path(__file__).parent / "sample_session.json"
+        runner = CliRunner()
+        result = runner.invoke(
+            cli,
+            ["json", str(fixture_path), "--gist", "--external-assets"],
+        )
+
+        assert result.exit_code != 0
+        assert "cannot be combined with --gist" in result.output
+
+
+PNG_B64 = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+
+
+def _image_session(image_data=PNG_B64):
+    """Session data with the same image in a prompt and in a tool result."""
+    image = {
+        "type": "image",
+        "source": {"type": "base64", "media_type": "image/png", "data": image_data},
+    }
+    return {
+        "loglines": [
+            {
+                "type": "user",
+                "timestamp": "2025-01-01T10:00:00.000Z",
+                "message": {
+                    "role": "user",
+                    "content": [{"type": "text", "text": "What is this?"}, image],
+                },
+            },
+            {
+                "type": "assistant",
+                "timestamp": "2025-01-01T10:00:05.000Z",
+                "message": {
+                    "role": "assistant",
+                    "content": [
+                        {
+                            "type": "tool_use",
+                            "id": "toolu_1",
+                            "name": "Screenshot",
+                            "input": {},
+                        }
+                    ],
+                },
+            },
+            {
+                "type": "user",
+                "timestamp": "2025-01-01T10:00:10.000Z",
+                "message": {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "tool_result",
+                            "tool_use_id": "toolu_1",
+                            "content": [json.loads(json.dumps(image))],
+                        }
+                    ],
+                },
+            },
+        ]
+    }
+
+
+class TestExtractImages:
+    """Tests for writing images to content-addressed files."""
+
+    def test_images_written_once_and_linked_lazily(self, tmp_path):
+        generate_html_from_session_data(_image_session(), tmp_path, extract_images=True)
+
+        files = list((tmp_path / "assets").iterdir())
+        assert len(files) == 1
+        assert files[0].suffix == ".png"
+        assert files[0].read_bytes() == base64.b64decode(PNG_B64)
+        page = (tmp_path / "page-001.html").read_text(encoding="utf-8")
+        assert page.count(f'src="assets/{files[0].name}" loading="lazy"') == 2
+        assert "base64," not in page
+
+    def test_images_inline_by_default(self, tmp_path):
+        generate_html_from_session_data(_image_session(), tmp_path)
+
+        assert not (tmp_path / "assets").exists()
+        page = (tmp_path / "page-001.html").read_text(encoding="utf-8")
+        assert f"data:image/png;base64,{PNG_B64}" in page
+
+    def test_invalid_base64_stays_inline(self, tmp_path):
+        generate_html_from_session_data(
+            _image_session("not base64!"), tmp_path, extract_images=True
+        )
+
+        page = (tmp_path / "page-001.html").read_text(encoding="utf-8")
+        assert "data:image/png;base64,not base64!" in page
+
+    def test_release_image_data_drops_payload(self, tmp_path):
+        session = _image_session()
+        renderer = TranscriptRenderer(
+            tmp_path, extract_images=True, release_image_data=True
+        )
+        renderer.render(session["loglines"])
+
+        source = session["loglines"][0]["message"]["content"][1]["source"]
+        assert "data" not in source
+        assert (tmp_path / "assets" / source["asset"]).exists()
+        assert renderer.image_store.stats == {"written": 1, "deduplicated": 1}
+
+    def test_session_data_is_not_modified(self, tmp_path):
+        session = _image_session()
+        generate_html_from_session_data(session, tmp_path, extract_images=True)
+
+        source = session["loglines"][0]["message"]["content"][1]["source"]
+        assert source["data"] == PNG_B64
+
+    def test_extract_images_cli_option(self, tmp_path):
+        from click.testing import CliRunner
+        from claude_code_transcripts import cli
+
+        session_file = tmp_path / "session.json"
+        session_file.write_text(json.dumps(_image_session()), encoding="utf-8")
+        output = tmp_path / "out"
+        runner = CliRunner()
+        result = runner.invoke(
+            cli, ["json", str(session_file), "-o", str(output), "--extract-images"]
+        )
+
+        assert result.exit_code == 0
+        assert len(list((output / "assets").glob("*.png"))) == 1
+
+
 class TestGetSessionSummary:
     """Tests for get_session_summary which extracts summary from session files."""
 
@@ -1177,6 +2030,72 @@ class TestGetSessionSummary:
         assert len(summary) <= 100
         assert summary.endswith("...")
 
+    def test_summary_entry_after_user_message_wins(self, tmp_path):
+        """Test that a later summary entry is preferred over the first prompt."""
+        jsonl_file = tmp_path / "test.jsonl"
+        jsonl_file.write_text(
+            '{"type":"user","timestamp":"2025-01-01T00:00:00Z","message":{"role":"user","content":"First prompt"}}\n'
+            '{"type":"summary","summary":"The real summary"}\n'
+        )
+        assert get_session_summary(jsonl_file) == "The real summary"
+
+    def test_reads_file_once(self, tmp_path, monkeypatch):
+        """Test that summary extraction is a single pass over the file."""
+        import builtins
+        import claude_code_transcripts
+
+        jsonl_file = tmp_path / "test.jsonl"
+        jsonl_file.write_text(
+            '{"type":"user","timestamp":"2025-01-01T00:00:00Z","message":{"role":"user","content":"Only prompt"}}\n'
+            '{"type":"assistant","timestamp":"2025-01-01T00:00:01Z","message":{"role":"assistant","content":[]}}\n'
+        )
+        opened = []
+
+        def counting_open(*args, **kwargs):
+            opened.append(args[0])
+            return builtins.open(*args, **kwargs)
+
+        monkeypatch.setattr(
+            claude_code_transcripts, "open", counting_open, raising=False
+        )
+
+        assert get_session_summary(jsonl_file) == "Only prompt"
+        assert len(opened) == 1
+
+    def test_byte_budget_limits_summary_search(self, tmp_path):
+        """Test that summary entries past max_bytes are not searched for."""
+        jsonl_file = tmp_path / "test.jsonl"
+        padding = '{"type":"assistant","message":{"content":"%s"}}\n' % ("x" * 1000)
+        jsonl_file.write_text(
+            '{"type":"user","timestamp":"2025-01-01T00:00:00Z","message":{"role":"user","content":"Early prompt"}}\n'
+            + padding * 10
+            + '{"type":"summary","summary":"Late summary"}\n'
+        )
+
+        assert get_session_summary(jsonl_file, max_bytes=2000) == "Early prompt"
+        assert get_session_summary(jsonl_file, max_bytes=None) == "Late summary"
+
+    def test_byte_budget_still_finds_first_prompt(self, tmp_path):
+        """Test that a first prompt beyond max_bytes is still used as a fallback."""
+        jsonl_file = tmp_path / "test.jsonl"
+        padding = '{"type":"assistant","message":{"content":"%s"}}\n' % ("x" * 1000)
+        jsonl_file.write_text(
+            padding * 10
+            + '{"type":"user","timestamp":"2025-01-01T00:00:00Z","message":{"role":"user","content":"Late prompt"}}\n'
+        )
+
+        assert get_session_summary(jsonl_file, max_bytes=2000) == "Late prompt"
+
+    def test_skips_meta_and_tag_messages(self, tmp_path):
+        """Test that meta messages and command tags are not used as summaries."""
+        jsonl_file = tmp_path / "test.jsonl"
+        jsonl_file.write_text(
+            '{"type":"user","isMeta":true,"message":{"role":"user","content":"Meta message"}}\n'
+            '{"type":"user","message":{"role":"user","content":"<command-name>/clear</command-name>"}}\n'
+            '{"type":"user","message":{"role":"user","content":"Actual prompt"}}\n'
+        )
+        assert get_session_summary(jsonl_file) == "Actual prompt"
+
 
 class TestFindLocalSessions:
     """Tests for find_local_sessions which discovers local JSONL files."""
@@ -1638,3 +2557,81 @@ class TestSearchFeature:
 
         # Total pages should be embedded for JS to know how many pages to fetch
         assert "totalPages" in index_html or "total_pages" in index_html
+
+    def test_search_index_written(self, output_dir):
+        """Test that a prebuilt search index is written next to the pages."""
+        fixture_path = Path(__file__).parent / "sample_session.json"
+        generate_html(fixture_path, output_dir, github_repo="example/project")
+
+        index = json.loads((output_dir / "search-index.json").read_text())
+        assert index["version"] == 1
+        assert index["total_pages"] == 2
+        records = []
+        for shard in index["shards"]:
+            records.extend(json.loads((output_dir / shard).read_text())["messages"])
+        assert len(records) == index["total_messages"]
+
+        msg_id, page, role, text = records[0]
+        assert msg_id == "msg-2025-12-24T10-00-00-000Z"
+        assert page == 1
+        assert role == "user"
+        assert text == "Create a simple Python function to add two numbers"
+        assert {record[2] for record in records} == {"user", "assistant", "tool-reply"}
+        # Every indexed message links to an anchor on its page
+        for msg_id, page, role, text in records:
+            page_html = (output_dir / f"page-{page:03d}.html").read_text()
+            assert f'id="{msg_id}"' in page_html
+
+    def test_search_index_shards(self, output_dir, monkeypatch):
+        """Test that large indexes are split into shards and stale shards removed."""
+        fixture_path = Path(__file__).parent / "sample_session.json"
+        monkeypatch.setattr("claude_code_transcripts.SEARCH_SHARD_BYTES", 500)
+        generate_html(fixture_path, output_dir, github_repo="example/project")
+        many = json.loads((output_dir / "search-index.json").read_text())["shards"]
+        assert len(many) > 1
+
+        monkeypatch.setattr("claude_code_transcripts.SEARCH_SHARD_BYTES", 10**6)
+        generate_html(fixture_path, output_dir, github_repo="example/project")
+        assert json.loads((output_dir / "search-index.json").read_text())["shards"] == [
+            "search-001.json"
+        ]
+        assert sorted(p.name for p in output_dir.glob("search-0*.json")) == [
+            "search-001.json"
+        ]
+
+    def test_search_javascript_uses_index(self, output_dir):
+        """Test that search.js queries the prebuilt index before scanning pages."""
+        fixture_path = Path(__file__).parent / "sample_session.json"
+        generate_html(fixture_path, output_dir, github_repo="example/project")
+
+        index_html = (output_dir / "index.html").read_text(encoding="utf-8")
+        assert "search-index.json" in index_html
+        assert "searchWithIndex" in index_html
+
+
+class TestMessageSearchText:
+    """Tests for the text indexed for each message."""
+
+    def test_collects_text_thinking_tools_and_results(self):
+        from claude_code_transcripts import message_search_text
+
+        message = {
+            "content": [
+                {"type": "thinking", "thinking": "Consider   the\nplan"},
+                {"type": "text", "text": "Running it"},
+                {"type": "tool_use", "name": "Bash", "input": {"command": "ls"}},
+                {"type": "tool_result", "content": "file.txt"},
+                {
+                    "type": "tool_result",
+                    "content": [{"type": "text", "text": "more output"}],
+                },
+            ]
+        }
+        assert message_search_text(message) == (
+            'Consider the plan Running it Bash {"command": "ls"} file.txt more output'
+        )
+
+    def test_string_content(self):
+        from claude_code_transcripts import message_search_text
+
+        assert message_search_text({"content": "  hello\n world "}) == "hello world"
@@ -0,0 +1,479 @@
+"""Tests for the shared HTTP client and its retry policy."""
+
+import asyncio
+import gzip
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from pathlib import Path
+
+import click
+import httpx
+import pytest
+
+from claude_code_transcripts import (
+    DownloadingLoglines,
+    fetch_session,
+    fetch_sessions,
+    fetch_url_to_tempfile,
+)
+from claude_code_transcripts.cache import ResponseCache
+from claude_code_transcripts.http_client import (
+    AsyncCachingTransport,
+    AsyncRateLimiter,
+    AsyncRetryTransport,
+    CachingTransport,
+    RetryTransport,
+    create_async_http_client,
+    create_http_client,
+    get_http_client,
+    parse_retry_after,
+)
+
+
+def responses(*items):
+    """Return a MockTransport handler replying with items in turn, plus the requests seen."""
+    requests = []
+    queue = list(items)
+
+    def handler(request):
+        requests.append(request)
+        item = queue.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    return handler, requests
+
+
+def client_for(handler, sleeps, retries=3):
+    transport = RetryTransport(
+        httpx.MockTransport(handler), retries=retries, sleep=sleeps.append
+    )
+    return httpx.Client(transport=transport)
+
+
+class TestParseRetryAfter:
+    """Tests for parse_retry_after."""
+
+    def test_seconds(self):
+        assert parse_retry_after(httpx.Response(503, headers={"Retry-After": "7"})) == 7
+
+    def test_http_date(self):
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+        response = httpx.Response(
+            503, headers={"Retry-After": format_datetime(retry_at, usegmt=True)}
+        )
+        assert 25 < parse_retry_after(response) <= 30
+
+    def test_missing_or_invalid(self):
+        assert parse_retry_after(httpx.Response(503)) is None
+        assert (
+            parse_retry_after(httpx.Response(503, headers={"Retry-After": "soon"}))
+            is None
+        )
+
+
+class TestRetryTransport:
+    """Tests for RetryTransport."""
+
+    def test_retries_server_errors(self):
+        handler, requests = responses(
+            httpx.Response(503), httpx.Response(502), httpx.Response(200, text="ok")
+        )
+        sleeps = []
+        response = client_for(handler, sleeps).get("https://example.com/")
+
+        assert response.text == "ok"
+        assert len(requests) == 3
+        # Full jitter: each delay is random up to the exponential backoff
+        assert len(sleeps) == 2
+        assert 0 <= sleeps[0] <= 0.5
+        assert 0 <= sleeps[1] <= 1.0
+
+    def test_honours_retry_after(self):
+        handler, requests = responses(
+            httpx.Response(429, headers={"Retry-After": "3"}),
+            httpx.Response(200, text="ok"),
+        )
+        sleeps = []
+        response = client_for(handler, sleeps).get("https://example.com/")
+
+        assert response.status_code == 200
+        assert sleeps == [3.0]
+
+    def test_returns_last_response_when_retries_run_out(self):
+        handler, requests = responses(*[httpx.Response(503)] * 3)
+        sleeps = []
+        response = client_for(handler, sleeps, retries=2).get("https://example.com/")
+
+        assert response.status_code == 503
+        assert len(requests) == 3
+
+    def test_retries_network_errors(self):
+        request = httpx.Request("GET", "https://example.com/")
+        handler, requests = responses(
+            httpx.ConnectError("Connection refused", request=request),
+            httpx.Response(200, text="ok"),
+        )
+        sleeps = []
+        response = client_for(handler, sleeps).get("https://example.com/")
+
+        assert response.text == "ok"
+        assert len(sleeps) == 1
+
+    def test_does_not_retry_client_errors_or_posts(self):
+        handler, requests = responses(httpx.Response(404), httpx.Response(503))
+        client = client_for(handler, [])
+
+        assert client.get("https://example.com/").status_code == 404
+        assert client.post("https://example.com/").status_code == 503
+        assert len(requests) == 2
+
+
+class TestAsyncRetryTransport:
+    """Tests for AsyncRetryTransport and AsyncRateLimiter."""
+
+    def test_retries_server_errors(self):
+        handler, requests = responses(
+            httpx.Response(503, headers={"Retry-After": "1"}),
+            httpx.Response(200, text="ok"),
+        )
+        sleeps = []
+
+        async def sleep(seconds):
+            sleeps.append(seconds)
+
+        async def fetch():
+            transport = AsyncRetryTransport(httpx.MockTransport(handler), sleep=sleep)
+            async with httpx.AsyncClient(transport=transport) as client:
+                return await client.get("https://example.com/")
+
+        response = asyncio.run(fetch())
+        assert response.text == "ok"
+        assert sleeps == [1.0]
+
+    def test_rate_limiter_spaces_out_requests(self):
+        now = 100.0
+        sleeps = []
+
+        async def sleep(seconds):
+            sleeps.append(seconds)
+
+        limiter = AsyncRateLimiter(4, clock=lambda: now, sleep=sleep)
+
+        async def wait_all():
+            for _ in range(3):
+                await limiter.wait()
+
+        asyncio.run(wait_all())
+        assert sleeps == [0.25, 0.5]
+
+
+class TestResponseCache:
+    """Tests for ResponseCache."""
+
+    def test_round_trip(self, tmp_path):
+        cache = ResponseCache(tmp_path / "cache")
+        key = cache.key("GET", "https://example.com/")
+        assert cache.get(key) is None
+
+        cache.set(key, {"status": 200}, b"body\nwith lines")
+        metadata, body = cache.get(key)
+        assert metadata["status"] == 200
+        assert body == b"body\nwith lines"
+        assert (tmp_path / "cache").stat().st_mode & 0o777 == 0o700
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = ResponseCache(tmp_path, max_bytes=250)
+        for i, name in enumerate(["a", "b", "c"]):
+            cache.set(name, {}, b"x" * 50)
+            os.utime(tmp_path / f"{name}.body", (1000 + i, 1000 + i))
+        # Reading a marks it as used more recently than b and c
+        assert cache.get("a") is not None
+
+        cache.set("d", {}, b"x" * 50)
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+        assert cache.get("d") is not None
+
+    def test_skips_entries_larger_than_the_cache(self, tmp_path):
+        cache = ResponseCache(tmp_path, max_bytes=100)
+        cache.set("big", {}, b"x" * 200)
+        assert cache.get("big") is None
+
+
+def caching_client(handler, tmp_path, ttl=0):
+    transport = CachingTransport(
+        httpx.MockTransport(handler), ResponseCache(tmp_path), ttl=ttl
+    )
+    return httpx.Client(transport=transport)
+
+
+class TestCachingTransport:
+    """Tests for CachingTransport and AsyncCachingTransport."""
+
+    def test_fresh_response_needs_no_request(self, tmp_path):
+        handler, requests = responses(httpx.Response(200, text="body"))
+        client = caching_client(handler, tmp_path, ttl=60)
+
+        assert client.get("https://example.com/").text == "body"
+        response = client.get("https://example.com/")
+        assert response.text == "body"
+        assert response.extensions["from_cache"] is True
+        assert len(requests) == 1
+
+    def test_stale_response_is_revalidated(self, tmp_path):
+        handler, requests = responses(
+            httpx.Response(
+                200,
+                text="body",
+                headers={
+                    "ETag": '"v1"',
+                    "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+                },
+            ),
+            httpx.Response(304),
+        )
+        client = caching_client(handler, tmp_path)
+
+        assert client.get("https://example.com/").text == "body"
+        response = client.get("https://example.com/")
+        assert response.status_code == 200
+        assert response.text == "body"
+        assert requests[1].headers["If-None-Match"] == '"v1"'
+        assert requests[1].headers["If-Modified-Since"] == (
+            "Mon, 01 Jan 2024 00:00:00 GMT"
+        )
+
+    def test_cache_ttl_extension_and_max_age(self, tmp_path):
+        handler, requests = responses(
+            httpx.Response(200, text="one"),
+            httpx.Response(200, text="two", headers={"Cache-Control": "max-age=0"}),
+            httpx.Response(200, text="three"),
+        )
+        client = caching_client(handler, tmp_path)
+
+        client.get("https://example.com/a", extensions={"cache_ttl": 60})
+        assert client.get("https://example.com/a").text == "one"
+        # max-age from the response wins over the requested TTL
+        client.get("https://example.com/b", extensions={"cache_ttl": 60})
+        assert client.get("https://example.com/b").text == "three"
+        assert len(requests) == 3
+
+    def test_no_cache_and_no_store(self, tmp_path):
+        handler, requests = responses(
+            httpx.Response(200, text="one"),
+            httpx.Response(200, text="two"),
+            httpx.Response(200, text="three", headers={"Cache-Control": "no-store"}),
+            httpx.Response(200, text="four"),
+        )
+        client = caching_client(handler, tmp_path, ttl=60)
+
+        client.get("https://example.com/")
+        # no-cache skips the cached copy but replaces it
+        no_cache = {"Cache-Control": "no-cache"}
+        assert client.get("https://example.com/", headers=no_cache).text == "two"
+        assert client.get("https://example.com/").text == "two"
+        assert client.get("https://example.com/", headers=no_cache).text == "three"
+        assert client.get("https://example.com/").text == "two"
+        assert len(requests) == 3
+
+    def test_credentials_are_part_of_the_key(self, tmp_path):
+        handler, requests = responses(
+            httpx.Response(200, text="alice"), httpx.Response(200, text="bob")
+        )
+        client = caching_client(handler, tmp_path, ttl=60)
+
+        alice = {"Authorization": "Bearer alice"}
+        bob = {"Authorization": "Bearer bob"}
+        assert client.get("https://example.com/", headers=alice).text == "alice"
+        assert client.get("https://example.com/", headers=bob).text == "bob"
+        assert client.get("https://example.com/", headers=alice).text == "alice"
+        assert len(requests) == 2
+
+    def test_streams_bodies_through_the_cache(self, tmp_path):
+        body = b"line\n" * 100_000
+        handler, requests = responses(
+            httpx.Response(
+                200,
+                content=gzip.compress(body),
+                headers={"Content-Encoding": "gzip", "ETag": '"v1"'},
+            ),
+            httpx.Response(304),
+        )
+        client = caching_client(handler, tmp_path)
+
+        for _ in range(2):
+            with client.stream("GET", "https://example.com/") as response:
+                assert b"".join(response.iter_bytes()) == body
+        assert len(requests) == 2
+        # Stored as received, still compressed
+        assert len(list(tmp_path.glob("*.body"))) == 1
+        assert next(tmp_path.glob("*.body")).read_bytes() == gzip.compress(body)
+
+    def test_partly_read_bodies_are_not_stored(self, tmp_path):
+        handler, requests = responses(
+            httpx.Response(200, content=b"x" * 100_000),
+            httpx.Response(200, content=b"y"),
+        )
+        client = caching_client(handler, tmp_path, ttl=60)
+
+        with client.stream("GET", "https://example.com/") as response:
+            next(response.iter_raw(1000))
+        assert list(tmp_path.iterdir()) == []
+        assert client.get("https://example.com/").content == b"y"
+
+    def test_errors_are_not_cached(self, tmp_path):
+        handler, requests = responses(
+            httpx.Response(404), httpx.Response(200, text="ok")
+        )
+        client = caching_client(handler, tmp_path, ttl=60)
+
+        assert client.get("https://example.com/").status_code == 404
+        assert client.get("https://example.com/").text == "ok"
+
+    def test_async_client(self, tmp_path):
+        handler, requests = responses(
+            httpx.Response(200, text="body", headers={"ETag": '"v1"'}),
+            httpx.Response(304),
+        )
+
+        async def fetch_twice():
+            async with create_async_http_client(
+                transport=httpx.MockTransport(handler), cache=ResponseCache(tmp_path)
+            ) as client:
+                assert isinstance(client._transport, AsyncCachingTransport)
+                first = await client.get("https://example.com/")
+                second = await client.get("https://example.com/")
+                return first.text, second.text
+
+        assert asyncio.run(fetch_twice()) == ("body", "body")
+        assert requests[1].headers["If-None-Match"] == '"v1"'
+
+
+class TestSharedClient:
+    """Tests for the shared client used by the fetch functions."""
+
+    def test_shared_client_is_reused(self):
+        assert get_http_client() is get_http_client()
+
+    def test_create_http_client_without_h2(self, monkeypatch):
+        monkeypatch.setattr(
+            "claude_code_transcripts.http_client.http2_available", lambda: False
+        )
+        client = create_http_client()
+        assert isinstance(client._transport, RetryTransport)
+        client.close()
+
+    def test_fetch_functions_use_shared_client(self, mock_http_client):
+        def handler(request):
+            assert request.headers["Authorization"] == "Bearer token"
+            if request.url.path.endswith("/sessions"):
+                return httpx.Response(200, json={"data": [{"id": "abc"}]})
+            return httpx.Response(200, json={"loglines": []})
+
+        requests = mock_http_client(handler)
+        assert fetch_sessions("token", "org") == {"data": [{"id": "abc"}]}
+        assert fetch_session("token", "org", "abc") == {"loglines": []}
+        assert [request.url.path for request in requests] == [
+            "/v1/sessions",
+            "/v1/session_ingress/session/abc",
+        ]
+
+    def test_fetch_raises_after_retries(self, mock_http_client):
+        requests = mock_http_client(lambda request: httpx.Response(503))
+        with pytest.raises(httpx.HTTPStatusError):
+            fetch_sessions("token", "org")
+        assert len(requests) == 4
+
+    def test_shared_client_caches_sessions(self, httpx_mock, isolated_response_cache):
+        httpx_mock.add_response(json={"loglines": []})
+        assert fetch_session("token", "org", "abc") == {"loglines": []}
+        assert fetch_session("token", "org", "abc") == {"loglines": []}
+        assert len(httpx_mock.get_requests()) == 1
+        assert list(isolated_response_cache.glob("*.body"))
+
+        httpx_mock.add_response(json={"loglines": ["new"]})
+        assert fetch_session("token", "org", "abc", use_cache=False) == {
+            "loglines": ["new"]
+        }
+
+
+def jsonl_lines(count):
+    return [
+        json.dumps(
+            {
+                "type": "user",
+                "timestamp": "2025-01-01T10:00:00.000Z",
+                "message": {"role": "user", "content": f"Prompt {i}"},
+            }
+        ).encode("utf-8")
+        + b"\n"
+        for i in range(count)
+    ]
+
+
+class TestUrlDownloads:
+    """Tests for fetch_url_to_tempfile and DownloadingLoglines."""
+
+    def test_streams_to_file_with_progress(self, mock_http_client):
+        body = b"".join(jsonl_lines(2000))
+        mock_http_client(lambda request: httpx.Response(200, content=body))
+        progress = []
+
+        path = fetch_url_to_tempfile(
+            "https://example.com/big.jsonl",
+            progress_callback=lambda done, total: progress.append((done, total)),
+        )
+        assert path.name == "claude-url-big.jsonl"
+        assert path.read_bytes() == body
+        assert progress[-1] == (len(body), len(body))
+
+    def test_decompresses_gzip_files(self, mock_http_client):
+        body = b"".join(jsonl_lines(10))
+        mock_http_client(
+            lambda request: httpx.Response(200, content=gzip.compress(body))
+        )
+
+        path = fetch_url_to_tempfile("https://example.com/session.jsonl.gz")
+        assert path.name == "claude-url-session.jsonl"
+        assert path.read_bytes() == body
+
+    def test_failed_download_leaves_no_file(self, mock_http_client, tmp_path):
+        mock_http_client(lambda request: httpx.Response(404))
+        with pytest.raises(click.ClickException, match="404"):
+            fetch_url_to_tempfile("https://example.com/missing-session.jsonl")
+        assert not (
+            Path(tempfile.gettempdir()) / "claude-url-missing-session.jsonl"
+        ).exists()
+
+    def test_loglines_are_parsed_while_downloading(self, mock_http_client, tmp_path):
+        lines = jsonl_lines(3)
+        sent = []
+
+        def body():
+            # One line split across two chunks, then the rest
+            for chunk in [lines[0][:10], lines[0][10:] + lines[1], lines[2][:-1]]:
+                sent.append(chunk)
+                yield chunk
+
+        mock_http_client(lambda request: httpx.Response(200, content=body()))
+        loglines = DownloadingLoglines(
+            "https://example.com/session.jsonl", tmp_path / "session.jsonl"
+        )
+
+        prompts = []
+        for entry in loglines:
+            prompts.append(entry["message"]["content"])
+            if len(prompts) == 1:
+                # The first line was parsed before the download finished
+                assert len(sent) == 2
+        assert prompts == ["Prompt 0", "Prompt 1", "Prompt 2"]
+
+        # Later passes read the downloaded file
+        assert [entry["message"]["content"] for entry in loglines] == prompts
+        assert (tmp_path / "session.jsonl").read_bytes() == b"".join(lines)[:-1]
@@ -0,0 +1,245 @@
+"""Tests for the serve command's on-demand rendering server."""
+
+import gzip
+import http.client
+import os
+import shutil
+import threading
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from claude_code_transcripts import (
+    CachedResponse,
+    RenderedPageCache,
+    TranscriptServer,
+    cli,
+)
+
+
+@pytest.fixture
+def server(projects_dir):
+    """Run a TranscriptServer on a free port for the duration of a test."""
+    server = TranscriptServer(
+        ("127.0.0.1", 0), projects_dir, echo=lambda *args, **kwargs: None
+    )
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, path, headers=None, method="GET"):
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+    conn.request(method, path, headers=headers or {})
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    return response, body
+
+
+class TestRenderedPageCache:
+    """Tests for the size-bounded LRU of rendered files."""
+
+    def test_evicts_least_recently_used(self):
+        first = CachedResponse(b"a" * 100, "text/html")
+        cache = RenderedPageCache(max_bytes=first.size * 2)
+        cache.put("a", first)
+        cache.put("b", CachedResponse(b"b" * 100, "text/html"))
+        assert cache.get("a") is first
+        cache.put("c", CachedResponse(b"c" * 100, "text/html"))
+
+        assert cache.get("b") is None
+        assert cache.get("a") is first
+        assert cache.size <= cache.max_bytes
+
+    def test_skips_responses_larger_than_cache(self):
+        cache = RenderedPageCache(max_bytes=10)
+        cache.put("big", CachedResponse(os.urandom(100), "text/html"))
+        assert cache.get("big") is None
+        assert cache.size == 0
+
+
+class TestTranscriptServer:
+    """Tests for TranscriptServer."""
+
+    def test_master_and_project_index(self, server):
+        response, body = request(server, "/")
+        assert response.status == 200
+        assert b'href="demo/index.html"' in body
+        assert b'id="search-box"' not in body
+
+        response, body = request(server, "/demo/")
+        assert response.status == 200
+        assert b'href="sample/index.html"' in body
+
+    def test_directory_without_slash_redirects(self, server):
+        response, _ = request(server, "/demo/sample")
+        assert response.status == 301
+        assert response.getheader("Location") == "/demo/sample/"
+
+    @pytest.mark.parametrize(
+        "path,location",
+        [
+            ("/\\evil.com", "/%5Cevil.com/"),
+            ("//evil.com", "/evil.com/"),
+            ("/%2F%2Fevil.com", "/evil.com/"),
+            ("/demo/a%20b", "/demo/a%20b/"),
+        ],
+    )
+    def test_redirect_stays_on_server(self, server, path, location):
+        response, _ = request(server, path)
+        assert response.status == 301
+        assert response.getheader("Location") == location
+
+    def test_renders_session_on_first_request(self, server):
+        response, body = request(server, "/demo/sample/index.html")
+        assert response.status == 200
+        assert response.getheader("Content-Type") == "text/html; charset=utf-8"
+        assert b"Claude Code transcript" in body
+        misses = server.cache.misses
+
+        # The other files of the session were cached by the same render
+        with patch.object(server, "render_session") as render_session:
+            response, body = request(server, "/demo/sample/page-001.html")
+            response, index = request(server, "/demo/sample/search-index.json")
+        render_session.assert_not_called()
+        assert response.status == 200
+        assert response.getheader("Content-Type") == "application/json"
+        assert b'"total_pages": 1' in index
+        assert server.cache.misses == misses
+
+    def test_etag_and_if_none_match(self, server):
+        response, _ = request(server, "/demo/sample/page-001.html")
+        etag = response.getheader("ETag")
+        assert etag
+
+        response, body = request(
+            server, "/demo/sample/page-001.html", {"If-None-Match": etag}
+        )
+        assert response.status == 304
+        assert body == b""
+
+        response, _ = request(
+            server, "/demo/sample/page-001.html", {"If-None-Match": '"other"'}
+        )
+        assert response.status == 200
+
+    def test_gzip(self, server):
+        response, plain = request(server, "/demo/sample/page-001.html")
+        response, body = request(
+            server, "/demo/sample/page-001.html", {"Accept-Encoding": "gzip"}
+        )
+        assert response.getheader("Content-Encoding") == "gzip"
+        assert response.getheader("Vary") == "Accept-Encoding"
+        assert gzip.decompress(body) == plain
+        assert len(body) < len(plain)
+
+    def test_head_request(self, server):
+        response, body = request(server, "/demo/sample/page-001.html", method="HEAD")
+        assert response.status == 200
+        assert int(response.getheader("Content-Length")) > 0
+        assert body == b""
+
+    def test_changed_session_is_rerendered(self, server, projects_dir):
+        _, before = request(server, "/demo/sample/index.html")
+        session_file = projects_dir / "-home-user-projects-demo" / "sample.jsonl"
+        with open(session_file, "a") as f:
+            f.write(
+                '{"type": "user", "timestamp": "2025-12-24T11:00:00.000Z", '
+                '"message": {"role": "user", "content": "A brand new prompt"}}\n'
+            )
+        stat = session_file.stat()
+        os.utime(session_file, (stat.st_atime, stat.st_mtime + 10))
+
+        _, after = request(server, "/demo/sample/index.html")
+        assert b"A brand new prompt" not in before
+        assert b"A brand new prompt" in after
+
+    def test_unknown_paths_are_not_found(self, server):
+        for path in [
+            "/missing/",
+            "/demo/missing/index.html",
+            "/demo/sample/page-099.html",
+            "/demo/sample/../../etc/passwd",
+            "/a/b/c/d",
+        ]:
+            response, _ = request(server, path)
+            assert response.status == 404, path
+
+    def test_unknown_sessions_do_not_rescan_every_request(self, server):
+        with patch.object(server, "scan", wraps=server.scan) as scan:
+            for _ in range(5):
+                response, _ = request(server, "/demo/missing/")
+                assert response.status == 404
+        scan.assert_not_called()
+
+    def test_new_session_is_found_by_a_later_rescan(
+        self, server, projects_dir, monkeypatch
+    ):
+        shutil.copy(
+            projects_dir / "-home-user-projects-demo" / "sample.jsonl",
+            projects_dir / "-home-user-projects-demo" / "newer.jsonl",
+        )
+        response, _ = request(server, "/demo/newer/")
+        assert response.status == 404
+
+        monkeypatch.setattr("claude_code_transcripts.SERVE_RESCAN_INTERVAL", 0)
+        with patch.object(server, "scan", wraps=server.scan) as scan:
+            response, _ = request(server, "/demo/newer/")
+        assert response.status == 200
+        assert scan.call_count == 1
+
+    def test_missing_page_is_not_rerendered(self, server):
+        with patch.object(
+            server, "render_session", wraps=server.render_session
+        ) as render_session:
+            for _ in range(5):
+                response, _ = request(server, "/demo/sample/page-999.html")
+                assert response.status == 404
+            response, _ = request(server, "/demo/sample/page-001.html")
+        assert response.status == 200
+        assert render_session.call_count == 1
+
+    def test_render_failure_is_reported(self, server):
+        with patch.object(
+            server, "render_session", side_effect=RuntimeError("Simulated failure")
+        ):
+            response, _ = request(server, "/demo/sample/index.html")
+        assert response.status == 500
+
+
+class TestServeCommand:
+    """Tests for the serve CLI command."""
+
+    def test_serve_command(self, projects_dir):
+        runner = CliRunner()
+        with patch(
+            "claude_code_transcripts.TranscriptServer.serve_forever",
+            side_effect=KeyboardInterrupt,
+        ):
+            result = runner.invoke(
+                cli, ["serve", "--source", str(projects_dir), "--port", "0"]
+            )
+
+        assert result.exit_code == 0, result.output
+        assert "Serving" in result.output
+        assert "http://127.0.0.1:" in result.output
+
+    def test_serve_opens_browser(self, projects_dir, mock_webbrowser_open):
+        runner = CliRunner()
+        with patch(
+            "claude_code_transcripts.TranscriptServer.serve_forever",
+            side_effect=KeyboardInterrupt,
+        ):
+            runner.invoke(
+                cli,
+                ["serve", "--source", str(projects_dir), "--port", "0", "--open"],
+            )
+
+        assert len(mock_webbrowser_open) == 1
+        assert mock_webbrowser_open[0].startswith("http://127.0.0.1:")
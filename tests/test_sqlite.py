@@ -0,0 +1,218 @@
+"""Tests for the SQLite export."""
+
+import os
+import shutil
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from claude_code_transcripts import cli, export_sessions_to_sqlite
+
+
+def _count(db_path, table):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+class TestExportSessionsToSqlite:
+    """Tests for export_sessions_to_sqlite."""
+
+    def test_loads_all_tables(self, projects_dir, tmp_path):
+        db_path = tmp_path / "archive.db"
+        stats = export_sessions_to_sqlite(projects_dir, db_path)
+
+        assert stats["added_sessions"] == 1
+        assert stats["failed_sessions"] == []
+        conn = sqlite3.connect(db_path)
+        session = conn.execute(
+            "SELECT project, prompt_count, message_count, started_at FROM sessions"
+        ).fetchone()
+        assert session == ("demo", 2, 7, "2025-12-24T10:00:00.000Z")
+        assert conn.execute(
+            "SELECT type, role, anchor FROM messages ORDER BY position LIMIT 1"
+        ).fetchone() == ("user", "user", "msg-2025-12-24T10-00-00-000Z")
+        assert sorted(
+            row[0] for row in conn.execute("SELECT name FROM tool_calls")
+        ) == ["Bash", "Write"]
+        assert _count(db_path, "tool_results") == 2
+        assert conn.execute("SELECT hash, message FROM commits").fetchall() == [
+            ("abc1234", "Add hello function")
+        ]
+        assert conn.execute(
+            "SELECT type FROM content_blocks ORDER BY id LIMIT 1"
+        ).fetchone() == ("text",)
+        assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+        conn.close()
+
+    def test_full_text_search(self, projects_dir, tmp_path):
+        db_path = tmp_path / "archive.db"
+        export_sessions_to_sqlite(projects_dir, db_path)
+
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute(
+            "SELECT messages.anchor FROM messages_fts "
+            "JOIN messages ON messages.id = messages_fts.rowid "
+            "WHERE messages_fts MATCH 'commit' ORDER BY messages.position"
+        ).fetchall()
+        conn.close()
+        assert ("msg-2025-12-24T10-00-15-000Z",) in rows
+
+    def test_rerun_skips_unchanged_sessions(self, projects_dir, tmp_path):
+        db_path = tmp_path / "archive.db"
+        export_sessions_to_sqlite(projects_dir, db_path)
+        stats = export_sessions_to_sqlite(projects_dir, db_path)
+
+        assert stats["skipped_sessions"] == 1
+        assert stats["added_sessions"] == 0
+        assert _count(db_path, "messages") == 7
+
+    def test_changed_session_is_reloaded(self, projects_dir, tmp_path):
+        db_path = tmp_path / "archive.db"
+        export_sessions_to_sqlite(projects_dir, db_path)
+
+        session_file = projects_dir / "-home-user-projects-demo" / "sample.jsonl"
+        with open(session_file, "a") as f:
+            f.write(
+                '{"type": "user", "timestamp": "2025-12-24T11:00:00.000Z", '
+                '"message": {"role": "user", "content": "Zebra question"}}\n'
+            )
+        stat = session_file.stat()
+        os.utime(session_file, (stat.st_atime, stat.st_mtime + 10))
+        stats = export_sessions_to_sqlite(projects_dir, db_path)
+
+        assert stats["updated_sessions"] == 1
+        assert _count(db_path, "sessions") == 1
+        assert _count(db_path, "messages") == 8
+        assert _count(db_path, "commits") == 1
+        conn = sqlite3.connect(db_path)
+        # The full-text index follows deletes and inserts
+        assert conn.execute(
+            "SELECT COUNT(*) FROM messages_fts WHERE messages_fts MATCH 'zebra'"
+        ).fetchone() == (1,)
+        assert (
+            conn.execute(
+                "SELECT COUNT(*) FROM messages_fts WHERE messages_fts MATCH 'hello'"
+            ).fetchone()[0]
+            == conn.execute(
+                "SELECT COUNT(*) FROM messages WHERE text LIKE '%hello%'"
+            ).fetchone()[0]
+        )
+        conn.close()
+
+    def test_deleted_sessions_are_kept(self, projects_dir, tmp_path):
+        db_path = tmp_path / "archive.db"
+        export_sessions_to_sqlite(projects_dir, db_path)
+
+        (projects_dir / "-home-user-projects-demo" / "sample.jsonl").unlink()
+        export_sessions_to_sqlite(projects_dir, db_path)
+
+        assert _count(db_path, "sessions") == 1
+
+    def test_failed_session_leaves_no_rows(self, projects_dir, tmp_path):
+        db_path = tmp_path / "archive.db"
+
+        def broken_loglines(filepath):
+            yield {
+                "type": "user",
+                "timestamp": "2025-01-01T00:00:00.000Z",
+                "message": {"role": "user", "content": "Hello"},
+            }
+            raise OSError("Simulated read failure")
+
+        with patch(
+            "claude_code_transcripts.load_session_loglines",
+            side_effect=broken_loglines,
+        ):
+            stats = export_sessions_to_sqlite(projects_dir, db_path)
+
+        assert len(stats["failed_sessions"]) == 1
+        assert "Simulated read failure" in stats["failed_sessions"][0]["error"]
+        assert _count(db_path, "sessions") == 0
+        assert _count(db_path, "messages") == 0
+
+        # Not recorded, so the next run loads it
+        stats = export_sessions_to_sqlite(projects_dir, db_path)
+        assert stats["added_sessions"] == 1
+
+    def test_batches_across_sessions(self, projects_dir, tmp_path, monkeypatch):
+        project = projects_dir / "-home-user-projects-demo"
+        for i in range(5):
+            shutil.copy(project / "sample.jsonl", project / f"copy{i}.jsonl")
+        monkeypatch.setattr("claude_code_transcripts.SQLITE_BATCH_ROWS", 10)
+        db_path = tmp_path / "archive.db"
+        export_sessions_to_sqlite(projects_dir, db_path)
+
+        assert _count(db_path, "sessions") == 6
+        assert _count(db_path, "messages") == 42
+        conn = sqlite3.connect(db_path)
+        # Every child row points at a message of its own session
+        assert conn.execute(
+            "SELECT COUNT(*) FROM tool_calls JOIN messages "
+            "ON messages.id = tool_calls.message_id "
+            "WHERE messages.session_id != tool_calls.session_id"
+        ).fetchone() == (0,)
+        conn.close()
+
+    def test_rejects_other_schema_version(self, projects_dir, tmp_path):
+        db_path = tmp_path / "archive.db"
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("PRAGMA user_version = 99")
+        with pytest.raises(ValueError, match="schema version 99"):
+            export_sessions_to_sqlite(projects_dir, db_path)
+
+
+class TestSqliteCommand:
+    """Tests for the sqlite CLI command and all --sqlite."""
+
+    def test_sqlite_command(self, projects_dir, tmp_path):
+        db_path = tmp_path / "archive.db"
+        runner = CliRunner()
+        result = runner.invoke(
+            cli, ["sqlite", str(db_path), "--source", str(projects_dir)]
+        )
+
+        assert result.exit_code == 0, result.output
+        assert "Added 1 sessions" in result.output
+        assert _count(db_path, "sessions") == 1
+
+        result = runner.invoke(
+            cli, ["sqlite", str(db_path), "--source", str(projects_dir)]
+        )
+        assert "skipped 1 unchanged" in result.output
+
+    def test_all_with_sqlite(self, projects_dir, tmp_path):
+        db_path = tmp_path / "archive.db"
+        output_dir = tmp_path / "archive"
+        runner = CliRunner()
+        result = runner.invoke(
+            cli,
+            [
+                "all",
+                "--source",
+                str(projects_dir),
+                "--output",
+                str(output_dir),
+                "--sqlite",
+                str(db_path),
+                "--jobs",
+                "1",
+            ],
+        )
+
+        assert result.exit_code == 0, result.output
+        assert (output_dir / "index.html").exists()
+        assert _count(db_path, "messages") == 7
+
+    def test_schema_error_is_reported(self, projects_dir, tmp_path):
+        db_path = tmp_path / "archive.db"
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("PRAGMA user_version = 99")
+        runner = CliRunner()
+        result = runner.invoke(
+            cli, ["sqlite", str(db_path), "--source", str(projects_dir)]
+        )
+
+        assert result.exit_code == 1
+        assert "SQLite export failed" in result.output
@@ -0,0 +1,104 @@
+"""Startup tests: importing the package, --help and first renders stay cheap."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# Imported on first use only, by the commands that need them
+HEAVY_MODULES = ["asyncio", "httpx", "jinja2", "markdown", "questionary"]
+
+
+def run_python(code, *args):
+    result = subprocess.run(
+        [sys.executable, "-c", code, *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout, result.stderr
+
+
+def loaded_heavy_modules(code):
+    stdout, _ = run_python(
+        f"{code}\nimport json, sys\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    return json.loads(stdout.splitlines()[-1])
+
+
+class TestStartup:
+    """Tests that startup does not pay for what the command does not use."""
+
+    def test_import_defers_heavy_modules(self):
+        assert loaded_heavy_modules("import claude_code_transcripts") == []
+
+    @pytest.mark.parametrize("args", [["--help"], ["--version"], ["json", "--help"]])
+    def test_help_and_version_defer_heavy_modules(self, args):
+        code = (
+            "from claude_code_transcripts import cli\n"
+            f"try:\n    cli({args!r})\nexcept SystemExit:\n    pass"
+        )
+        assert loaded_heavy_modules(code) == []
+
+    def test_import_does_not_compile_templates(self):
+        code = (
+            "import claude_code_transcripts\n"
+            "assert claude_code_transcripts._jinja_env is None\n"
+            "assert not any(map(callable, vars(claude_code_transcripts._macros).values()))\n"
+            "assert 'CSS' not in vars(claude_code_transcripts)"
+        )
+        run_python(code)
+
+    def test_css_is_built_on_demand(self):
+        import claude_code_transcripts
+
+        assert claude_code_transcripts.CSS == claude_code_transcripts.get_styles()
+        with pytest.raises(AttributeError):
+            claude_code_transcripts.NOT_AN_ATTRIBUTE
+
+    def test_template_cache_is_written_then_loaded(self, tmp_path, monkeypatch):
+        import claude_code_transcripts
+        from jinja2 import FileSystemBytecodeCache
+
+        session = Path(__file__).parent / "sample_session.jsonl"
+        cache_dir = tmp_path / "templates"
+        monkeypatch.setattr(
+            "claude_code_transcripts.cache.TEMPLATE_CACHE_DIR", cache_dir
+        )
+        calls = {}
+        load_bytecode = FileSystemBytecodeCache.load_bytecode
+        dump_bytecode = FileSystemBytecodeCache.dump_bytecode
+
+        def counting_load(self, bucket):
+            load_bytecode(self, bucket)
+            if bucket.code is not None:
+                calls["loaded"] += 1
+
+        def counting_dump(self, bucket):
+            calls["dumped"] += 1
+            dump_bytecode(self, bucket)
+
+        monkeypatch.setattr(FileSystemBytecodeCache, "load_bytecode", counting_load)
+        monkeypatch.setattr(FileSystemBytecodeCache, "dump_bytecode", counting_dump)
+
+        def render(output):
+            # As in a fresh process: a new environment with nothing compiled
+            monkeypatch.setattr(claude_code_transcripts, "_jinja_env", None)
+            monkeypatch.setattr(
+                claude_code_transcripts, "_macros", claude_code_transcripts._Macros()
+            )
+            calls.update(loaded=0, dumped=0)
+            claude_code_transcripts.generate_html(session, tmp_path / output)
+            return dict(calls)
+
+        cold = render("cold")
+        assert cold["dumped"] > 0
+        assert cold["loaded"] == 0
+        assert len(list(cache_dir.glob("*.cache"))) == cold["dumped"]
+
+        # Every template compiled by the first render is loaded by the second
+        warm = render("warm")
+        assert warm == {"loaded": cold["dumped"], "dumped": 0}
@@ -0,0 +1,258 @@
+"""Tests for --watch: incremental re-rendering of growing sessions."""
+
+import filecmp
+import json
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from claude_code_transcripts import (
+    PaginationPolicy,
+    TranscriptRenderer,
+    TranscriptWatcher,
+    cli,
+    load_session_loglines,
+    read_appended_loglines,
+)
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+def session_lines(prompts):
+    """Return JSONL lines of a session with the given number of prompts."""
+    lines = []
+    for i in range(prompts):
+        timestamp = f"2025-01-01T00:{i // 60:02d}:{i % 60:02d}.000Z"
+        lines.append(
+            {
+                "type": "user",
+                "timestamp": timestamp,
+                "message": {"role": "user", "content": f"Prompt number {i}"},
+            }
+        )
+        lines.append(
+            {
+                "type": "assistant",
+                "timestamp": timestamp,
+                "message": {
+                    "role": "assistant",
+                    "content": [
+                        {"type": "text", "text": f"Answer {i} " + "word " * i},
+                        {
+                            "type": "tool_use",
+                            "id": f"toolu_{i}",
+                            "name": "Bash",
+                            "input": {"command": "git commit -m 'Change'"},
+                        },
+                    ],
+                },
+            }
+        )
+        # The repo only shows up half way through the session
+        output = f"[main abc{i:04d}] Commit {i}\n 1 file changed"
+        if i == prompts // 2:
+            output += "\nremote: github.com/acme/widgets/pull/new/main"
+        lines.append(
+            {
+                "type": "user",
+                "timestamp": timestamp,
+                "message": {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "tool_result",
+                            "tool_use_id": f"toolu_{i}",
+                            "content": output,
+                        }
+                    ],
+                },
+            }
+        )
+    return "".join(json.dumps(line) + "\n" for line in lines).encode("utf-8")
+
+
+def assert_same_output(left, right):
+    comparison = filecmp.dircmp(left, right)
+    assert comparison.left_only == []
+    assert comparison.right_only == []
+    _, mismatch, errors = filecmp.cmpfiles(
+        left, right, comparison.common_files, shallow=False
+    )
+    assert mismatch == [] and errors == []
+
+
+class TestReadAppendedLoglines:
+    """Tests for read_appended_loglines."""
+
+    def test_reads_from_offset(self, tmp_path):
+        path = tmp_path / "session.jsonl"
+        path.write_text('{"type": "summary"}\n{"type": "user"}\n')
+        loglines, offset = read_appended_loglines(path, 0)
+        assert [entry["type"] for entry in loglines] == ["user"]
+        assert offset == path.stat().st_size
+
+        with open(path, "a") as f:
+            f.write('{"type": "assistant"}\n')
+        loglines, offset = read_appended_loglines(path, offset)
+        assert [entry["type"] for entry in loglines] == ["assistant"]
+        assert offset == path.stat().st_size
+
+    def test_leaves_incomplete_line(self, tmp_path):
+        path = tmp_path / "session.jsonl"
+        path.write_text('{"type": "user"}\n{"type": "assis')
+        loglines, offset = read_appended_loglines(path, 0)
+        assert [entry["type"] for entry in loglines] == ["user"]
+        assert offset == len('{"type": "user"}\n')
+
+        with open(path, "a") as f:
+            f.write('tant"}\nnot json\n')
+        loglines, offset = read_appended_loglines(path, offset)
+        assert [entry["type"] for entry in loglines] == ["assistant"]
+        assert offset == path.stat().st_size
+
+
+class TestTranscriptWatcher:
+    """Tests for TranscriptWatcher."""
+
+    @pytest.mark.parametrize(
+        "pagination",
+        [
+            PaginationPolicy(),
+            PaginationPolicy(max_prompts=2, max_messages=5),
+            PaginationPolicy(max_bytes=600),
+        ],
+    )
+    def test_matches_full_render(self, tmp_path, pagination):
+        data = session_lines(24)
+        path = tmp_path / "session.jsonl"
+        path.write_bytes(b"")
+        watcher = TranscriptWatcher(
+            path, tmp_path / "watched", echo=quiet, pagination=pagination
+        )
+
+        # Append in uneven chunks that split lines
+        for start in range(0, len(data), 997):
+            with open(path, "ab") as f:
+                f.write(data[start : start + 997])
+            watcher.update()
+
+        TranscriptRenderer(tmp_path / "full", echo=quiet, pagination=pagination).render(
+            load_session_loglines(path)
+        )
+        assert_same_output(tmp_path / "full", tmp_path / "watched")
+        # Commit links on the first page use the repo detected later on
+        assert (
+            "github.com/acme/widgets/commit/abc0000"
+            in (tmp_path / "watched" / "page-001.html").read_text()
+        )
+
+    def test_only_renders_the_last_pages(self, tmp_path):
+        path = tmp_path / "session.jsonl"
+        path.write_bytes(session_lines(20))
+        watcher = TranscriptWatcher(path, tmp_path / "out", echo=quiet)
+        assert watcher.update() == [1, 2, 3, 4]
+        assert watcher.update() is None
+
+        with open(path, "ab") as f:
+            f.write(session_lines(21)[len(session_lines(20)) :])
+        assert watcher.update() == [4, 5]
+
+    def test_truncated_file_is_rendered_again(self, tmp_path):
+        path = tmp_path / "session.jsonl"
+        path.write_bytes(session_lines(12))
+        watcher = TranscriptWatcher(path, tmp_path / "out", echo=quiet)
+        watcher.update()
+        assert (tmp_path / "out" / "page-003.html").exists()
+
+        path.write_bytes(session_lines(3))
+        assert watcher.update() == [1]
+        assert not (tmp_path / "out" / "page-003.html").exists()
+        assert "Prompt number 2" in (tmp_path / "out" / "page-001.html").read_text()
+
+
+NEW_PROMPT = (
+    '{"type": "user", "timestamp": "2025-12-24T11:00:00.000Z", '
+    '"message": {"role": "user", "content": "A brand new prompt"}}\n'
+)
+
+
+def append_then_stop(path):
+    """Return a time.sleep replacement that appends a prompt, then stops the loop."""
+    calls = []
+
+    def sleep(seconds):
+        calls.append(seconds)
+        if len(calls) == 1:
+            with open(path, "a") as f:
+                f.write(NEW_PROMPT)
+        else:
+            raise KeyboardInterrupt
+
+    return sleep
+
+
+class TestWatchCommands:
+    """Tests for json --watch and all --watch."""
+
+    def test_json_watch(self, tmp_path):
+        session = tmp_path / "session.jsonl"
+        shutil.copy(Path(__file__).parent / "sample_session.jsonl", session)
+        output = tmp_path / "out"
+        runner = CliRunner()
+        with patch(
+            "claude_code_transcripts.time.sleep", side_effect=append_then_stop(session)
+        ):
+            result = runner.invoke(
+                cli, ["json", str(session), "-o", str(output), "--watch"]
+            )
+
+        assert result.exit_code == 0, result.output
+        assert "Watching" in result.output
+        assert "A brand new prompt" in (output / "page-001.html").read_text()
+        assert "A brand new prompt" in (output / "index.html").read_text()
+
+    @pytest.mark.parametrize(
+        "args",
+        [["https://example.com/session.jsonl"], ["-"], ["session.jsonl", "--gist"]],
+    )
+    def test_json_watch_needs_local_file(self, args):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["json", *args, "--watch"])
+        assert result.exit_code == 2
+        assert "--watch" in result.output
+
+    def test_all_watch(self, projects_dir, tmp_path):
+        output = tmp_path / "archive"
+        session = projects_dir / "-home-user-projects-demo" / "sample.jsonl"
+        runner = CliRunner()
+        args = ["all", "-s", str(projects_dir), "-o", str(output), "--jobs", "1"]
+        with patch(
+            "claude_code_transcripts.time.sleep", side_effect=append_then_stop(session)
+        ):
+            result = runner.invoke(cli, [*args, "--watch"])
+
+        assert result.exit_code == 0, result.output
+        assert "Updated demo/sample" in result.output
+        session_dir = output / "demo" / "sample"
+        assert "A brand new prompt" in (session_dir / "page-001.html").read_text()
+        assert "A brand new prompt" in (session_dir / "index.html").read_text()
+        # The archive search index was rebuilt on exit
+        assert any(
+            '"brand"' in shard.read_text() for shard in (output / "search").iterdir()
+        )
+
+        # The manifest records the watched version, so nothing is re-rendered
+        result = runner.invoke(cli, args)
+        assert "Skipped 1 unchanged sessions" in result.output
+
+    def test_all_watch_rejects_dry_run(self, projects_dir):
+        runner = CliRunner()
+        result = runner.invoke(
+            cli, ["all", "-s", str(projects_dir), "--watch", "--dry-run"]
+        )
+        assert result.exit_code == 2
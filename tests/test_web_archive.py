@@ -0,0 +1,301 @@
+"""Tests for web --all: listing, fetching and archiving every web session."""
+
+import asyncio
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+import pytest
+from click.testing import CliRunner
+
+from claude_code_transcripts import (
+    cli,
+    fetch_web_sessions,
+    generate_web_archive,
+    get_web_session_project,
+    list_web_sessions,
+)
+
+SESSIONS_URL = "https://api.anthropic.com/v1/sessions"
+
+
+@pytest.fixture
+def session_data():
+    with open(Path(__file__).parent / "sample_session.json") as f:
+        return json.load(f)
+
+
+def session_list(count, repo=None):
+    sessions = []
+    for i in range(count):
+        session = {
+            "id": f"session_{i:02d}",
+            "title": f"Session number {i}",
+            "created_at": f"2025-01-{i + 1:02d}T10:00:00Z",
+        }
+        if repo:
+            session["session_context"] = {
+                "sources": [{"type": "git_repository", "url": repo}]
+            }
+        sessions.append(session)
+    return sessions
+
+
+def api_handler(sessions, session_data, page_size=2, failing=()):
+    """Return a handler serving sessions in pages and each session's body."""
+
+    def handler(request):
+        url = str(request.url)
+        if request.url.path == "/v1/sessions":
+            after = request.url.params.get("after_id")
+            start = 0
+            if after:
+                start = [s["id"] for s in sessions].index(after) + 1
+            page = sessions[start : start + page_size]
+            return httpx.Response(
+                200,
+                json={
+                    "data": page,
+                    "has_more": start + page_size < len(sessions),
+                    "last_id": page[-1]["id"] if page else None,
+                },
+            )
+        session_id = url.rsplit("/", 1)[-1]
+        if session_id in failing:
+            return httpx.Response(404, json={"error": "not found"})
+        return httpx.Response(200, json=session_data)
+
+    return handler
+
+
+class TestListWebSessions:
+    """Tests for list_web_sessions."""
+
+    def test_follows_pagination(self, mock_http_client):
+        requests = mock_http_client(api_handler(session_list(5), {}))
+        sessions = list_web_sessions("token", "org")
+
+        assert [s["id"] for s in sessions] == [f"session_{i:02d}" for i in range(5)]
+        assert [str(request.url) for request in requests] == [
+            SESSIONS_URL,
+            SESSIONS_URL + "?after_id=session_01",
+            SESSIONS_URL + "?after_id=session_03",
+        ]
+
+    def test_since(self, mock_http_client):
+        sessions = session_list(4)
+        sessions[0]["updated_at"] = "2025-02-01T00:00:00Z"
+        mock_http_client(api_handler(sessions, {}, page_size=10))
+        since = datetime(2025, 1, 3, tzinfo=timezone.utc)
+
+        sessions = list_web_sessions("token", "org", since=since)
+        assert [s["id"] for s in sessions] == ["session_00", "session_02", "session_03"]
+
+
+class TestGetWebSessionProject:
+    """Tests for get_web_session_project."""
+
+    def test_uses_repository_name(self):
+        session = session_list(1, repo="https://github.com/acme/widgets.git")[0]
+        assert get_web_session_project(session) == "widgets"
+
+    def test_default_project(self):
+        assert get_web_session_project({"id": "x"}) == "web"
+        assert get_web_session_project({"session_context": {"sources": []}}) == "web"
+
+
+class TestFetchWebSessions:
+    """Tests for fetch_web_sessions."""
+
+    def test_fetches_concurrently_within_limit(self, session_data):
+        in_flight = 0
+        most_in_flight = 0
+
+        async def handler(request):
+            nonlocal in_flight, most_in_flight
+            in_flight += 1
+            most_in_flight = max(most_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            if request.url.path.endswith("session_03"):
+                return httpx.Response(404)
+            return httpx.Response(200, json=session_data)
+
+        ids = [f"session_{i:02d}" for i in range(12)]
+        results = list(
+            fetch_web_sessions(
+                "token",
+                "org",
+                ids,
+                concurrency=3,
+                rate=1000,
+                transport=httpx.MockTransport(handler),
+            )
+        )
+
+        assert sorted(session_id for session_id, _, _ in results) == ids
+        assert most_in_flight == 3
+        errors = {session_id: error for session_id, _, error in results if error}
+        assert list(errors) == ["session_03"]
+        assert isinstance(errors["session_03"], httpx.HTTPStatusError)
+
+    def test_stopping_early(self, session_data):
+        transport = httpx.MockTransport(
+            lambda request: httpx.Response(200, json=session_data)
+        )
+        results = fetch_web_sessions(
+            "token",
+            "org",
+            [f"session_{i}" for i in range(50)],
+            concurrency=2,
+            rate=1000,
+            transport=transport,
+        )
+        next(results)
+        # Closing the generator waits for the background fetches to wind down
+        results.close()
+
+
+class TestWebArchive:
+    """Tests for generate_web_archive and web --all."""
+
+    def test_generates_project_tree(self, mock_http_client, session_data, tmp_path):
+        sessions = session_list(3, repo="https://github.com/acme/widgets")
+        sessions.append(session_list(4)[3])
+        handler = api_handler(sessions, session_data, failing={"session_01"})
+        mock_http_client(handler)
+
+        stats = generate_web_archive(
+            "token",
+            "org",
+            tmp_path / "archive",
+            rate=1000,
+            transport=httpx.MockTransport(handler),
+            include_json=True,
+        )
+
+        archive = tmp_path / "archive"
+        assert stats["total_projects"] == 2
+        assert stats["total_sessions"] == 3
+        assert [failure["session"] for failure in stats["failed_sessions"]] == [
+            "session_01"
+        ]
+        assert (archive / "widgets" / "session_00" / "index.html").exists()
+        assert (archive / "widgets" / "session_02" / "session_02.json").exists()
+        assert (archive / "web" / "session_03" / "page-001.html").exists()
+        assert not (archive / "widgets" / "session_01").exists()
+
+        project_index = (archive / "widgets" / "index.html").read_text()
+        assert "Session number 2" in project_index
+        assert "Session number 1" not in project_index
+        master_index = (archive / "index.html").read_text()
+        assert 'href="widgets/index.html"' in master_index
+        assert 'href="web/index.html"' in master_index
+        assert (archive / "search" / "index.json").exists()
+
+    @pytest.mark.parametrize(
+        "session_id", ["../escaped", "a/b", "/tmp/absolute", "..", "", 42]
+    )
+    def test_skips_unsafe_session_ids(
+        self, mock_http_client, session_data, tmp_path, session_id
+    ):
+        sessions = session_list(2)
+        sessions[1]["id"] = session_id
+        handler = api_handler(sessions, session_data)
+        mock_http_client(handler)
+        requests = []
+
+        def recording_handler(request):
+            requests.append(request)
+            return handler(request)
+
+        stats = generate_web_archive(
+            "token",
+            "org",
+            tmp_path / "archive",
+            rate=1000,
+            transport=httpx.MockTransport(recording_handler),
+            include_json=True,
+        )
+
+        assert stats["total_sessions"] == 1
+        assert [str(request.url).rsplit("/", 1)[-1] for request in requests] == [
+            "session_00"
+        ]
+        if session_id:
+            assert [failure["session"] for failure in stats["failed_sessions"]] == [
+                str(session_id)
+            ]
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["archive"]
+        assert not (tmp_path / "escaped").exists()
+        assert not (tmp_path / "archive" / "escaped").exists()
+
+    def test_web_all_command(self, httpx_mock, session_data, tmp_path):
+        httpx_mock.add_callback(
+            api_handler(session_list(3), session_data), is_reusable=True
+        )
+        runner = CliRunner()
+        result = runner.invoke(
+            cli,
+            [
+                "web",
+                "--all",
+                "--token",
+                "test-token",
+                "--org-uuid",
+                "test-org",
+                "-o",
+                str(tmp_path / "archive"),
+                "--since",
+                "2025-01-02",
+            ],
+        )
+
+        assert result.exit_code == 0, result.output
+        assert "Generated archive with 1 projects, 2 sessions" in result.output
+        assert (tmp_path / "archive" / "web" / "session_02" / "index.html").exists()
+        assert not (tmp_path / "archive" / "web" / "session_00").exists()
+
+    @pytest.mark.parametrize(
+        "args",
+        [["SESSION_ID", "--all"], ["--all", "--gist"], ["--since", "2025-01-01"]],
+    )
+    def test_invalid_combinations(self, args):
+        runner = CliRunner()
+        result = runner.invoke(
+            cli, ["web", *args, "--token", "test-token", "--org-uuid", "test-org"]
+        )
+        assert result.exit_code == 2
+
+    def test_rerendering_uses_cached_responses(
+        self, httpx_mock, session_data, tmp_path
+    ):
+        httpx_mock.add_callback(
+            api_handler(session_list(3), session_data), is_reusable=True
+        )
+        theme = tmp_path / "dark.json"
+        theme.write_text(json.dumps({"bg_color": "#111111"}))
+        runner = CliRunner()
+        args = ["--token", "test-token", "--org-uuid", "test-org"]
+        for extra in [[], ["--theme", str(theme)]]:
+            output = tmp_path / ("dark" if extra else "light")
+            result = runner.invoke(
+                cli, ["web", "--all", *args, "-o", str(output), *extra]
+            )
+            assert result.exit_code == 0, result.output
+        # The second run was served entirely from the response cache
+        assert len(httpx_mock.get_requests()) == 5
+
+        result = runner.invoke(
+            cli, ["web", "session_00", *args, "-o", str(tmp_path / "one")]
+        )
+        assert result.exit_code == 0, result.output
+        assert len(httpx_mock.get_requests()) == 5
+
+        result = runner.invoke(
+            cli,
+            ["web", "--all", *args, "-o", str(tmp_path / "again"), "--no-cache"],
+        )
+        assert result.exit_code == 0, result.output
+        assert len(httpx_mock.get_requests()) == 10